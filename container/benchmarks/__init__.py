@@ -0,0 +1 @@
+"""Benchmarks for the TerminAI MCP server against local fake AI sites"""
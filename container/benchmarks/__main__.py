@@ -0,0 +1,7 @@
+"""Run the benchmark harness: python -m benchmarks --help"""
+
+import sys
+
+from .harness import main
+
+sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Fake AI chat sites
+Serves chat pages whose DOM matches each handler spec and streams answers with a configurable token rate
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from mcp_server.handler_specs import get_handler_spec, has_handler_spec
+from mcp_server.waiting import DEFAULT_DONE_SELECTORS, DEFAULT_STOP_SELECTORS
+
+logger = logging.getLogger("terminai-benchmark-sites")
+
+FAILURE_MODES = ("stall", "drop")
+
+# One simple selector: tag, #id, .class, [attr], [attr op value] or a structural pseudo-class
+_SIMPLE_SELECTOR = re.compile(
+    r"""(?P<tag>[a-zA-Z][\w-]*)
+      | \#(?P<id>[\w-]+)
+      | \.(?P<cls>[\w-]+)
+      | \[(?P<attr>[\w-]+)(?:[*^$|~]?=(?P<quote>['"]?)(?P<value>.*?)(?P=quote))?\]
+      | :(?P<pseudo>first-child|last-child)""",
+    re.VERBOSE
+)
+
+
+@dataclass
+class SiteSettings:
+    """How a fake site answers; every field can be overridden in the page URL"""
+
+    # Tokens per second while the answer streams
+    rate: float = 40.0
+    # Relative variation of each token delay, 0.3 means +-30 %
+    jitter: float = 0.3
+    # Delay before the first token, in milliseconds
+    first_token_ms: float = 300.0
+    # Words in each answer
+    tokens: int = 60
+    # Share of questions that fail, and how: "stall" stops halfway, "drop" never answers
+    failure_rate: float = 0.0
+    failure_mode: str = "stall"
+    # Seed of the page's random numbers; 0 draws a new one on every page load
+    seed: int = 0
+    # Delay before the server sends the page, in milliseconds
+    load_ms: float = 0.0
+
+    @classmethod
+    def from_query(cls, query: str, base: Optional["SiteSettings"] = None) -> "SiteSettings":
+        values = asdict(base or cls())
+        for field in fields(cls):
+            raw = parse_qs(query).get(field.name)
+            if raw:
+                values[field.name] = type(values[field.name])(raw[-1])
+        if values["failure_mode"] not in FAILURE_MODES:
+            raise ValueError(f"Unknown failure mode: {values['failure_mode']}")
+        return cls(**values)
+
+    def query(self) -> str:
+        return urlencode(asdict(self))
+
+
+def _split(selector: str, separators: str) -> List[str]:
+    """Split outside brackets, parentheses and quotes"""
+    parts, current, depth, quote = [], "", 0, None
+    for char in selector:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        elif depth == 0 and char in separators:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_selector(selector: str, default_tag: str = "div") -> Optional[List[Dict[str, Any]]]:
+    """Turn a CSS selector into the chain of elements that matches it
+
+    Returns a list of {"tag", "attrs"} from the outermost element inwards, or
+    None for selectors that cannot be built, e.g. Playwright's :has-text().
+    Only the first selector of a comma separated list is used.
+    """
+    chain = []
+    for compound in _split(_split(selector, ",")[0] if selector else "", " >"):
+        tag, attrs, classes, position = None, {}, [], 0
+        while position < len(compound):
+            match = _SIMPLE_SELECTOR.match(compound, position)
+            if match is None or (match.group("tag") and position > 0):
+                return None
+            if match.group("tag"):
+                tag = match.group("tag").lower()
+            elif match.group("id"):
+                attrs["id"] = match.group("id")
+            elif match.group("cls"):
+                classes.append(match.group("cls"))
+            elif match.group("attr"):
+                attrs[match.group("attr")] = match.group("value") or ""
+            position = match.end()
+        if classes:
+            attrs["class"] = " ".join(classes)
+        chain.append({"tag": tag, "attrs": attrs})
+    if not chain:
+        return None
+    for index, part in enumerate(chain):
+        if part["tag"] is None:
+            innermost = index == len(chain) - 1 and "contenteditable" not in part["attrs"]
+            part["tag"] = default_tag if innermost else "div"
+    return chain
+
+
+def first_buildable(selectors: Sequence[str], default_tag: str = "div") -> Optional[List[Dict[str, Any]]]:
+    """Return the element chain of the first selector that can be built"""
+    for selector in selectors:
+        chain = parse_selector(selector, default_tag)
+        if chain is not None:
+            return chain
+    return None
+
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>
+  body { font-family: sans-serif; margin: 2em; }
+  #composer > * { display: block; margin: 0.5em 0; min-width: 20em; min-height: 1.5em; border: 1px solid #999; }
+  #log > * { margin: 1em 0; }
+</style>
+</head>
+<body>
+<div id="composer"></div>
+<div id="log"></div>
+<div id="actions"></div>
+<script>
+const CONFIG = %(config)s;
+(() => {
+    // mulberry32, so a fixed seed gives the same delays and failures on every run
+    let state = (CONFIG.seed || Math.floor(Math.random() * 4294967296)) >>> 0;
+    const random = () => {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+    const jittered = (ms) => Math.max(0, ms * (1 + CONFIG.jitter * (2 * random() - 1)));
+
+    // Create nested elements for a parsed selector and return [outermost, innermost]
+    const build = (chain, text) => {
+        let outer = null;
+        let inner = null;
+        for (const part of chain) {
+            const element = document.createElement(part.tag);
+            for (const [name, value] of Object.entries(part.attrs)) element.setAttribute(name, value);
+            if (inner) inner.appendChild(element); else outer = element;
+            inner = element;
+        }
+        if (text !== undefined) inner.textContent = text;
+        return [outer, inner];
+    };
+
+    const composer = document.getElementById('composer');
+    const log = document.getElementById('log');
+    const actions = document.getElementById('actions');
+
+    const [inputOuter, input] = build(CONFIG.input);
+    const isField = input.tagName === 'TEXTAREA' || input.tagName === 'INPUT';
+    if (!isField) input.setAttribute('contenteditable', 'true');
+    composer.appendChild(inputOuter);
+    if (CONFIG.button) {
+        const [buttonOuter, button] = build(CONFIG.button, 'Send');
+        button.addEventListener('click', () => submit());
+        composer.appendChild(buttonOuter);
+    }
+
+    const WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit'];
+    let generation = 0;
+
+    const submit = () => {
+        const question = (isField ? input.value : input.innerText).trim();
+        if (!question) return;
+        if (isField) input.value = ''; else input.textContent = '';
+        ask(question);
+    };
+
+    input.addEventListener('keydown', (event) => {
+        if (event.key === 'Enter' && !event.shiftKey) {
+            event.preventDefault();
+            submit();
+        }
+    });
+
+    const ask = (question) => {
+        const current = ++generation;
+        // Earlier turns stay in the log, as in a real chat thread, so extraction
+        // that reads them as part of the answer is caught by the harness
+        const failing = random() < CONFIG.failure_rate;
+        const mode = failing ? CONFIG.failure_mode : 'ok';
+        if (mode === 'drop') return;
+
+        const tokens = ['Reply to ' + question + ':'];
+        for (let i = 0; i < CONFIG.tokens; i++) tokens.push(WORDS[i %% WORDS.length]);
+        tokens.push('[done]');
+        const limit = mode === 'stall' ? Math.floor(tokens.length / 2) : tokens.length;
+
+        const [stop] = build(CONFIG.stop, 'Stop');
+        composer.appendChild(stop);
+        const [turn, body] = build(CONFIG.answer, '');
+        let shown = 0;
+
+        const next = () => {
+            if (current !== generation) {
+                stop.remove();
+                return;
+            }
+            if (shown === 0) log.appendChild(turn);
+            shown += 1;
+            body.textContent = tokens.slice(0, shown).join(' ');
+            if (shown < limit) {
+                setTimeout(next, jittered(1000 / CONFIG.rate));
+            } else if (mode === 'ok') {
+                // Complete: the stop control goes away and a copy control appears
+                stop.remove();
+                actions.appendChild(build(CONFIG.done, 'Copy')[0]);
+            }
+        };
+        setTimeout(next, jittered(CONFIG.first_token_ms));
+    };
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def render_page(service: str, settings: SiteSettings) -> str:
+    """Return the fake chat page for the service"""
+    if not has_handler_spec(service):
+        raise KeyError(service)
+    spec = get_handler_spec(service)
+    config = {
+        **asdict(settings),
+        "input": first_buildable(spec.input, "textarea") or [{"tag": "textarea", "attrs": {}}],
+        "button": first_buildable(spec.buttons, "button") if spec.submit == "click" else None,
+        "answer": first_buildable(spec.answer) or [{"tag": "div", "attrs": {"class": "answer"}}],
+        "stop": first_buildable(spec.stop or DEFAULT_STOP_SELECTORS, "button"),
+        "done": first_buildable(spec.done or DEFAULT_DONE_SELECTORS, "button")
+    }
+    title = f"{spec.name or service} (fake)"
+    # Keep "</script>" in values from ending the script element early
+    payload = json.dumps(config, ensure_ascii=False).replace("</", "<\\/")
+    return _PAGE % {"title": title.replace("<", "&lt;"), "config": payload}
+
+
+class FakeSiteServer:
+    """HTTP server with one fake chat page per service at /<service>/"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, settings: Optional[SiteSettings] = None):
+        self.settings = settings or SiteSettings()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url_for(self, service: str, settings: Optional[SiteSettings] = None) -> str:
+        """URL of the service's page; settings are passed in the query string"""
+        host = self._server.server_address[0]
+        query = f"?{settings.query()}" if settings is not None else ""
+        return f"http://{host}:{self.port}/{service}/{query}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                service = url.path.strip("/").split("/")[0]
+                try:
+                    settings = SiteSettings.from_query(url.query, server.settings)
+                    body = render_page(service, settings).encode("utf-8")
+                except KeyError:
+                    self.send_error(404, f"No handler spec for {service!r}")
+                    return
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+                if settings.load_ms > 0:
+                    time.sleep(settings.load_ms / 1000)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> "FakeSiteServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-sites", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    """Serve the fake sites until interrupted, e.g. to inspect a page in a browser"""
+    parser = argparse.ArgumentParser(description="Serve fake AI chat pages built from handler_specs.yaml")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FakeSiteServer(args.host, args.port)
+    print(f"Serving fake sites on {server.url_for('<service>')}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
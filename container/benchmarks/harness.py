@@ -0,0 +1,333 @@
+"""
+Benchmark harness
+Drives /ask and /ask/stream against the fake sites through a headless Chromium and reports latency percentiles
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import yaml
+
+from .fake_sites import FAILURE_MODES, FakeSiteServer, SiteSettings
+
+logger = logging.getLogger("terminai-benchmark")
+
+FLOWS = ("ask", "stream")
+DEFAULT_SERVICES = ("deepseek", "chatgpt", "kimi")
+
+# Marker the fake sites put at the end of a complete answer
+DONE_MARKER = "[done]"
+# Every fake answer starts with this, so it shows up twice if earlier turns were extracted
+REPLY_PREFIX = "Reply to "
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Linearly interpolated percentile, p in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class Sample:
+    """Outcome of one request"""
+
+    latency: float
+    ok: bool
+    # Seconds until the first answer text, for streamed requests
+    first_token: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class Result:
+    """Samples of one service and flow"""
+
+    service: str
+    flow: str
+    wall_seconds: float = 0.0
+    samples: List[Sample] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = [sample.latency for sample in self.samples if sample.ok]
+        first_tokens = [sample.first_token for sample in self.samples if sample.ok and sample.first_token is not None]
+        errors: Dict[str, int] = {}
+        for sample in self.samples:
+            if not sample.ok:
+                errors[sample.error or "error"] = errors.get(sample.error or "error", 0) + 1
+
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 3) if value is not None else None
+
+        return {
+            "service": self.service,
+            "flow": self.flow,
+            "requests": len(self.samples),
+            "ok": len(latencies),
+            "errors": errors,
+            "p50": rounded(percentile(latencies, 50)),
+            "p95": rounded(percentile(latencies, 95)),
+            "p99": rounded(percentile(latencies, 99)),
+            "first_token_p50": rounded(percentile(first_tokens, 50)),
+            "first_token_p95": rounded(percentile(first_tokens, 95)),
+            "throughput": round(len(latencies) / self.wall_seconds, 3) if self.wall_seconds > 0 else None
+        }
+
+
+def check_answer(answer: Optional[str], question: str) -> Optional[str]:
+    """Return why the answer is wrong, or None if it is the complete answer to the question"""
+    if not answer or question not in answer:
+        return "wrong_answer"
+    if answer.count(REPLY_PREFIX) > 1:
+        return "earlier_answer"
+    if not answer.rstrip().endswith(DONE_MARKER):
+        return "incomplete_answer"
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def benchmark_config(base: Dict[str, Any], urls: Dict[str, str], response_timeout: int) -> Dict[str, Any]:
+    """Copy of config.yaml pointing the services at the fake sites
+
+    The cache is disabled and the rate limits lifted so every request reaches
+    the browser, and nothing is written to the user's statistics files.
+    """
+    config = copy.deepcopy(base)
+    services = [dict(service) for service in config.get('ai_services', []) if service.get('id') in urls]
+    for service in services:
+        service['url'] = urls[service['id']]
+        service['enabled'] = True
+        service.pop('response_timeout', None)
+    config['ai_services'] = services
+    config.setdefault('browser', {})['response_timeout'] = response_timeout
+    config['browser']['debug_ports'] = []
+    config['answer_cache'] = {'enabled': False}
+    config['selector_stats'] = {'path': None}
+    scheduler = config.setdefault('scheduler', {})
+    scheduler['default'] = {**(scheduler.get('default') or {}), 'rate_per_minute': 0, 'max_queue_wait': 3600,
+                            'queue_size': 10000, 'batch_queue_size': 10000}
+    scheduler['services'] = {}
+    return config
+
+
+async def launch_chromium(port: int, executable: Optional[str], profile: str) -> subprocess.Popen:
+    """Start a headless Chromium with the DevTools endpoint on the port"""
+    if executable is None:
+        from playwright.async_api import async_playwright
+        playwright = await async_playwright().start()
+        try:
+            executable = playwright.chromium.executable_path
+        finally:
+            await playwright.stop()
+    process = subprocess.Popen(
+        [executable, "--headless=new", f"--remote-debugging-port={port}", f"--user-data-dir={profile}",
+         "--no-first-run", "--no-default-browser-check", "about:blank"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout=0.5)
+            writer.close()
+            await writer.wait_closed()
+            return process
+        except (OSError, asyncio.TimeoutError):
+            if process.poll() is not None:
+                raise RuntimeError(f"Chromium exited with code {process.returncode}")
+            await asyncio.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Chromium did not open its DevTools port within 30 s")
+
+
+async def ask_once(client: Any, service: str, flow: str) -> Sample:
+    """Send one question and time it"""
+    question = f"q-{uuid.uuid4().hex[:12]}"
+    params = {"ai": service, "question": question, "no_cache": "true"}
+    start = time.monotonic()
+    try:
+        if flow == "ask":
+            response = await client.post("/ask", params=params)
+            latency = time.monotonic() - start
+            if response.status_code != 200:
+                return Sample(latency, False, error=f"http_{response.status_code}")
+            error = check_answer(response.json().get("answer"), question)
+            return Sample(latency, error is None, error=error)
+
+        params.pop("no_cache")
+        first_token = None
+        answer = None
+        event = None
+        async with client.stream("POST", "/ask/stream", params=params) as response:
+            if response.status_code != 200:
+                return Sample(time.monotonic() - start, False, error=f"http_{response.status_code}")
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    if event == "first_token" and first_token is None:
+                        first_token = time.monotonic() - start
+                    elif event == "done":
+                        answer = json.loads(line[len("data: "):]).get("answer")
+                    elif event == "error":
+                        return Sample(time.monotonic() - start, False, first_token, "stream_error")
+        latency = time.monotonic() - start
+        error = check_answer(answer, question)
+        return Sample(latency, error is None, first_token, error)
+    except Exception as e:
+        return Sample(time.monotonic() - start, False, error=type(e).__name__)
+
+
+async def run_flow(client: Any, service: str, flow: str, requests: int, concurrency: int) -> Result:
+    """Send the requests for one service and flow, at most `concurrency` at a time"""
+    result = Result(service, flow)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            result.samples.append(await ask_once(client, service, flow))
+
+    start = time.monotonic()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    result.wall_seconds = time.monotonic() - start
+    return result
+
+
+def format_table(summaries: List[Dict[str, Any]]) -> str:
+    """Render the summaries as a fixed-width table"""
+    columns = ["service", "flow", "requests", "ok", "p50", "p95", "p99", "first_token_p50", "throughput"]
+    rows = [[("-" if summary[column] is None else str(summary[column])) for column in columns] for summary in summaries]
+    widths = [max(len(column), *(len(row[index]) for row in rows)) for index, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows]
+    for summary in summaries:
+        if summary["errors"]:
+            lines.append(f"{summary['service']}/{summary['flow']} errors: {summary['errors']}")
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Start the fake sites, Chromium and the server, then run every service and flow"""
+    settings = SiteSettings(
+        rate=args.rate, jitter=args.jitter, first_token_ms=args.first_token_ms, tokens=args.tokens,
+        failure_rate=args.failure_rate, failure_mode=args.failure_mode, seed=args.seed, load_ms=args.load_ms
+    )
+    sites = FakeSiteServer().start()
+    workdir = tempfile.mkdtemp(prefix="terminai-bench-")
+    chromium = None
+    server = None
+    server_task = None
+    try:
+        # Point the server at the fake sites before its modules read config.yaml
+        from mcp_server.service_registry import service_registry
+        urls = {service: sites.url_for(service, settings) for service in args.services}
+        config_path = os.path.join(workdir, "config.yaml")
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(benchmark_config(service_registry.config(), urls, args.timeout * 1000), f)
+        service_registry.path = config_path
+
+        import httpx
+        import uvicorn
+        from mcp_server.main import app
+
+        debug_port = free_port()
+        chromium = await launch_chromium(debug_port, args.chromium, os.path.join(workdir, "profile"))
+
+        api_port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=api_port, log_level="warning"))
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            if server_task.done():
+                server_task.result()
+            await asyncio.sleep(0.05)
+
+        summaries = []
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}", timeout=None) as client:
+            response = await client.post("/init", json={"debug_port": debug_port})
+            response.raise_for_status()
+            for service in args.services:
+                # Open and load the service tab before measuring
+                for _ in range(args.warmup):
+                    await ask_once(client, service, "ask")
+                for flow in args.flows:
+                    result = await run_flow(client, service, flow, args.requests, args.concurrency)
+                    summaries.append(result.summary())
+                    logger.info(f"{service}/{flow} done")
+            if args.metrics:
+                metrics = await client.get("/metrics")
+                with open(args.metrics, "w", encoding="utf-8") as f:
+                    f.write(metrics.text)
+        return summaries
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await server_task
+        if chromium is not None:
+            chromium.terminate()
+            chromium.wait(timeout=10)
+        sites.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the MCP server against local fake AI sites")
+    parser.add_argument("--services", type=lambda value: value.split(","), default=list(DEFAULT_SERVICES),
+                        help="comma separated service ids (default: %(default)s)")
+    parser.add_argument("--flows", type=lambda value: value.split(","), default=list(FLOWS),
+                        help="comma separated flows: ask, stream (default: both)")
+    parser.add_argument("--requests", type=int, default=20, help="measured requests per service and flow")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight per service")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured requests per service")
+    parser.add_argument("--rate", type=float, default=40.0, help="tokens per second")
+    parser.add_argument("--jitter", type=float, default=0.3, help="relative token delay variation")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="delay before the first token")
+    parser.add_argument("--tokens", type=int, default=60, help="words per answer")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of questions that fail")
+    parser.add_argument("--failure-mode", choices=FAILURE_MODES, default="stall")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="delay before a page is served")
+    parser.add_argument("--seed", type=int, default=0, help="seed for delays and failures, 0 for random")
+    parser.add_argument("--timeout", type=int, default=15, help="answer timeout in seconds")
+    parser.add_argument("--chromium", help="Chromium executable (default: Playwright's)")
+    parser.add_argument("--json", help="write the summaries to this file")
+    parser.add_argument("--metrics", help="write the server's /metrics after the run to this file")
+    args = parser.parse_args(argv)
+    unknown = set(args.flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    summaries = asyncio.run(run(args))
+    print(format_table(summaries))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+    return 0 if all(summary["ok"] for summary in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
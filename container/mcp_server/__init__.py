@@ -2,3 +2,5 @@
 
 __version__ = "1.0.0"
 
+# Imported first so startup timings include every other server import
+from .startup import startup_report  # noqa: E402,F401
@@ -2,22 +2,296 @@
 Base class for AI-specific handlers
 """
 
+import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
-from playwright.async_api import Page
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from .extraction import extract_answer
+from .latency import latency_tracker
+from .metrics import metrics
+from .text_input import BULK_INSERT_CHARS, insert_text
+from .tracing import tracer
+from .utils import load_config
+from .waiting import (
+    DEFAULT_DONE_SELECTORS,
+    DEFAULT_POLL_MS,
+    DEFAULT_STOP_SELECTORS,
+    prepare_answer_wait,
+    wait_for_answer,
+    wait_for_input_ready,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import ElementHandle, Page
+
+logger = logging.getLogger("terminai-mcp-handler")
+
+# In-app controls that start a fresh conversation without reloading the page
+DEFAULT_NEW_CHAT_SELECTORS = [
+    "[data-testid='create-new-chat-button']",
+    "button[aria-label*='New chat']",
+    "a[aria-label*='New chat']",
+    "button:has-text('New chat')",
+    "div[role='button']:has-text('新对话')",
+    "button:has-text('新对话')",
+    "button:has-text('新建对话')",
+    "button:has-text('新建会话')"
+]
+
+
+class PartialAnswer(str):
+    """Answer text extracted after the wait for the site to finish timed out"""
+
+
+def _host_and_path(url: str):
+    """Split a URL into a host without 'www.' and a path without trailing slash"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host, parsed.path.rstrip("/")
 
 class AIHandler(ABC):
-    """Base class for AI-specific handlers"""
-    
-    def __init__(self, page: Page):
-        self.page = page
-    
-    @abstractmethod
-    async def ask_question(self, question: str) -> str:
-        """Ask a question to the AI service and return the response"""
-        pass
-    
+    """Base class for AI-specific handlers
+
+    ``ask_question`` is a template method: it runs the stages below in order
+    and each stage calls a hook that subclasses may override. Every stage is
+    timed for /metrics and traced as a span of the current request.
+    """
+
+    # Selectors used to locate the chat input, send button and answer
+    input_selectors: List[str] = []
+    button_selectors: List[str] = []
+    answer_selectors: List[str] = []
+    # Selectors used to detect when an answer is still generating or complete
+    stop_selectors: List[str] = DEFAULT_STOP_SELECTORS
+    done_selectors: List[str] = DEFAULT_DONE_SELECTORS
+    # Selectors for the site's own "new chat" action
+    new_chat_selectors: List[str] = DEFAULT_NEW_CHAT_SELECTORS
+    # How answer elements are read: "first" reads the newest (last) matching element,
+    # "all" joins the elements added for the current answer
+    extract_mode: str = "first"
+    # How long questions are put into the input, see text_input.INSERT_MODES
+    insert_mode: str = "insert_text"
+    # Set when a wait of the current stage timed out, see stage()
+    wait_timed_out: bool = False
+
+    def __init__(self, page: "Page"):
+        # Playwright calls made by the handler are traced when spans are exported
+        self.page = tracer.wrap(page)
+
     @abstractmethod
     async def navigate_to_service(self) -> None:
         """Navigate to the AI service website"""
-        pass
\ No newline at end of file
+        pass
+
+    @property
+    def display_name(self) -> str:
+        """Name used in error messages"""
+        service = getattr(self, 'service', None)
+        return service.name if service else type(self).__name__
+
+    async def ask_question(self, question: str) -> str:
+        """Ask a question to the AI service and return the response
+
+        Returns a PartialAnswer if the site had not finished the answer when
+        the wait timed out, and raises RuntimeError if no answer was found.
+        """
+        if not self.page:
+            raise RuntimeError("Browser page not available")
+
+        with self.stage("locate_input"):
+            input_element = await self.locate_input()
+        if not input_element:
+            raise RuntimeError(f"Could not find input element for {self.display_name}")
+
+        with self.stage("fill"):
+            await self.fill_input(input_element, question)
+
+        with self.stage("submit"):
+            await self.prepare_answer_wait()
+            await self.submit(input_element)
+
+        # Wait until the answer is complete
+        with self.stage("completion"):
+            complete = await self.wait_for_answer()
+
+        with self.stage("extract"):
+            answer = await self.extract_response()
+        if not answer:
+            raise RuntimeError(f"No answer found from {self.display_name} - please check the website structure")
+        # The text so far is still useful to the caller, but must not be cached as the answer
+        return answer if complete else PartialAnswer(answer)
+
+    async def locate_input(self) -> "Optional[ElementHandle]":
+        """Hook: find the chat input, trying the input selectors in order"""
+        for selector in self.input_selectors:
+            elements = await self.page.query_selector_all(selector)
+            if elements:
+                self.record_selector("input", selector)
+                # Select the last one (usually the latest input box)
+                return elements[-1]
+        self.record_selector("input", None)
+        return None
+
+    async def fill_input(self, input_element: "ElementHandle", question: str) -> None:
+        """Hook: put the question into the chat input
+
+        Long questions are inserted in one step with ``insert_mode`` and the
+        input is checked to hold all of the text.
+        """
+        if len(question) < BULK_INSERT_CHARS:
+            await input_element.fill(question)
+        else:
+            await insert_text(self.page, input_element, question, self.insert_mode)
+
+    async def submit(self, input_element: "ElementHandle") -> None:
+        """Hook: send the question with the first send button found, or Enter"""
+        for selector in self.button_selectors:
+            button = await self.page.query_selector(selector)
+            if button:
+                await button.click()
+                self.record_selector("button", selector)
+                return
+        # Press Enter in the input field
+        await input_element.press("Enter")
+
+    async def extract_response(self) -> Optional[str]:
+        """Hook: read the answer in one round trip, however many nodes it spans"""
+        answer, selector = await extract_answer(self.page, self.answer_selectors, self.extract_mode)
+        self.record_selector("answer", selector)
+        return answer
+
+    def record_selector(self, stage: str, selector: Optional[str]) -> None:
+        """Hook: called with the selector that matched in a stage, or None"""
+
+    @property
+    def metrics_service(self) -> str:
+        """Service label for the stage timings of this handler"""
+        return getattr(self, 'service_id', None) or type(self).__name__
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time one stage of a question as a span, in metrics and for adaptive timeouts, see metrics.STAGES
+
+        A stage whose wait timed out is counted as a timeout instead of a
+        timing, so adaptive deadlines only learn from completed stages.
+        """
+        self.wait_timed_out = False
+        start = time.monotonic()
+        with tracer.span(f"handler.{name}", {"ai.service": self.metrics_service, "stage": name}), \
+                metrics.timer(self.metrics_service, name):
+            yield
+        if self.wait_timed_out:
+            latency_tracker.record_timeout(self.metrics_service, name)
+        else:
+            latency_tracker.observe(self.metrics_service, name, time.monotonic() - start)
+
+    def get_operation_timeout(self) -> int:
+        """Time in milliseconds to wait for the page to become usable"""
+        return load_config().get('browser', {}).get('operation_timeout', 30000)
+
+    def get_input_timeout(self) -> int:
+        """Time in milliseconds to wait for the chat input, learned from recent navigations"""
+        limit = self.get_operation_timeout()
+        return latency_tracker.deadline_ms(self.metrics_service, "navigate", limit, limit)
+
+    def get_response_timeout(self) -> int:
+        """Time in milliseconds to wait for an answer, capped by browser.response_timeout
+
+        The service's own response_timeout applies until enough answers have
+        been timed; after that the deadline follows the recent completion times.
+        """
+        limit = load_config().get('browser', {}).get('response_timeout', 60000)
+        service = getattr(self, 'service', None)
+        service_timeout: Optional[int] = getattr(service, 'response_timeout', None)
+        default = service_timeout if isinstance(service_timeout, int) and service_timeout > 0 else limit
+        return latency_tracker.deadline_ms(self.metrics_service, "completion", default, limit)
+
+    def get_poll_interval(self) -> int:
+        """Time in milliseconds between checks for a finished answer"""
+        return latency_tracker.poll_ms(self.metrics_service, "completion", DEFAULT_POLL_MS)
+
+    async def wait_for_input_ready(self) -> bool:
+        """Wait until the chat input is visible"""
+        ready = await wait_for_input_ready(self.page, self.input_selectors, self.get_input_timeout())
+        if not ready:
+            self.wait_timed_out = True
+        return ready
+
+    async def prepare_answer_wait(self) -> None:
+        """Remember the current answer area before submitting a question"""
+        await prepare_answer_wait(self.page, self.answer_selectors, self.done_selectors)
+
+    async def wait_for_answer(self) -> bool:
+        """Wait until the answer to the submitted question is complete"""
+        complete = await wait_for_answer(
+            self.page,
+            self.answer_selectors,
+            self.get_response_timeout(),
+            stop_selectors=self.stop_selectors,
+            done_selectors=self.done_selectors,
+            poll_ms=self.get_poll_interval()
+        )
+        if not complete:
+            self.wait_timed_out = True
+        return complete
+
+    def is_on_service(self) -> bool:
+        """Check whether the page is already showing this service"""
+        service_url = getattr(getattr(self, 'service', None), 'url', None)
+        page_url = self.page.url
+        if not isinstance(service_url, str) or not isinstance(page_url, str):
+            return False
+        service_host, service_path = _host_and_path(service_url)
+        page_host, page_path = _host_and_path(page_url)
+        # A subdomain of the service is the same site, its parent domain is not
+        same_site = page_host == service_host or page_host.endswith("." + service_host)
+        return bool(page_host) and same_site and page_path.startswith(service_path)
+
+    async def is_input_ready(self) -> bool:
+        """Check, without waiting, whether the chat input is visible"""
+        if not self.input_selectors:
+            return False
+        try:
+            return await self.page.is_visible(", ".join(self.input_selectors)) is True
+        except Exception as e:
+            logger.debug(f"Could not check chat input: {e}")
+            return False
+
+    async def start_new_chat(self) -> None:
+        """Start a fresh conversation through the site's own "new chat" action"""
+        for selector in self.new_chat_selectors:
+            try:
+                button = await self.page.query_selector(selector)
+                if button and await button.is_visible():
+                    await button.click()
+                    await self.wait_for_input_ready()
+                    return
+            except Exception as e:
+                logger.debug(f"New chat selector {selector} failed: {e}")
+        # No in-app action found, load the service page again instead
+        await self.navigate_to_service()
+
+    async def open_url(self, url: str) -> None:
+        """Load a page of the service, e.g. an earlier chat thread, and wait for the input"""
+        with self.stage("navigate"):
+            await self.page.goto(url)
+            await self.wait_for_input_ready()
+
+    async def open_service(self, new_chat: bool = False) -> bool:
+        """Make the page ready for a question, navigating only when needed
+
+        Returns True if the page had to be navigated.
+        """
+        if self.is_on_service() and await self.is_input_ready():
+            if new_chat:
+                with self.stage("navigate"):
+                    await self.start_new_chat()
+            return False
+        with self.stage("navigate"):
+            await self.navigate_to_service()
+        return True
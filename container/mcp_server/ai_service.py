@@ -3,11 +3,14 @@ Data class for AI service information
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AIService:
-    """Represents an AI service configuration"""
+    """Represents an AI service configuration
+
+    Instances are shared through the service registry and cannot be modified.
+    """
     id: str
     name: str
     url: str
@@ -18,4 +21,6 @@ class AIService:
     icon: Optional[str] = None
     priority: Optional[int] = None
     authentication_required: Optional[bool] = None
-    capabilities: Optional[list] = None
\ No newline at end of file
+    capabilities: Optional[Tuple[str, ...]] = None
+    # Time to wait for an answer in milliseconds, capped by browser.response_timeout
+    response_timeout: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Answer cache module
+Keeps answers per AI service and normalized question for a TTL, in memory and optionally in SQLite
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .utils import load_config
+
+logger = logging.getLogger("terminai-mcp-answer-cache")
+
+# Seconds an answer is served from the cache
+DEFAULT_TTL = 3600.0
+# Answers kept in memory, least recently used ones are dropped first
+DEFAULT_MAX_ENTRIES = 256
+# Expired rows are purged from the disk tier every this many writes
+PURGE_EVERY = 100
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Fold case and whitespace so trivially different prompts share an entry"""
+    return _WHITESPACE.sub(" ", question).strip().casefold()
+
+
+class AnswerCache:
+    """In-memory LRU of answers with a TTL, backed by an optional SQLite file
+
+    The SQLite file can be shared by several server processes; its calls run
+    in a worker thread so they never block the event loop.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.path = os.path.expanduser(path) if path else None
+        # key -> (answer, stored_at as wall-clock time so processes agree on expiry)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "AnswerCache":
+        config = config or {}
+        return cls(
+            ttl=float(config.get('ttl', DEFAULT_TTL)),
+            max_entries=int(config.get('max_entries', DEFAULT_MAX_ENTRIES)),
+            path=config.get('path'),
+            enabled=bool(config.get('enabled', True))
+        )
+
+    @staticmethod
+    def key(service: str, question: str) -> str:
+        return f"{service.lower()}\n{normalize_question(question)}"
+
+    def _remember(self, key: str, answer: str, stored_at: float) -> None:
+        self._entries[key] = (answer, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, service: str, question: str) -> Optional[str]:
+        """Return the cached answer, or None on a miss"""
+        if not self.enabled:
+            return None
+        key = self.key(service, question)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[0]
+            del self._entries[key]
+
+        if self.path:
+            entry = await asyncio.to_thread(self._disk_get, key, now)
+            if entry is not None:
+                self._remember(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[0]
+
+        self.misses += 1
+        return None
+
+    async def put(self, service: str, question: str, answer: str) -> None:
+        """Store an answer; empty answers are not cached"""
+        if not self.enabled or not answer:
+            return
+        key = self.key(service, question)
+        stored_at = time.time()
+        self._remember(key, answer, stored_at)
+        if self.path:
+            await asyncio.to_thread(self._disk_put, key, service.lower(), answer, stored_at)
+
+    async def clear(self) -> None:
+        """Drop every entry, including those on disk"""
+        self._entries.clear()
+        if self.path:
+            await asyncio.to_thread(self._disk_execute, "DELETE FROM answers")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit and miss counts for status reporting"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "entries": len(self._entries),
+            "disk_path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Wait for writers in other processes instead of failing at once
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, service TEXT NOT NULL, answer TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_execute(self, sql: str, params: Tuple = ()) -> None:
+        try:
+            with self._db_lock:
+                db = self._connection()
+                db.execute(sql, params)
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Answer cache write failed: {e}")
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        try:
+            with self._db_lock:
+                row = self._connection().execute(
+                    "SELECT answer, stored_at FROM answers WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Answer cache read failed: {e}")
+            return None
+        if row is None or now - row[1] >= self.ttl:
+            return None
+        return row[0], row[1]
+
+    def _disk_put(self, key: str, service: str, answer: str, stored_at: float) -> None:
+        self._disk_execute(
+            "INSERT OR REPLACE INTO answers (key, service, answer, stored_at) VALUES (?, ?, ?, ?)",
+            (key, service, answer, stored_at)
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self._disk_execute("DELETE FROM answers WHERE stored_at < ?", (stored_at - self.ttl,))
+
+    def close(self) -> None:
+        """Close the SQLite connection"""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+answer_cache = AnswerCache.from_config(load_config().get('answer_cache'))
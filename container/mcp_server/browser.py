@@ -5,53 +5,102 @@ Handles connection to browser and automation operations
 
 import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 
-from playwright.async_api import async_playwright, Browser, Page, Playwright
-
-from .utils import load_ai_urls
-from .handler_factory import create_ai_handler
+from .utils import load_ai_urls, load_config
+from .ai_handler_base import AIHandler
+from .handler_factory import create_ai_handler, has_ai_handler
+from .metrics import metrics
+from .resource_blocking import ResourceBlocker
 from .chrome_manager import ChromeManager
+from .conversations import Conversation, ConversationRegistry
+from .shards import BrowserShard, ShardRouter, endpoint_url
+from .streaming import AnswerStream
+from .supervisor import ConnectionSupervisor
+from .tab_pool import PooledTab, TabPool
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, Playwright
 
 logger = logging.getLogger("terminai-mcp-browser")
 
+# Seconds to wait for Playwright to detach from a browser
+DETACH_TIMEOUT = 2.0
+
+def async_playwright():
+    """Import Playwright on first connect so the server can answer /health without it"""
+    from playwright.async_api import async_playwright as playwright_factory
+    return playwright_factory()
+
 class BrowserManager:
     """Browser manager"""
     
     def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
-        self.playwright: Optional[Playwright] = None
+        self.browser: "Optional[Browser]" = None
+        self.page: "Optional[Page]" = None
+        self.playwright: "Optional[Playwright]" = None
         self.chrome_manager: Optional[ChromeManager] = None
-        self.ai_urls = load_ai_urls()
         self.debug_port: Optional[int] = None
+        # CDP endpoint URL of the browser when attached to a single one
+        self.endpoint: Optional[str] = None
+        # Set by the supervisor when the browser went away, until it reconnects
+        self.connection_lost = False
+        self.tab_pool: Optional[TabPool] = None
+        # Set when attached to several Chrome instances; each then has its own tab pool
+        self.shard_router: Optional[ShardRouter] = None
+        browser_config = load_config().get('browser', {})
+        self.max_tabs = browser_config.get('max_tabs', 4)
+        self.shard_strategy = browser_config.get('shard_strategy', 'hash')
+        self.operation_timeout = browser_config.get('operation_timeout', 30000)
+        self.response_timeout = browser_config.get('response_timeout', 60000)
+        # Heartbeats the attached browsers and reconnects lost ones
+        self.supervisor = ConnectionSupervisor.from_config(browser_config)
+        # Keeps service tabs from loading images, fonts and trackers
+        self.resource_blocker = ResourceBlocker.from_config(load_config().get('resource_blocking'))
+        # Conversations pinned to their own tab, see ask_ai
+        self.conversations = ConversationRegistry.from_config(load_config().get('conversations'))
+    
+    @property
+    def ai_urls(self) -> Dict[str, str]:
+        """URLs of the configured AI services, read from the registry so reloads are seen"""
+        return load_ai_urls()
     
-    async def start_chrome_automatically(self, headless: bool = False) -> bool:
+    async def start_chrome_automatically(self, headless: bool = False, debug_port: int = 9222) -> bool:
         """Start Chrome automatically with debug port"""
         try:
-            self.chrome_manager = ChromeManager()
-            return self.chrome_manager.start_chrome(headless)
+            self.chrome_manager = ChromeManager(debug_port)
+            return await self.chrome_manager.start_chrome(headless)
         except Exception as e:
             logger.error(f"Failed to start Chrome automatically: {e}")
             return False
     
-    async def connect(self, debug_port: int = 9222):
-        """Connect to the running browser instance"""
+    async def connect(self, debug_port: int = 9222, endpoints: Optional[Sequence[Any]] = None):
+        """Connect to the running browser instance
+
+        With several ``endpoints`` (debug ports or host:port) every Chrome is
+        attached and AI services are spread across them. The Playwright driver
+        is started once and reused by later connects.
+        """
         try:
-            # Initialize playwright without context manager to keep it alive
-            self.playwright = await async_playwright().start()
-            
-            # Connect to the running browser
-            self.browser = await self.playwright.chromium.connect_over_cdp(
-                f"http://localhost:{debug_port}"
-            )
+            # Tabs and browsers from a previous connection are no longer usable
+            await self._disconnect()
+            await self._ensure_playwright()
             
-            # Get or create page
-            contexts = self.browser.contexts
-            if contexts and contexts[0].pages:
-                self.page = contexts[0].pages[0]
+            endpoints = list(dict.fromkeys(endpoints or [])) or [debug_port]
+            if len(endpoints) == 1:
+                self.browser, self.page = await self._attach(endpoints[0])
+                self.endpoint = endpoint_url(endpoints[0])
+                self._watch_browser(self.endpoint, self.browser)
+                self.supervisor.watch(self.endpoint)
             else:
-                self.page = contexts[0].new_page() if contexts else await self.browser.new_page()
+                self.shard_router = await self._attach_shards(endpoints)
+                primary = self.shard_router.shards[0]
+                self.browser, self.page = primary.browser, primary.page
+                for shard in self.shard_router.shards:
+                    self.supervisor.watch(shard.endpoint)
+            self.supervisor.start(self._browser_of, self._reconnect, self._on_lost)
             
             # Store the debug port for status reporting
             self.debug_port = debug_port
@@ -63,132 +112,410 @@ class BrowserManager:
             await self.close()
             raise
     
-    async def ask_ai(self, ai: str, question: str) -> str:
-        """Ask the specified AI and get the response"""
+    async def _ensure_playwright(self):
+        """Start the Playwright driver unless it is already running"""
+        if self.playwright is None:
+            # Initialize playwright without context manager to keep it alive
+            self.playwright = await async_playwright().start()
+    
+    async def _attach(self, endpoint: Any) -> "Tuple[Browser, Page]":
+        """Connect to one Chrome over CDP and pick the page to start from"""
+        # Connect to the running browser
+        browser = await self.playwright.chromium.connect_over_cdp(endpoint_url(endpoint))
+        
+        # Get or create page
+        contexts = browser.contexts
+        if contexts and contexts[0].pages:
+            page = contexts[0].pages[0]
+        else:
+            page = await contexts[0].new_page() if contexts else await browser.new_page()
+        return browser, page
+    
+    @staticmethod
+    def _open_pages(browser: "Browser") -> "List[Page]":
+        """Pages already open in the browser's default context, e.g. the pooled tabs of a lost connection"""
+        contexts = browser.contexts
+        return list(contexts[0].pages) if contexts else []
+    
+    async def _attach_shards(self, endpoints: List[Any]) -> ShardRouter:
+        """Attach every endpoint that answers, failing only if none does"""
+        router = ShardRouter(self.shard_strategy)
+        results = await asyncio.gather(*(self._attach(endpoint) for endpoint in endpoints), return_exceptions=True)
+        for endpoint, result in zip(endpoints, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Could not attach to browser at {endpoint_url(endpoint)}: {result}")
+                continue
+            shard = BrowserShard(endpoint_url(endpoint), *result, max_tabs=self.max_tabs)
+            self._watch_browser(shard.endpoint, shard.browser)
+            router.add(shard)
+        if not router.shards:
+            raise RuntimeError(f"Could not attach to any browser endpoint: {endpoints}")
+        logger.info(f"Sharding AI services across {len(router.shards)} browsers ({router.strategy})")
+        return router
+    
+    def _watch_browser(self, endpoint: str, browser: "Browser"):
+        """Report the endpoint lost to the supervisor when its browser disconnects"""
+        def on_disconnected(*_):
+            # Ignore browsers that were already replaced or detached on purpose
+            if self._browser_of(endpoint) is browser:
+                self.supervisor.notify_lost(endpoint)
+        
+        try:
+            browser.on("disconnected", on_disconnected)
+        except Exception as e:
+            logger.debug(f"Could not watch browser for disconnects: {e}")
+    
+    def _browser_of(self, endpoint: str) -> "Optional[Browser]":
+        """The live browser attached to the endpoint"""
+        if self.shard_router is not None:
+            shard = self.shard_router.find(endpoint)
+            return shard.browser if shard is not None and shard.alive else None
+        return self.browser if endpoint == self.endpoint and not self.connection_lost else None
+    
+    def _on_lost(self, endpoint: str):
+        """Take a lost browser out of service until the supervisor reconnects it"""
+        if self.shard_router is not None:
+            shard = self.shard_router.find(endpoint)
+            if shard is not None:
+                self._drop_shard(shard)
+        elif endpoint == self.endpoint:
+            self.connection_lost = True
+    
+    async def _reconnect(self, endpoint: str):
+        """Attach to the endpoint again and re-attach its pooled tabs to the new browser"""
+        browser, page = await self._attach(endpoint)
+        if self.shard_router is not None:
+            shard = self.shard_router.find(endpoint)
+            old_browser = shard.browser
+            shard.browser, shard.page = browser, page
+            shard.tab_pool.reattach(shard._new_page, [page], self._open_pages(browser))
+            self.shard_router.restore(shard)
+            if self.browser is None:
+                self.browser, self.page = browser, page
+        else:
+            old_browser = self.browser
+            self.browser, self.page = browser, page
+            if self.tab_pool is not None:
+                self.tab_pool.reattach(self._new_page, [page], self._open_pages(browser))
+            self.connection_lost = False
+        self._watch_browser(endpoint, browser)
+        await self._detach(old_browser)
+    
+    async def _detach(self, browser: "Optional[Browser]"):
+        """Disconnect Playwright from a browser; Chrome itself keeps running"""
+        if browser is None:
+            return
+        try:
+            await asyncio.wait_for(browser.close(), timeout=DETACH_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Error closing browser: {e}")
+    
+    def _drop_shard(self, shard: BrowserShard):
+        """Remove a dead Chrome from rotation; its services move to the remaining ones"""
+        if self.shard_router is None or not shard.alive:
+            return
+        self.shard_router.remove(shard)
+        if shard.browser is self.browser:
+            live = self.shard_router.live()
+            self.browser = live[0].browser if live else None
+            self.page = live[0].page if live else None
+    
+    def _get_tab_pool(self, ai: Optional[str] = None) -> TabPool:
+        """Get the tab pool for the AI, seeding it with the page we connected to"""
+        if self.shard_router is not None:
+            live = self.shard_router.live()
+            if not live:
+                raise RuntimeError("Browser page not available")
+            return self.shard_router.pick(ai).tab_pool if ai else live[0].tab_pool
+        
         if not self.page:
             raise RuntimeError("Browser page not available")
         
-        # Get AI-specific handler
-        handler = create_ai_handler(ai, self.page)
+        if self.tab_pool is None:
+            self.tab_pool = TabPool(self._new_page, self.max_tabs, seed_pages=[self.page])
+        return self.tab_pool
+    
+    @asynccontextmanager
+    async def _lease(self, ai: str, conversation: Optional[Conversation] = None) -> AsyncIterator[PooledTab]:
+        """Lease the tab for the AI, or for one conversation with it, checking the browser if the lease fails"""
+        tab_pool = self._get_tab_pool(ai)
+        shard = self.shard_router.assigned(ai) if self.shard_router else None
+        endpoint = shard.endpoint if shard is not None else self.endpoint
+        try:
+            async with tab_pool.lease(conversation.key if conversation else ai) as tab:
+                # Before any navigation, so the first page load is already filtered
+                await self.resource_blocker.apply(tab)
+                yield tab
+        except Exception:
+            # Tell a broken page from a dead browser right away instead of at the next heartbeat
+            if endpoint is not None:
+                await self.supervisor.check(endpoint)
+            raise
+    
+    async def _new_page(self) -> "Page":
+        """Open a new tab in the browser context we are attached to"""
+        return await self.page.context.new_page()
+    
+    async def _close_tab_pool(self):
+        """Close tabs opened by the pool, or by every shard's pool"""
+        if self.tab_pool:
+            await self.tab_pool.close()
+            self.tab_pool = None
+        if self.shard_router:
+            for shard in self.shard_router.shards:
+                await shard.tab_pool.close()
+    
+    def _check_supported(self, ai: str):
+        """Raise if there is neither a handler nor a configured URL for the AI"""
+        if not has_ai_handler(ai) and ai not in self.ai_urls:
+            raise ValueError(f"Unsupported AI: {ai}")
+    
+    def _create_handler(self, ai: str, page: "Page") -> AIHandler:
+        """Create the handler for the AI, or raise if the AI is unknown"""
+        handler = create_ai_handler(ai, page)
         if not handler:
-            # Fallback to generic approach for unsupported AI services
-            return await self._ask_ai_generic(ai, question)
-        
-        # Navigate to the AI service
-        await handler.navigate_to_service()
+            raise ValueError(f"Unsupported AI: {ai}")
+        return handler
+    
+    async def _prepare_tab(self, tab: PooledTab, handler: AIHandler, new_chat: bool = False,
+                           conversation: Optional[Conversation] = None):
+        """Bring the tab to the service chat, navigating only when it is not already there"""
+        if conversation is not None:
+            if conversation.turns == 0:
+                # A new conversation gets a thread of its own
+                new_chat = True
+            elif not tab.ready and not new_chat and conversation.url:
+                # The tab was evicted or failed; go back to the conversation's thread
+                logger.info(f"Reopening conversation {conversation.id} on {conversation.ai}")
+                await handler.open_url(conversation.url)
+                tab.ready = True
+                return
+        if tab.ready and not new_chat:
+            return
+        await handler.open_service(new_chat=new_chat)
+        tab.ready = True
+    
+    async def _open_conversation(self, ai: str, conversation_id: Optional[str]) -> Optional[Conversation]:
+        """Start or continue a conversation, first giving back the tabs of expired ones"""
+        for expired in self.conversations.expire():
+            await self._get_tab_pool(expired.ai).discard(expired.key)
+        if conversation_id is None:
+            return None
+        return self.conversations.open(ai, conversation_id)
+    
+    def _end_turn(self, conversation: Optional[Conversation], tab: PooledTab):
+        """Remember where the conversation's thread is after an answer"""
+        if conversation is None:
+            return
+        conversation.turns += 1
+        conversation.touch()
+        url = getattr(tab.page, "url", None)
+        if isinstance(url, str) and url:
+            conversation.url = url
+    
+    async def end_conversation(self, ai: str, conversation_id: str) -> bool:
+        """Forget a conversation and give back its tab; False if it was not open"""
+        conversation = self.conversations.get(ai, conversation_id)
+        if conversation is None:
+            return False
+        self.conversations.remove(conversation)
+        if self.page is not None or self.shard_router is not None:
+            await self._get_tab_pool(ai).discard(conversation.key)
+        return True
+    
+    async def ask_ai(self, ai: str, question: str, new_chat: bool = False,
+                     conversation_id: Optional[str] = None) -> str:
+        """Ask the specified AI and get the response
+
+        With ``new_chat`` the question starts a fresh conversation instead of
+        continuing the one open in the service tab. A ``conversation_id`` pins
+        the question to a tab and chat thread of its own, so follow-up
+        questions with the same id continue that thread without navigating.
+        """
+        self._get_tab_pool()
+        self._check_supported(ai)
+        conversation = await self._open_conversation(ai, conversation_id)
         
-        # Ask the question using AI-specific handler
-        return await handler.ask_question(question)
+        # Each service has its own tab, so different services run in parallel
+        # while questions to the same service wait for the tab lease
+        async with self._lease(ai, conversation) as tab:
+            # Get the handler, configured services without a spec use the default one
+            handler = self._create_handler(ai, tab.page)
+            
+            # Navigate to the AI service unless the tab is already there
+            await self._prepare_tab(tab, handler, new_chat, conversation)
+            
+            # Ask the question using AI-specific handler
+            answer = await handler.ask_question(question)
+            self._end_turn(conversation, tab)
+            return answer
     
-    async def _ask_ai_generic(self, ai: str, question: str) -> str:
-        """Generic fallback method for unsupported AI services"""
-        if not self.page:
-            raise RuntimeError("Browser page not available")
+    async def ask_ai_stream(self, ai: str, question: str, new_chat: bool = False,
+                            conversation_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Ask the specified AI and yield answer events as the site renders the answer"""
+        self._get_tab_pool()
+        self._check_supported(ai)
+        conversation = await self._open_conversation(ai, conversation_id)
+        start = time.monotonic()
+        
+        async with self._lease(ai, conversation) as tab:
+            yield {"event": "start", "ai": ai}
             
-        # Navigate to the corresponding AI website
-        url = self.ai_urls.get(ai)
-        if not url:
-            raise ValueError(f"Unsupported AI: {ai}")
+            handler = self._create_handler(ai, tab.page)
+            await self._prepare_tab(tab, handler, new_chat, conversation)
+            
+            # Observe before submitting so the first rendered token is not missed
+            stream = AnswerStream(tab.page, handler.answer_selectors)
+            await stream.start()
+            asked = time.monotonic()
+            ask_task = asyncio.create_task(handler.ask_question(question))
+            first_token = False
+            try:
+                async for event in stream.follow(ask_task):
+                    if not first_token:
+                        first_token = True
+                        metrics.observe(ai, "first_token", time.monotonic() - asked)
+                        yield {"event": "first_token", "elapsed": round(time.monotonic() - start, 3)}
+                    yield event
+                
+                answer = await ask_task
+                self._end_turn(conversation, tab)
+                yield {"event": "done", "answer": answer, "elapsed": round(time.monotonic() - start, 3)}
+            finally:
+                if not ask_task.done():
+                    ask_task.cancel()
+                await stream.stop()
+    
+    def broadcast(
+        self,
+        ais: List[str],
+        question: str,
+        ask: Optional[Callable[[str, str], Awaitable[str]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Ask several AIs the same question concurrently, yielding each result as it completes
+
+        ``ask`` replaces ask_ai for each service, e.g. to route through the scheduler.
+        """
+        self._get_tab_pool()
+        # Validate up front so callers get an error before any result is produced
+        ais = list(dict.fromkeys(ais))
+        for ai in ais:
+            self._check_supported(ai)
+        return self._broadcast(ais, question, ask or self.ask_ai)
+    
+    async def _broadcast(
+        self,
+        ais: List[str],
+        question: str,
+        ask: Callable[[str, str], Awaitable[str]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run one ask_ai per service and yield results in completion order"""
+        async def ask_one(ai: str) -> Dict[str, Any]:
+            start = time.monotonic()
+            try:
+                answer = await ask(ai, question)
+                result = {"ai": ai, "success": True, "answer": answer}
+            except Exception as e:
+                logger.error(f"Broadcast question to {ai} failed: {e}")
+                result = {"ai": ai, "success": False, "error": str(e)}
+            result["elapsed"] = round(time.monotonic() - start, 3)
+            return result
         
-        await self.page.goto(url)
-        await self.page.wait_for_timeout(3000)
-        
-        # The selectors need to be adjusted according to specific websites
-        # The following are general examples, actual use needs to be adjusted for each website
-        
-        # Find input box and input question
-        input_selectors = [
-            "textarea",
-            "input[type='text']",
-            "[contenteditable='true']",
-            ".chat-input",
-            "#prompt-textarea"
-        ]
-        
-        input_element = None
-        for selector in input_selectors:
-            elements = await self.page.query_selector_all(selector)
-            if elements:
-                # Select the last one (usually the latest input box)
-                input_element = elements[-1]
-                break
-        
-        if not input_element:
-            raise RuntimeError("Could not find input element")
-        
-        await input_element.fill(question)
-        await self.page.wait_for_timeout(1000)
-        
-        # Find and click the send button
-        button_selectors = [
-            "button[type='submit']",
-            "button:has-text('发送')",  # 'Send' button in Chinese
-            "button:has-text('Send')",
-            ".send-button",
-            "[data-testid='send-button']"
-        ]
-        
-        for selector in button_selectors:
-            button = await self.page.query_selector(selector)
-            if button:
-                await button.click()
-                break
-        
-        # Wait for response generation (need to adjust wait time and selectors according to actual situation)
-        await self.page.wait_for_timeout(10000)
-        
-        # Extract response content
-        answer_selectors = [
-            ".message:last-child",
-            ".response:last-child",
-            ".answer:last-child",
-            "[data-testid='message-answer']:last-child"
-        ]
-        
-        for selector in answer_selectors:
-            answer_element = await self.page.query_selector(selector)
-            if answer_element:
-                answer = await answer_element.text_content()
-                if answer and answer.strip():
-                    return answer.strip()
-        
-        return "No answer found - please check the website structure and selectors"
+        tasks = [asyncio.create_task(ask_one(ai)) for ai in ais]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Stop remaining questions if the consumer goes away early
+            for task in tasks:
+                task.cancel()
+    
+    async def warm_up(self, ais: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Open the chat page of each AI in parallel, so the first question skips the navigation
+
+        Returns per AI whether its chat input is ready and how long that took.
+        Only as many AIs as there are tabs are opened, so none evicts another.
+        """
+        self._get_tab_pool()
+        ais = list(dict.fromkeys(ais))
+        capacity = self.max_tabs * (len(self.shard_router.live()) if self.shard_router else 1)
+        if len(ais) > capacity:
+            logger.info(f"Warming up {capacity} of {len(ais)} AI services, the tab budget is {capacity}")
+            ais = ais[:capacity]
+        
+        async def warm(ai: str) -> Dict[str, Any]:
+            start = time.monotonic()
+            try:
+                self._check_supported(ai)
+                async with self._lease(ai) as tab:
+                    handler = self._create_handler(ai, tab.page)
+                    await self._prepare_tab(tab, handler)
+                    result: Dict[str, Any] = {"ready": await handler.is_input_ready()}
+            except Exception as e:
+                logger.warning(f"Warming up {ai} failed: {e}")
+                result = {"ready": False, "error": str(e)}
+            result["seconds"] = round(time.monotonic() - start, 3)
+            return result
+        
+        results = await asyncio.gather(*(warm(ai) for ai in ais))
+        return dict(zip(ais, results))
     
     async def switch_ai(self, ai: str):
         """Switch to the specified AI website"""
-        if not self.page:
-            raise RuntimeError("Browser page not available")
+        self._get_tab_pool()
         
         url = self.ai_urls.get(ai)
         if not url:
             raise ValueError(f"Unsupported AI: {ai}")
         
-        await self.page.goto(url)
-        await self.page.wait_for_timeout(2000)
+        async with self._lease(ai) as tab:
+            if not tab.ready:
+                await self._create_handler(ai, tab.page).open_service()
+                tab.ready = True
+            await tab.page.bring_to_front()
+    
+    def tab_stats(self) -> dict:
+        """Get the state of the tab pool, per browser when sharded"""
+        if self.shard_router is not None:
+            stats = self.shard_router.stats()
+            return {
+                "max_tabs": self.max_tabs * len(self.shard_router),
+                "open_tabs": sum(shard["open_tabs"] for shard in stats["shards"] if shard["alive"]),
+                "tabs": [
+                    dict(tab, endpoint=shard["endpoint"])
+                    for shard in stats["shards"] if shard["alive"] for tab in shard["tabs"]
+                ],
+                **stats
+            }
+        return self.tab_pool.stats() if self.tab_pool else {"max_tabs": self.max_tabs, "open_tabs": 0, "tabs": []}
     
     def is_connected(self) -> bool:
-        """Check if browser is connected"""
-        if self.browser is None:
-            return False
-        # Handle both sync and async is_connected methods
-        is_connected = self.browser.is_connected
-        # If it's a coroutine, we can't properly check it in a sync method
-        # In this case, we assume it's connected if we have a browser instance
-        import inspect
-        if inspect.iscoroutinefunction(is_connected) or inspect.iscoroutine(is_connected):
-            return True
-        elif callable(is_connected):
-            return is_connected()
-        else:
-            return is_connected
+        """Check if browser is connected, as last observed by the supervisor"""
+        if self.shard_router is not None:
+            return bool(self.shard_router.live())
+        return self.browser is not None and not self.connection_lost
+    
+    def connection_stats(self) -> dict:
+        """Get heartbeat and reconnect state per attached browser"""
+        return {"connected": self.is_connected(), **self.supervisor.stats()}
+    
+    async def _disconnect(self):
+        """Stop supervising, close pooled tabs and detach from every browser"""
+        await self.supervisor.stop()
+        await self._close_tab_pool()
+        
+        browsers = [shard.browser for shard in self.shard_router.shards] if self.shard_router else [self.browser]
+        self.browser = None
+        self.page = None
+        self.endpoint = None
+        self.connection_lost = False
+        self.shard_router = None
+        for browser in browsers:
+            await self._detach(browser)
     
     async def close(self):
-        """Close browser connection"""
-        if self.browser:
-            try:
-                await self.browser.close()
-            except Exception as e:
-                logger.warning(f"Error closing browser: {e}")
+        """Close browser connection and stop the Playwright driver"""
+        await self._disconnect()
         
         if self.playwright:
             try:
@@ -198,10 +525,8 @@ class BrowserManager:
         
         # Stop Chrome if we started it
         if self.chrome_manager:
-            self.chrome_manager.stop_chrome()
+            await self.chrome_manager.stop_chrome()
         
-        self.browser = None
-        self.page = None
         self.playwright = None
         self.chrome_manager = None
-        logger.info("Browser connection closed")
\ No newline at end of file
+        logger.info("Browser connection closed")
@@ -1,6 +1,7 @@
 """
 Chrome Manager - Automatically start and manage Chrome with debug port
 """
+import asyncio
 import os
 import sys
 import subprocess
@@ -8,17 +9,38 @@ import time
 import platform
 from typing import Optional
 import logging
-import socket
 import json
 
+from .host_agent import HostAgentClient, HostAgentError
+
 logger = logging.getLogger("terminai-chrome-manager")
 
+# Port of scripts/host_chrome_service.py, used when running in a container
+HOST_SERVICE_PORT = 9223
+# Longest start timeout passed to the host service
+HOST_SERVICE_TIMEOUT = 30.0
+# Seconds to wait for a Chrome started by hand when the host service is unavailable
+HOST_MANUAL_START_TIMEOUT = 5.0
+
+# Seconds to wait for the DevTools endpoint after starting Chrome
+DEFAULT_START_TIMEOUT = 15.0
+# Backoff between readiness probes, in seconds
+INITIAL_PROBE_DELAY = 0.05
+MAX_PROBE_DELAY = 0.5
+
 class ChromeManager:
     """Manages Chrome browser lifecycle for debugging"""
     
-    def __init__(self, debug_port: int = 9222):
+    def __init__(self, debug_port: int = 9222, host: str = "127.0.0.1",
+                 start_timeout: float = DEFAULT_START_TIMEOUT):
         self.debug_port = debug_port
-        self.chrome_process: Optional[subprocess.Popen] = None
+        self.host = host
+        self.start_timeout = start_timeout
+        self.chrome_process: Optional[asyncio.subprocess.Process] = None
+        # Seconds from start_chrome() until DevTools answered
+        self.startup_seconds: Optional[float] = None
+        # Connection to the host Chrome service, opened on first use
+        self.host_agent: Optional[HostAgentClient] = None
         self.chrome_paths = self._get_chrome_paths()
         self.is_container = self._is_running_in_container()
     
@@ -85,22 +107,100 @@ class ChromeManager:
                 return path
         return None
     
-    def is_chrome_running(self) -> bool:
-        """Check if Chrome is already running with debug port"""
+    async def is_port_open(self, timeout: float = 0.5) -> bool:
+        """Check whether something accepts connections on the debug port"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            # When in container, Chrome runs on host, so we check localhost
-            result = sock.connect_ex(('127.0.0.1', self.debug_port))
-            sock.close()
-            return result == 0
-        except:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.debug_port), timeout=timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+    
+    async def get_version(self, timeout: float = 1.0) -> Optional[dict]:
+        """Query /json/version on the DevTools endpoint, or None if it does not answer"""
+        try:
+            return await asyncio.wait_for(self._get_version(), timeout=timeout)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return None
+    
+    async def _get_version(self) -> Optional[dict]:
+        reader, writer = await asyncio.open_connection(self.host, self.debug_port)
+        try:
+            # A raw request keeps this free of HTTP client dependencies
+            writer.write(
+                f"GET /json/version HTTP/1.1\r\nHost: {self.host}:{self.debug_port}\r\n"
+                "Connection: close\r\n\r\n".encode("ascii")
+            )
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        status_line = head.split(b"\r\n", 1)[0].split()
+        if len(status_line) < 2 or status_line[1] != b"200":
+            return None
+        version = json.loads(body.decode("utf-8"))
+        return version if isinstance(version, dict) else None
+    
+    async def is_chrome_running(self) -> bool:
+        """Check if the DevTools endpoint of Chrome answers on the debug port"""
+        # When in container, Chrome runs on host, so we check localhost
+        return await self.get_version() is not None
+    
+    async def wait_until_ready(self, timeout: float = DEFAULT_START_TIMEOUT) -> bool:
+        """Poll the DevTools endpoint with backoff until it answers or the timeout expires"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = INITIAL_PROBE_DELAY
+        while True:
+            if await self.is_chrome_running():
+                return True
+            if self.chrome_process is not None and self.chrome_process.returncode is not None:
+                logger.error(f"Chrome exited with code {self.chrome_process.returncode} before it was ready")
+                return False
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, MAX_PROBE_DELAY)
+    
+    async def _request_host_start(self, headless: bool = False) -> bool:
+        """Ask the host Chrome service to start Chrome; it answers once DevTools is ready"""
+        if self.host_agent is None or self.host_agent.port != HOST_SERVICE_PORT:
+            self.host_agent = HostAgentClient(self.host, HOST_SERVICE_PORT)
+        try:
+            response = await self.host_agent.start(
+                self.debug_port, headless=headless, timeout=min(self.start_timeout, HOST_SERVICE_TIMEOUT)
+            )
+        except HostAgentError as e:
+            logger.warning(f"Host Chrome service unavailable: {e}")
+            return False
+        
+        if not response.get('success'):
+            logger.error(f"Host service failed to start Chrome: {response.get('error')}")
             return False
+        logger.info(f"Host Chrome service started Chrome after {response.get('startup_seconds')} s")
+        return True
+    
+    async def start_chrome(self, headless: bool = False) -> bool:
+        """Start Chrome with debug port, returning as soon as DevTools answers"""
+        started = time.monotonic()
+        ready = await self._start_chrome(headless)
+        if ready:
+            self.startup_seconds = round(time.monotonic() - started, 3)
+            logger.info(f"Chrome DevTools ready on port {self.debug_port} after {self.startup_seconds} s")
+        return ready
     
-    def start_chrome(self, headless: bool = False) -> bool:
-        """Start Chrome with debug port"""
+    async def _start_chrome(self, headless: bool) -> bool:
         try:
             # Check if Chrome is already running
-            if self.is_chrome_running():
+            if await self.is_chrome_running():
                 logger.info(f"Chrome is already running on port {self.debug_port}")
                 return True
             
@@ -108,36 +208,11 @@ class ChromeManager:
             if self.is_container:
                 logger.info("Running in Podman container - attempting to start host Chrome via service")
                 
-                # Try to connect to host Chrome service
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.connect(('127.0.0.1', 9223))  # Host service port
-                    
-                    # Send request to start Chrome
-                    request = {'action': 'start_chrome'}
-                    sock.send(json.dumps(request).encode('utf-8'))
-                    
-                    # Wait for response
-                    response_data = sock.recv(1024)
-                    response = json.loads(response_data.decode('utf-8'))
-                    sock.close()
-                    
-                    if response.get('success'):
-                        logger.info("Host Chrome service started Chrome successfully")
-                        # Wait a bit for Chrome to fully start
-                        time.sleep(3)
-                        
-                        # Check if Chrome is now running
-                        if self.is_chrome_running():
-                            logger.info(f"Chrome is now running on port {self.debug_port}")
-                            return True
-                        else:
-                            logger.warning("Host service reported success but Chrome is not accessible")
-                    else:
-                        logger.error(f"Host service failed to start Chrome: {response.get('error')}")
-                        
-                except Exception as e:
-                    logger.warning(f"Could not connect to host Chrome service: {e}")
+                if await self._request_host_start(headless):
+                    if await self.wait_until_ready(self.start_timeout):
+                        return True
+                    logger.warning("Host service reported success but Chrome is not accessible")
+                    return False
                 
                 # If service communication failed, provide user instructions
                 logger.info("Please start the host Chrome service:")
@@ -146,14 +221,11 @@ class ChromeManager:
                 logger.info(f"  podman run -p 9222:9222 -p 9223:9223 ...")
                 logger.info(f"Or manually start Chrome with: --remote-debugging-port={self.debug_port}")
                 
-                # Wait a bit and check again
-                time.sleep(5)
-                if self.is_chrome_running():
-                    logger.info(f"Chrome is now running on port {self.debug_port}")
+                # Give a manually started Chrome a chance to come up
+                if await self.wait_until_ready(HOST_MANUAL_START_TIMEOUT):
                     return True
-                else:
-                    logger.warning("Chrome is still not running. Please start host service or Chrome manually.")
-                    return False
+                logger.warning("Chrome is still not running. Please start host service or Chrome manually.")
+                return False
             
             # Find Chrome executable (when running on host)
             chrome_path = self._find_chrome_executable()
@@ -181,27 +253,19 @@ class ChromeManager:
                 cmd.append("--headless=new")
             
             # Start Chrome process
+            kwargs = {}
             if platform.system() == "Windows":
                 # On Windows, we need to use CREATE_NEW_PROCESS_GROUP
-                self.chrome_process = subprocess.Popen(
-                    cmd,
-                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-            else:
-                self.chrome_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
+                kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            self.chrome_process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **kwargs
+            )
             
-            # Wait for Chrome to start
-            for i in range(10):  # Wait up to 10 seconds
-                if self.is_chrome_running():
-                    logger.info(f"Chrome started successfully on port {self.debug_port}")
-                    return True
-                time.sleep(1)
+            if await self.wait_until_ready(self.start_timeout):
+                return True
             
             logger.error("Chrome failed to start within timeout")
             return False
@@ -210,44 +274,53 @@ class ChromeManager:
             logger.error(f"Failed to start Chrome: {e}")
             return False
     
-    def stop_chrome(self):
+    async def stop_chrome(self):
         """Stop Chrome process"""
         if self.chrome_process:
             try:
                 self.chrome_process.terminate()
-                self.chrome_process.wait(timeout=5)
+                await asyncio.wait_for(self.chrome_process.wait(), timeout=5)
                 logger.info("Chrome stopped successfully")
-            except:
+            except ProcessLookupError:
+                # Already exited
+                pass
+            except Exception:
                 try:
                     self.chrome_process.kill()
+                    await self.chrome_process.wait()
                     logger.info("Chrome killed forcefully")
                 except Exception as e:
                     logger.error(f"Failed to stop Chrome: {e}")
             finally:
                 self.chrome_process = None
+        if self.host_agent is not None:
+            await self.host_agent.close()
     
-    def __enter__(self):
+    async def __aenter__(self):
         """Context manager entry"""
-        if self.start_chrome():
+        if await self.start_chrome():
             return self
         else:
             raise RuntimeError("Failed to start Chrome")
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
-        self.stop_chrome()
+        await self.stop_chrome()
 
 
 # Example usage
+async def _example():
+    async with ChromeManager() as chrome_manager:
+        print(f"Chrome started automatically in {chrome_manager.startup_seconds} s!")
+        print("You can now connect to Chrome on port 9222")
+        await asyncio.to_thread(input, "Press Enter to stop Chrome...")
+
 if __name__ == "__main__":
     # Configure logging
     logging.basicConfig(level=logging.INFO)
     
     # Example of automatic Chrome management
     try:
-        with ChromeManager() as chrome_manager:
-            print("Chrome started automatically!")
-            print("You can now connect to Chrome on port 9222")
-            input("Press Enter to stop Chrome...")
+        asyncio.run(_example())
     except Exception as e:
         print(f"Failed to manage Chrome: {e}")
\ No newline at end of file
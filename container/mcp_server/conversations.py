@@ -0,0 +1,108 @@
+"""
+Conversation module
+Pins multi-turn conversations to their own tab and chat thread until they go idle
+"""
+
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("terminai-mcp-conversations")
+
+# Seconds a conversation may stay idle before its tab is given back
+DEFAULT_TTL = 1800.0
+
+_CONVERSATION_ID = re.compile(r"^[\w.:-]{1,128}$")
+
+
+def validate_conversation_id(conversation_id: str) -> str:
+    """Return the id, or raise ValueError if it cannot be used as a tab key"""
+    if not isinstance(conversation_id, str) or not _CONVERSATION_ID.match(conversation_id):
+        raise ValueError("conversation_id must be 1-128 letters, digits, '_', '-', '.' or ':'")
+    return conversation_id
+
+
+def conversation_key(ai: str, conversation_id: str) -> str:
+    """Tab pool key of a conversation; plain service ids never contain '#'"""
+    return f"{ai}#{conversation_id}"
+
+
+def key_service(key: str) -> str:
+    """Service id of a tab pool key, whether it is a service id or a conversation key"""
+    return key.split("#", 1)[0]
+
+
+class Conversation:
+    """One chat thread on one AI service"""
+
+    def __init__(self, ai: str, conversation_id: str):
+        self.ai = ai
+        self.id = conversation_id
+        self.key = conversation_key(ai, conversation_id)
+        # Address of the chat thread, to return to it if its tab was lost
+        self.url: Optional[str] = None
+        self.turns = 0
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+
+class ConversationRegistry:
+    """Open conversations by tab key, expiring those idle for longer than the TTL"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._conversations: Dict[str, Conversation] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ConversationRegistry":
+        config = config or {}
+        return cls(ttl=float(config.get('ttl', DEFAULT_TTL)))
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def open(self, ai: str, conversation_id: str) -> Conversation:
+        """Return the conversation, starting it if it is new or has expired"""
+        key = conversation_key(ai, validate_conversation_id(conversation_id))
+        conversation = self._conversations.get(key)
+        if conversation is None:
+            conversation = self._conversations[key] = Conversation(ai, conversation_id)
+        conversation.touch()
+        return conversation
+
+    def get(self, ai: str, conversation_id: str) -> Optional[Conversation]:
+        return self._conversations.get(conversation_key(ai, conversation_id))
+
+    def remove(self, conversation: Conversation) -> None:
+        if self._conversations.get(conversation.key) is conversation:
+            del self._conversations[conversation.key]
+
+    def expire(self) -> List[Conversation]:
+        """Forget and return the conversations idle for longer than the TTL"""
+        cutoff = time.monotonic() - self.ttl
+        expired = [c for c in self._conversations.values() if c.last_used < cutoff]
+        for conversation in expired:
+            del self._conversations[conversation.key]
+            logger.info(f"Conversation {conversation.id} on {conversation.ai} expired after {conversation.turns} turns")
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the open conversations for status reporting"""
+        now = time.monotonic()
+        return {
+            "ttl": self.ttl,
+            "conversations": [
+                {
+                    "ai": conversation.ai,
+                    "conversation_id": conversation.id,
+                    "turns": conversation.turns,
+                    "idle_seconds": round(now - conversation.last_used, 1),
+                    "url": conversation.url
+                }
+                for conversation in self._conversations.values()
+            ]
+        }
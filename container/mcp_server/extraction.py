@@ -0,0 +1,49 @@
+"""
+Answer extraction helpers
+Collect the answer text inside the page in a single round trip
+"""
+
+import logging
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+logger = logging.getLogger("terminai-mcp-extraction")
+
+# Try the selectors in order and return the first one that yields text. Tabs
+# keep their chat thread, so only the newest answer is read: "first" reads the
+# last matching element, "all" joins the matching elements added since
+# prepare_answer_wait recorded the page, or the last one if none were added.
+# Selectors the browser does not understand are skipped.
+_EXTRACT_SCRIPT = """(args) => {
+    const query = (selector) => {
+        try { return Array.from(document.querySelectorAll(selector)); } catch (e) { return []; }
+    };
+    const seen = (window.__terminaiAnswerWait || {}).seen;
+    for (const selector of args.selectors) {
+        const matched = query(selector);
+        let nodes = matched.slice(-1);
+        if (args.mode === 'all') {
+            const fresh = seen ? matched.filter((node) => !seen.has(node)) : matched;
+            if (fresh.length) nodes = fresh;
+        }
+        const parts = [];
+        for (const node of nodes) {
+            const text = (node.textContent || '').trim();
+            if (text) parts.push(text);
+        }
+        if (parts.length) return { selector, text: parts.join('\\n') };
+    }
+    return null;
+}"""
+
+
+async def extract_answer(page: "Page", selectors: Sequence[str], mode: str = "first") -> Tuple[Optional[str], Optional[str]]:
+    """Return the answer text and the selector that produced it, or (None, None)"""
+    if not selectors:
+        return None, None
+    result = await page.evaluate(_EXTRACT_SCRIPT, {"selectors": list(selectors), "mode": mode})
+    if not isinstance(result, dict) or not isinstance(result.get("text"), str):
+        return None, None
+    return result["text"], result.get("selector")
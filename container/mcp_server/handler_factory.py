@@ -1,56 +1,103 @@
 """
 Factory for creating AI handlers
+Handlers are registered by name and imported only when their service is first used
 """
 
-from typing import Optional
-from playwright.async_api import Page
+import importlib
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Type, Union
+
 from .ai_handler_base import AIHandler
+from .handler_specs import has_handler_spec
+from .spec_handler import SpecHandler
+from .startup import startup_report
+from .utils import load_ai_urls
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+logger = logging.getLogger("terminai-mcp-handler-factory")
+
+# Entry point group through which installed packages can add handlers.
+# The entry point name is the service id, e.g. in a plugin's pyproject.toml:
+#   [project.entry-points."terminai.handlers"]
+#   my-ai = "my_package.handler:MyAIHandler"
+ENTRY_POINT_GROUP = "terminai.handlers"
+
+# Built-in handlers as "module:class" paths, imported on first use
+AI_HANDLERS: Dict[str, Union[str, Type[AIHandler]]] = {
+    "deepseek": "mcp_server.handlers.deepseek_handler:DeepSeekHandler",
+    "doubao": "mcp_server.handlers.doubao_handler:DoubaoHandler",
+    "qwen": "mcp_server.handlers.qwen_handler:QwenHandler",
+    "yuanbao": "mcp_server.handlers.yuanbao_handler:YuanbaoHandler",
+    "ernie": "mcp_server.handlers.ernie_handler:ErnieHandler",
+    "kimi": "mcp_server.handlers.kimi_handler:KimiHandler",
+    "tongyi-wanxiang": "mcp_server.handlers.tongyi_wanxiang_handler:TongyiWanxiangHandler",
+    "wenxin-yiyan": "mcp_server.handlers.wenxin_yiyan_handler:WenxinYiyanHandler",
+    "chatgpt": "mcp_server.handlers.chatgpt_handler:ChatgptHandler",
+    "claude": "mcp_server.handlers.claude_handler:ClaudeHandler",
+    "gemini": "mcp_server.handlers.gemini_handler:GeminiHandler",
+    "copilot": "mcp_server.handlers.copilot_handler:CopilotHandler",
+    "perplexity": "mcp_server.handlers.perplexity_handler:PerplexityHandler",
+    "grok": "mcp_server.handlers.grok_handler:GrokHandler",
+    "pi": "mcp_server.handlers.pi_handler:PiHandler",
+    "quark": "mcp_server.handlers.quark_handler:QuarkHandler",
+    "huggingchat": "mcp_server.handlers.huggingchat_handler:HuggingchatHandler",
+    "leonardo-ai": "mcp_server.handlers.leonardo_ai_handler:LeonardoAiHandler"
+}
+
+_entry_points_loaded = False
+
+def register_handler(ai_service: str, handler: Union[str, Type[AIHandler]]) -> None:
+    """Register a handler class, or a "module:class" path to import on first use"""
+    AI_HANDLERS[ai_service.lower()] = handler
 
-# Import handlers
-from .handlers.deepseek_handler import DeepSeekHandler
-from .handlers.doubao_handler import DoubaoHandler
-from .handlers.qwen_handler import QwenHandler
-from .handlers.yuanbao_handler import YuanbaoHandler
-from .handlers.ernie_handler import ErnieHandler
-from .handlers.kimi_handler import KimiHandler
-from .handlers.tongyi_wanxiang_handler import TongyiWanxiangHandler
-from .handlers.wenxin_yiyan_handler import WenxinYiyanHandler
-from .handlers.chatgpt_handler import ChatgptHandler
-from .handlers.claude_handler import ClaudeHandler
-from .handlers.gemini_handler import GeminiHandler
-from .handlers.copilot_handler import CopilotHandler
-from .handlers.perplexity_handler import PerplexityHandler
-from .handlers.grok_handler import GrokHandler
-from .handlers.pi_handler import PiHandler
-from .handlers.quark_handler import QuarkHandler
-from .handlers.huggingchat_handler import HuggingchatHandler
-from .handlers.leonardo_ai_handler import LeonardoAiHandler
-
-def create_ai_handler(ai_service: str, page: Page) -> Optional[AIHandler]:
+def _load_entry_points() -> None:
+    """Register handlers advertised by installed packages, without importing them"""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            # Built-in handlers win over plugins with the same name
+            AI_HANDLERS.setdefault(entry_point.name.lower(), entry_point.value)
+    except Exception as e:
+        logger.warning(f"Failed to load handler entry points: {e}")
+
+def _resolve_handler(ai_service: str) -> Optional[Type[AIHandler]]:
+    """Return the handler class for the service, importing it if needed"""
+    _load_entry_points()
+    handler = AI_HANDLERS.get(ai_service)
+    if handler is None or isinstance(handler, type):
+        return handler
+
+    start = time.perf_counter()
+    module_name, _, class_name = handler.partition(":")
+    handler_class = getattr(importlib.import_module(module_name), class_name)
+    startup_report.record_handler(ai_service, time.perf_counter() - start)
+    # Later lookups use the class directly
+    AI_HANDLERS[ai_service] = handler_class
+    return handler_class
+
+def has_ai_handler(ai_service: str) -> bool:
+    """Check whether a handler or handler spec exists for the service"""
+    _load_entry_points()
+    ai_service = ai_service.lower()
+    return ai_service in AI_HANDLERS or has_handler_spec(ai_service)
+
+def create_ai_handler(ai_service: str, page: "Page") -> Optional[AIHandler]:
     """Factory function to create AI handler based on service name"""
-    handlers = {
-        "deepseek": DeepSeekHandler,
-        "doubao": DoubaoHandler,
-        "qwen": QwenHandler,
-        "yuanbao": YuanbaoHandler,
-        "ernie": ErnieHandler,
-        "kimi": KimiHandler,
-        "tongyi-wanxiang": TongyiWanxiangHandler,
-        "wenxin-yiyan": WenxinYiyanHandler,
-        "chatgpt": ChatgptHandler,
-        "claude": ClaudeHandler,
-        "gemini": GeminiHandler,
-        "copilot": CopilotHandler,
-        "perplexity": PerplexityHandler,
-        "grok": GrokHandler,
-        "pi": PiHandler,
-        "quark": QuarkHandler,
-        "huggingchat": HuggingchatHandler,
-        "leonardo-ai": LeonardoAiHandler
-    }
-    
-    handler_class = handlers.get(ai_service.lower())
+    ai_service = ai_service.lower()
+    handler_class = _resolve_handler(ai_service)
     if handler_class:
         return handler_class(page)
-    
-    return None
\ No newline at end of file
+
+    # Services added only to handler_specs.yaml or config.yaml use the generic handler,
+    # the latter with the default spec
+    if has_ai_handler(ai_service) or ai_service in load_ai_urls():
+        return SpecHandler(page, ai_service)
+
+    return None
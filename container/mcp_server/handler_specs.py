@@ -0,0 +1,157 @@
+"""
+Handler specs module
+Loads the per-service selectors and choices from handler_specs.yaml and reloads them when the file changes
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .text_input import INSERT_MODES
+
+logger = logging.getLogger("terminai-mcp-handler-specs")
+
+DEFAULT_SPECS_PATH = os.path.join(os.path.dirname(__file__), '..', 'handler_specs.yaml')
+
+# Spec used for configured services without an entry of their own
+DEFAULT_SPEC_ID = "_default"
+
+SUBMIT_MODES = ("click", "enter")
+EXTRACT_MODES = ("first", "all")
+
+
+@dataclass(frozen=True)
+class HandlerSpec:
+    """How the generic handler talks to one AI website"""
+    id: str
+    input: Tuple[str, ...]
+    answer: Tuple[str, ...]
+    name: Optional[str] = None
+    url: Optional[str] = None
+    buttons: Tuple[str, ...] = ()
+    # "click" clicks the first send button found, "enter" presses Enter in the input
+    submit: str = "click"
+    # "first" returns the first matching element, "all" joins every matching element
+    extract: str = "first"
+    # How long questions are put into the input: "fill", "insert_text" or "paste"
+    insert: str = "insert_text"
+    # None means the defaults shared by all handlers
+    stop: Optional[Tuple[str, ...]] = None
+    done: Optional[Tuple[str, ...]] = None
+    new_chat: Optional[Tuple[str, ...]] = None
+
+
+def _selectors(data: Dict[str, Any], key: str, required: bool = False) -> Optional[Tuple[str, ...]]:
+    """Read a selector list, accepting a single string as a list of one"""
+    value = data.get(key)
+    if value is None:
+        if required:
+            raise ValueError(f"'{key}' is required")
+        return None
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(s, str) for s in value):
+        raise ValueError(f"'{key}' must be a list of selectors")
+    if required and not value:
+        raise ValueError(f"'{key}' must not be empty")
+    return tuple(value)
+
+
+def parse_handler_spec(service_id: str, data: Dict[str, Any]) -> HandlerSpec:
+    """Build a HandlerSpec from one YAML entry, raising ValueError if it is invalid"""
+    if not isinstance(data, dict):
+        raise ValueError("spec must be a mapping")
+    submit = data.get('submit', 'click')
+    if submit not in SUBMIT_MODES:
+        raise ValueError(f"'submit' must be one of {', '.join(SUBMIT_MODES)}")
+    extract = data.get('extract', 'first')
+    if extract not in EXTRACT_MODES:
+        raise ValueError(f"'extract' must be one of {', '.join(EXTRACT_MODES)}")
+    insert = data.get('insert', 'insert_text')
+    if insert not in INSERT_MODES:
+        raise ValueError(f"'insert' must be one of {', '.join(INSERT_MODES)}")
+    return HandlerSpec(
+        id=service_id,
+        name=data.get('name'),
+        url=data.get('url'),
+        input=_selectors(data, 'input', required=True),
+        buttons=_selectors(data, 'buttons') or (),
+        submit=submit,
+        answer=_selectors(data, 'answer', required=True),
+        extract=extract,
+        insert=insert,
+        stop=_selectors(data, 'stop'),
+        done=_selectors(data, 'done'),
+        new_chat=_selectors(data, 'new_chat')
+    )
+
+
+class HandlerSpecRegistry:
+    """Handler specs read from a YAML file, reloaded whenever the file changes"""
+
+    def __init__(self, path: str = DEFAULT_SPECS_PATH):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._specs: Dict[str, HandlerSpec] = {}
+
+    def _refresh(self) -> None:
+        """Reload the file if it changed; keep the previous specs if it cannot be parsed"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            if self._mtime is not None:
+                logger.warning(f"Handler specs file {self.path} disappeared, keeping loaded specs")
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f) or {}
+            if not isinstance(data, dict):
+                raise ValueError("top level must be a mapping of service id to spec")
+        except Exception as e:
+            logger.error(f"Failed to load handler specs, keeping previous specs: {e}")
+            return
+
+        specs = {}
+        for service_id, entry in data.items():
+            try:
+                specs[str(service_id)] = parse_handler_spec(str(service_id), entry)
+            except ValueError as e:
+                # A broken entry must not take the other services down
+                previous = self._specs.get(str(service_id))
+                if previous:
+                    specs[str(service_id)] = previous
+                logger.error(f"Invalid handler spec for {service_id}: {e}")
+        self._specs = specs
+        logger.info(f"Loaded {len(specs)} handler specs from {self.path}")
+
+    def get(self, service_id: str) -> Optional[HandlerSpec]:
+        """Get the spec for a service, or None if it has no entry"""
+        self._refresh()
+        return self._specs.get(service_id)
+
+    def get_default(self) -> Optional[HandlerSpec]:
+        """Get the spec used for services without an entry of their own"""
+        return self.get(DEFAULT_SPEC_ID)
+
+    def service_ids(self) -> List[str]:
+        """Ids of the services that have their own spec"""
+        self._refresh()
+        return [service_id for service_id in self._specs if service_id != DEFAULT_SPEC_ID]
+
+
+handler_specs = HandlerSpecRegistry()
+
+def get_handler_spec(service_id: str) -> Optional[HandlerSpec]:
+    """Get the spec for a service, falling back to the default spec"""
+    return handler_specs.get(service_id) or handler_specs.get_default()
+
+def has_handler_spec(service_id: str) -> bool:
+    """Check whether the service has a spec of its own"""
+    return service_id != DEFAULT_SPEC_ID and handler_specs.get(service_id) is not None
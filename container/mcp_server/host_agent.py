@@ -0,0 +1,149 @@
+"""
+Host agent client
+Talks to scripts/host_chrome_service.py over one persistent, length-prefixed JSON connection
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import struct
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("terminai-mcp-host-agent")
+
+# Every message is a 4-byte big-endian length followed by a UTF-8 JSON object
+HEADER = struct.Struct(">I")
+# Largest message accepted, in bytes
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+class HostAgentError(Exception):
+    """Raised when the host agent cannot be reached or sends a malformed answer"""
+
+
+class HostAgentDisconnected(HostAgentError):
+    """Raised when the connection to the host agent broke; the request can be sent again"""
+
+
+class HostAgentTimeout(HostAgentError):
+    """Raised when the host agent did not answer in time; the request may still be running"""
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Frame a message for sending"""
+    body = json.dumps(message).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+async def read_message(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Read one framed message"""
+    try:
+        (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+        if size > MAX_MESSAGE_SIZE:
+            raise HostAgentError(f"Message of {size} bytes exceeds {MAX_MESSAGE_SIZE}")
+        message = json.loads(await reader.readexactly(size))
+    except asyncio.IncompleteReadError:
+        raise HostAgentDisconnected("Host agent closed the connection")
+    except ValueError as e:
+        raise HostAgentError(f"Invalid JSON from host agent: {e}")
+    if not isinstance(message, dict):
+        raise HostAgentError("Host agent answer is not a JSON object")
+    return message
+
+
+class HostAgentClient:
+    """Sends requests to the host agent, reusing one connection for all of them"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9223, connect_timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        # Requests on one connection are answered in order, so send one at a time
+        self._lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _connect(self) -> None:
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout=self.connect_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise HostAgentError(f"Could not connect to host agent on {self.host}:{self.port}: {e}")
+
+    async def _exchange(self, message: Dict[str, Any], response_timeout: float) -> Dict[str, Any]:
+        try:
+            self._writer.write(encode_message(message))
+            await self._writer.drain()
+            return await asyncio.wait_for(read_message(self._reader), timeout=response_timeout)
+        except asyncio.TimeoutError:
+            # Caught first: since Python 3.11 asyncio.TimeoutError is a subclass of OSError
+            raise HostAgentTimeout(f"Host agent did not answer '{message['action']}' within {response_timeout} s")
+        except OSError as e:
+            raise HostAgentDisconnected(f"Host agent connection failed: {e}")
+
+    async def request(self, action: str, response_timeout: float = 5.0, **params: Any) -> Dict[str, Any]:
+        """Send an action and return the agent's answer
+
+        A request whose reused connection turned out to be broken is sent once
+        more on a new connection. A request that timed out is never sent
+        again: actions such as start are not idempotent.
+        """
+        message = {"id": next(self._ids), "action": action, **params}
+        async with self._lock:
+            reused = self.connected
+            if not reused:
+                await self._connect()
+            try:
+                try:
+                    response = await self._exchange(message, response_timeout)
+                except HostAgentDisconnected as e:
+                    if not reused:
+                        raise
+                    # The agent may have restarted since the last request; retry once on a fresh connection
+                    logger.debug(f"Host agent connection dropped ({e}), reconnecting")
+                    await self.close()
+                    await self._connect()
+                    response = await self._exchange(message, response_timeout)
+            except HostAgentError:
+                # After a timeout a late answer would be read as the answer to the next request
+                await self.close()
+                raise
+        if response.get("id") not in (None, message["id"]):
+            await self.close()
+            raise HostAgentError("Host agent answered a different request")
+        return response
+
+    async def start(self, debug_port: int = 9222, headless: bool = False,
+                    timeout: float = 15.0) -> Dict[str, Any]:
+        """Start Chrome on the host; the answer arrives once DevTools answers"""
+        return await self.request("start", response_timeout=timeout + 1, debug_port=debug_port,
+                                  headless=headless, timeout=timeout)
+
+    async def stop(self, debug_port: int = 9222) -> Dict[str, Any]:
+        return await self.request("stop", response_timeout=10, debug_port=debug_port)
+
+    async def status(self, debug_port: int = 9222) -> Dict[str, Any]:
+        return await self.request("status", debug_port=debug_port)
+
+    async def list_targets(self, debug_port: int = 9222) -> Dict[str, Any]:
+        return await self.request("list_targets", debug_port=debug_port)
+
+    async def wait_ready(self, debug_port: int = 9222, timeout: float = 15.0) -> Dict[str, Any]:
+        return await self.request("wait_ready", response_timeout=timeout + 1, debug_port=debug_port, timeout=timeout)
+
+    async def close(self) -> None:
+        """Close the connection; the next request opens a new one"""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,165 @@
+"""
+Job module
+Runs questions in the background so clients poll for the answer instead of holding a connection
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("terminai-mcp-jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """One question answered in the background"""
+
+    def __init__(self, ai: str, question: str):
+        self.id = uuid.uuid4().hex
+        self.ai = ai
+        self.question = question
+        self.status = QUEUED
+        # Answer text rendered so far, updated while the site generates
+        self.text = ""
+        self.answer: Optional[str] = None
+        self.cached = False
+        self.error: Optional[str] = None
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def start(self) -> None:
+        """Mark the job running once it has a scheduler slot"""
+        self.status = RUNNING
+        self.started = time.monotonic()
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """Update the partial text from an answer stream event"""
+        name = event.get("event")
+        if name == "delta":
+            self.text += event.get("text", "")
+        elif name == "replace":
+            self.text = event.get("text", "")
+
+    def finish(self, answer: str, cached: bool = False) -> None:
+        self.status = DONE
+        self.answer = answer
+        self.text = answer
+        self.cached = cached
+        self.finished = time.monotonic()
+
+    def fail(self, error: BaseException) -> None:
+        if isinstance(error, asyncio.CancelledError):
+            self.status = CANCELLED
+            self.error = "Job cancelled"
+        else:
+            self.status = FAILED
+            self.error = str(error) or type(error).__name__
+        self.finished = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job for the status endpoint"""
+        now = time.monotonic()
+        return {
+            "job_id": self.id,
+            "ai": self.ai,
+            "status": self.status,
+            "text": self.text,
+            "answer": self.answer,
+            "cached": self.cached,
+            "error": self.error,
+            "queued_seconds": round((self.started or self.finished or now) - self.created, 3),
+            "elapsed": round((self.finished or now) - self.created, 3)
+        }
+
+
+class JobManager:
+    """Keeps running jobs and, for a while, finished ones"""
+
+    def __init__(self, ttl: float = 600.0, max_jobs: int = 256):
+        # Seconds a finished job can still be fetched
+        self.ttl = ttl
+        # Jobs kept in total; the oldest finished ones are dropped first
+        self.max_jobs = max(1, max_jobs)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "JobManager":
+        config = config or {}
+        return cls(ttl=float(config.get('ttl', 600)), max_jobs=int(config.get('max_jobs', 256)))
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _prune(self, room: int = 0) -> None:
+        """Drop expired finished jobs, then the oldest finished ones over the limit"""
+        cutoff = time.monotonic() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished < cutoff]:
+            del self._jobs[job_id]
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) + room - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def submit(self, ai: str, question: str, run: Callable[[Job], Awaitable[None]]) -> Job:
+        """Start ``run(job)`` in the background and return the job right away
+
+        ``run`` either finishes the job itself or raises; errors and
+        cancellation are recorded on the job.
+        """
+        self._prune(room=1)
+        job = Job(ai, question)
+
+        async def execute() -> None:
+            try:
+                await run(job)
+            except asyncio.CancelledError as e:
+                job.fail(e)
+                logger.info(f"Job {job.id} for {job.ai} cancelled")
+            except Exception as e:
+                job.fail(e)
+                logger.error(f"Job {job.id} for {job.ai} failed: {e}")
+
+        job.task = asyncio.create_task(execute())
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Stop a job that has not finished yet; returns None for unknown jobs"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.done and job.task is not None:
+            job.task.cancel()
+            # Let the job release its tab and scheduler slot before answering
+            await asyncio.wait([job.task])
+            if not job.done:
+                # Cancelled before it started running
+                job.fail(asyncio.CancelledError())
+        return job
+
+    async def close(self) -> None:
+        """Cancel every unfinished job"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.done]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
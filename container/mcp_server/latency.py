@@ -0,0 +1,146 @@
+"""
+Latency module
+Rolling latency windows per service and stage, from which waits take their deadlines and polling intervals
+"""
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .utils import load_config
+
+# Stage timings kept per service and stage; older ones are forgotten
+DEFAULT_WINDOW = 50
+
+# Timings needed before a deadline is derived; until then the configured timeout is used
+DEFAULT_MIN_SAMPLES = 5
+
+# Percentile of the recent timings a wait must cover
+DEFAULT_PERCENTILE = 99.0
+
+# Share of that percentile added on top, e.g. 0.5 waits 1.5 times the p99
+DEFAULT_MARGIN = 0.5
+
+# Derived deadlines are never shorter than this, in milliseconds
+DEFAULT_MIN_DEADLINE_MS = 5000
+
+# Polling is set to check about this often during a typical (median) stage
+POLLS_PER_STAGE = 20
+MIN_POLL_MS = 50
+MAX_POLL_MS = 500
+
+
+class LatencyWindow:
+    """The last timings of one service and stage, in seconds"""
+
+    def __init__(self, size: int = DEFAULT_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=max(1, size))
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None when it is empty"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = math.ceil(len(ordered) * min(max(percent, 0.0), 100.0) / 100)
+        return ordered[max(rank, 1) - 1]
+
+
+class LatencyTracker:
+    """Learns how long each stage of each service takes and sizes waits to match
+
+    Deadlines come from completed stages only. A wait that timed out is
+    counted separately, so a hung site does not stretch the deadline of the
+    next questions.
+    """
+
+    def __init__(self, enabled: bool = True, window: int = DEFAULT_WINDOW,
+                 min_samples: int = DEFAULT_MIN_SAMPLES, percentile: float = DEFAULT_PERCENTILE,
+                 margin: float = DEFAULT_MARGIN, min_deadline_ms: int = DEFAULT_MIN_DEADLINE_MS):
+        self.enabled = enabled
+        self.window = window
+        self.min_samples = max(1, min_samples)
+        self.percentile = percentile
+        self.margin = margin
+        self.min_deadline_ms = min_deadline_ms
+        self._windows: Dict[Tuple[str, str], LatencyWindow] = {}
+        self._timeouts: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "LatencyTracker":
+        config = config or {}
+        return cls(
+            enabled=config.get('enabled', True),
+            window=int(config.get('window', DEFAULT_WINDOW)),
+            min_samples=int(config.get('min_samples', DEFAULT_MIN_SAMPLES)),
+            percentile=float(config.get('percentile', DEFAULT_PERCENTILE)),
+            margin=float(config.get('margin', DEFAULT_MARGIN)),
+            min_deadline_ms=int(config.get('min_deadline', DEFAULT_MIN_DEADLINE_MS))
+        )
+
+    def observe(self, service: str, stage: str, seconds: float) -> None:
+        """Record how long a stage took"""
+        key = (service, stage)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = LatencyWindow(self.window)
+        window.add(seconds)
+
+    def record_timeout(self, service: str, stage: str) -> None:
+        """Count a stage whose wait timed out; it says nothing about how long the stage takes"""
+        key = (service, stage)
+        self._timeouts[key] = self._timeouts.get(key, 0) + 1
+
+    def _learned(self, service: str, stage: str) -> Optional[LatencyWindow]:
+        """The window of a service and stage once it holds enough timings to use"""
+        window = self._windows.get((service, stage))
+        if not self.enabled or window is None or len(window) < self.min_samples:
+            return None
+        return window
+
+    def deadline_ms(self, service: str, stage: str, default_ms: int, limit_ms: int) -> int:
+        """Milliseconds to wait for a stage: the percentile plus the margin, capped by limit_ms
+
+        ``default_ms`` is used until enough timings have been recorded.
+        """
+        window = self._learned(service, stage)
+        if window is None:
+            return min(default_ms, limit_ms)
+        learned = window.percentile(self.percentile) * (1 + self.margin) * 1000
+        return int(min(limit_ms, max(self.min_deadline_ms, learned)))
+
+    def poll_ms(self, service: str, stage: str, default_ms: int) -> int:
+        """Milliseconds between checks, so a typical stage is checked about POLLS_PER_STAGE times"""
+        window = self._learned(service, stage)
+        if window is None:
+            return default_ms
+        median = window.percentile(50) * 1000
+        return int(min(MAX_POLL_MS, max(MIN_POLL_MS, median / POLLS_PER_STAGE)))
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return the number of timings, median, percentile and timeouts per service and stage"""
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for service, stage in sorted(set(self._windows) | set(self._timeouts)):
+            window = self._windows.get((service, stage)) or LatencyWindow()
+            p50 = window.percentile(50)
+            high = window.percentile(self.percentile)
+            result.setdefault(service, {})[stage] = {
+                "samples": len(window),
+                "p50": round(p50, 3) if p50 is not None else None,
+                f"p{self.percentile:g}": round(high, 3) if high is not None else None,
+                "timeouts": self._timeouts.get((service, stage), 0),
+                "learned": self._learned(service, stage) is not None
+            }
+        return result
+
+    def reset(self) -> None:
+        self._windows.clear()
+        self._timeouts.clear()
+
+
+latency_tracker = LatencyTracker.from_config(load_config().get('adaptive_timeouts'))
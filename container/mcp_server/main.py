@@ -5,24 +5,32 @@ Web server based on FastAPI, providing browser automation functionality
 """
 
 import asyncio
+import json
 import logging
-import os
-import yaml
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
+from .ai_handler_base import PartialAnswer
+from .answer_cache import answer_cache
 from .browser import BrowserManager
-from .utils import load_ai_urls, load_ai_services
+from .conversations import validate_conversation_id
+from .jobs import Job, JobManager
+from .latency import latency_tracker
+from .metrics import metrics
+from .scheduler import PRIORITIES, RequestScheduler, SchedulerRejected
+from .selector_stats import selector_stats
+from .startup import startup_report
+from .tracing import RequestTracingMiddleware, tracer
+from .utils import load_ai_urls, load_ai_services, load_config, load_warm_up_services
 
 # Load configuration
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
-config = {}
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, 'r') as f:
-        config = yaml.safe_load(f) or {}
+config = load_config()
 
 # Configure logging
 log_level = config.get('logging', {}).get('level', 'INFO')
@@ -37,6 +45,12 @@ logger = logging.getLogger("terminai-mcp-server")
 # Global browser manager instance
 browser_manager: Optional[BrowserManager] = None
 
+# Queues and rate-limits requests per AI service before they reach the browser
+scheduler = RequestScheduler(config.get('scheduler'))
+
+# Questions answered in the background for clients that poll /jobs
+jobs = JobManager.from_config(config.get('jobs'))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle management"""
@@ -45,12 +59,17 @@ async def lifespan(app: FastAPI):
     # Initialize browser manager on startup
     browser_manager = BrowserManager()
     logger.info("MCP Server starting up...")
+    startup_report.mark("ready")
     
     yield
     
     # Clean up resources on shutdown
+    await jobs.close()
     if browser_manager:
         await browser_manager.close()
+    await asyncio.to_thread(selector_stats.save)
+    answer_cache.close()
+    tracer.close()
     logger.info("MCP Server shutting down...")
 
 # Create FastAPI application
@@ -68,8 +87,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Gives each request a correlation id (X-Request-ID) and a root span
+app.add_middleware(RequestTracingMiddleware)
+
+startup_report.mark("imports")
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -99,33 +124,366 @@ async def init_browser(request: dict):
         raise HTTPException(status_code=500, detail="Browser manager not initialized")
     
     debug_port = request.get("debug_port", 9222)
+    # Several Chrome instances to spread AI services across
+    debug_ports = request.get("debug_ports") or config.get('browser', {}).get('debug_ports') or []
     auto_start = request.get("auto_start", False)
+    # Number of top services, or a list of service ids, whose chat pages are opened right away
+    warm_up = request.get("warm_up", config.get('browser', {}).get('warm_up', 0))
+    if isinstance(warm_up, bool) or not isinstance(warm_up, (int, list)):
+        raise HTTPException(status_code=400, detail="warm_up must be a number of services or a list of service ids")
     
     try:
         # If auto_start is enabled, try to start Chrome automatically
+        result = {"success": True, "message": "Browser connected successfully"}
         if auto_start:
-            started = await browser_manager.start_chrome_automatically()
-            if not started:
+            started = await browser_manager.start_chrome_automatically(debug_port=debug_port)
+            if started:
+                result["chrome_startup_seconds"] = browser_manager.chrome_manager.startup_seconds
+            else:
                 logger.warning("Failed to start Chrome automatically, trying to connect to existing instance")
         
-        await browser_manager.connect(debug_port)
-        return {"success": True, "message": "Browser connected successfully"}
+        if debug_ports:
+            await browser_manager.connect(debug_port, endpoints=[debug_port, *debug_ports])
+            result["browsers"] = len(browser_manager.shard_router) if browser_manager.shard_router else 1
+        else:
+            await browser_manager.connect(debug_port)
+        
+        services = warm_up if isinstance(warm_up, list) else load_warm_up_services(warm_up)
+        if services:
+            result["warm_up"] = await browser_manager.warm_up(services)
+            startup_report.mark("warm")
+        return result
     except Exception as e:
         logger.error(f"Failed to connect to browser: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def rejected_response(e: SchedulerRejected) -> HTTPException:
+    """Turn a scheduler rejection into an HTTP error with Retry-After"""
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def acquire_slot(ai: str, priority: str):
+    """Wait for a scheduler slot, mapping rejections to HTTP errors"""
+    try:
+        with tracer.span("scheduler.acquire", {"ai.service": ai, "priority": priority}):
+            return await scheduler.acquire(ai, priority)
+    except SchedulerRejected as e:
+        metrics.record_error(ai, e)
+        raise rejected_response(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def check_conversation_id(conversation_id: str):
+    """Reject ids that cannot be used to pin a tab"""
+    try:
+        validate_conversation_id(conversation_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def cacheable(new_chat: bool, conversation_id: Optional[str]) -> bool:
+    """Whether the answer depends on the question alone
+
+    Tabs keep their chat thread, so only a question that starts a new chat
+    outside a conversation gets the same answer whatever was asked before.
+    """
+    return new_chat and conversation_id is None
+
+async def cache_answer(ai: str, question: str, answer: str):
+    """Cache an answer unless it is partial text after a completion timeout"""
+    if isinstance(answer, PartialAnswer):
+        logger.info(f"Not caching the partial answer from {ai}")
+        return
+    await answer_cache.put(ai, question, answer)
+
+class AskBody(BaseModel):
+    """JSON body of /ask, /ask/stream and /jobs, typed like the query parameters so bad values get a 422"""
+    ai: Optional[str] = None
+    question: Optional[str] = None
+    priority: str = "interactive"
+    new_chat: bool = False
+    no_cache: bool = False
+    conversation_id: Optional[str] = None
+
+def ask_params(body: Optional[AskBody], **params: Any) -> Dict[str, Any]:
+    """Merge the fields set in a JSON body over the query parameters; long questions belong in the body"""
+    if body is not None:
+        params.update(body.model_dump(include=body.model_fields_set & params.keys()))
+    if not params["ai"] or not params["question"]:
+        raise HTTPException(status_code=400, detail="ai and question are required")
+    if params["conversation_id"] is not None:
+        check_conversation_id(params["conversation_id"])
+    return params
+
 @app.post("/ask")
-async def ask_question(ai: str, question: str):
-    """Ask question to the specified AI"""
+async def ask_question(ai: Optional[str] = None, question: Optional[str] = None, priority: str = "interactive",
+                       new_chat: bool = False, no_cache: bool = False, conversation_id: Optional[str] = None,
+                       body: Optional[AskBody] = Body(None)):
+    """Ask question to the specified AI, with the parameters in the query string or a JSON body"""
+    params = ask_params(body, ai=ai, question=question, priority=priority, new_chat=new_chat,
+                        no_cache=no_cache, conversation_id=conversation_id)
+    ai, question, priority = params["ai"], params["question"], params["priority"]
+    new_chat, no_cache, conversation_id = params["new_chat"], params["no_cache"], params["conversation_id"]
+    # Repeated questions are answered without a browser round trip or a scheduler slot;
+    # answers that depend on earlier turns are not cached
+    use_cache = cacheable(new_chat, conversation_id)
+    if use_cache and not no_cache:
+        answer = await answer_cache.get(ai, question)
+        if answer is not None:
+            return {"success": True, "answer": answer, "cached": True}
+    
     if not browser_manager or not browser_manager.is_connected():
         raise HTTPException(status_code=400, detail="Browser not connected")
     
+    lease = await acquire_slot(ai, priority)
+    success = False
     try:
-        answer = await browser_manager.ask_ai(ai, question)
-        return {"success": True, "answer": answer}
+        answer = await browser_manager.ask_ai(ai, question, new_chat=new_chat, conversation_id=conversation_id)
+        success = True
+        if use_cache:
+            await cache_answer(ai, question, answer)
+        if conversation_id is not None:
+            return {"success": True, "answer": answer, "cached": False, "conversation_id": conversation_id}
+        return {"success": True, "answer": answer, "cached": False}
     except Exception as e:
         logger.error(f"Failed to ask question: {e}")
+        metrics.record_error(ai, e)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        lease.release(success)
+
+@app.post("/ask/stream")
+async def ask_question_stream(ai: Optional[str] = None, question: Optional[str] = None,
+                              priority: str = "interactive", new_chat: bool = False,
+                              conversation_id: Optional[str] = None, body: Optional[AskBody] = Body(None)):
+    """Ask question to the specified AI and stream the answer as Server-Sent Events"""
+    params = ask_params(body, ai=ai, question=question, priority=priority, new_chat=new_chat,
+                        conversation_id=conversation_id)
+    ai, question, priority = params["ai"], params["question"], params["priority"]
+    new_chat, conversation_id = params["new_chat"], params["conversation_id"]
+    if not browser_manager or not browser_manager.is_connected():
+        raise HTTPException(status_code=400, detail="Browser not connected")
+    
+    # Admit before the response starts so rejections are real HTTP errors
+    lease = await acquire_slot(ai, priority)
+    
+    async def stream_events():
+        success = False
+        try:
+            async for event in browser_manager.ask_ai_stream(
+                    ai, question, new_chat=new_chat, conversation_id=conversation_id):
+                name = event.pop("event")
+                yield f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            success = True
+        except Exception as e:
+            # Headers are already sent, so errors are reported as an event
+            logger.error(f"Failed to stream answer: {e}")
+            metrics.record_error(ai, e)
+            yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+        finally:
+            lease.release(success)
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the client disconnects before the stream starts
+        background=BackgroundTask(lease.release, False)
+    )
+
+@app.post("/ask/broadcast")
+async def ask_broadcast(request: dict):
+    """Ask several AIs the same question concurrently"""
+    if not browser_manager or not browser_manager.is_connected():
+        raise HTTPException(status_code=400, detail="Browser not connected")
+    
+    question = request.get("question")
+    if not question:
+        raise HTTPException(status_code=400, detail="Question parameter is required")
+    
+    # Services can be listed explicitly and/or selected by category
+    ais = list(request.get("ais") or [])
+    category = request.get("category")
+    if category:
+        ais.extend(service.id for service in load_ai_services() if service.category == category)
+    if not ais:
+        raise HTTPException(status_code=400, detail="No AI services selected")
+    
+    priority = request.get("priority", "interactive")
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {priority}")
+    no_cache = bool(request.get("no_cache", False))
+    new_chat = bool(request.get("new_chat", False))
+    use_cache = cacheable(new_chat, None)
+    
+    async def ask(ai: str, question: str) -> str:
+        return await browser_manager.ask_ai(ai, question, new_chat=new_chat)
+    
+    async def scheduled_ask(ai: str, question: str) -> str:
+        if use_cache and not no_cache:
+            answer = await answer_cache.get(ai, question)
+            if answer is not None:
+                return answer
+        try:
+            answer = await scheduler.run(ai, ask, ai, question, priority=priority)
+        except SchedulerRejected as e:
+            metrics.record_error(ai, e)
+            raise RuntimeError(f"{e} (retry after {e.retry_after} s)")
+        except Exception as e:
+            metrics.record_error(ai, e)
+            raise
+        if use_cache:
+            await cache_answer(ai, question, answer)
+        return answer
+    
+    try:
+        results = browser_manager.broadcast(ais, question, ask=scheduled_ask)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if request.get("stream", False):
+        # One JSON object per line, sent as soon as each service answers
+        async def stream_results():
+            async for result in results:
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    return {"success": True, "results": [result async for result in results]}
+
+@app.get("/conversations")
+async def get_conversations():
+    """Get the open conversations and their idle time"""
+    if not browser_manager:
+        return {"ttl": None, "conversations": []}
+    return browser_manager.conversations.stats()
+
+@app.delete("/conversations/{ai}/{conversation_id}")
+async def end_conversation(ai: str, conversation_id: str):
+    """End a conversation before it expires and free its tab"""
+    if not browser_manager or not await browser_manager.end_conversation(ai, conversation_id):
+        raise HTTPException(status_code=404, detail=f"No open conversation {conversation_id} with {ai}")
+    return {"success": True}
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: AskBody):
+    """Ask a question in the background and return the job id right away"""
+    if not browser_manager or not browser_manager.is_connected():
+        raise HTTPException(status_code=400, detail="Browser not connected")
+    
+    params = ask_params(request, ai=None, question=None, priority="interactive", new_chat=False,
+                        no_cache=False, conversation_id=None)
+    ai, question, priority = params["ai"], params["question"], params["priority"]
+    new_chat, no_cache, conversation_id = params["new_chat"], params["no_cache"], params["conversation_id"]
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {priority}")
+    
+    use_cache = cacheable(new_chat, conversation_id)
+    
+    async def run(job: Job):
+        # Same steps as /ask, but the answer is streamed into the job for partial text
+        if use_cache and not no_cache:
+            answer = await answer_cache.get(ai, question)
+            if answer is not None:
+                job.finish(answer, cached=True)
+                return
+        try:
+            lease = await scheduler.acquire(ai, priority)
+        except SchedulerRejected as e:
+            metrics.record_error(ai, e)
+            raise RuntimeError(f"{e} (retry after {e.retry_after} s)")
+        success = False
+        try:
+            job.start()
+            answer = None
+            async for event in browser_manager.ask_ai_stream(
+                    ai, question, new_chat=new_chat, conversation_id=conversation_id):
+                job.apply(event)
+                if event["event"] == "done":
+                    answer = event["answer"]
+            if answer is None:
+                raise RuntimeError(f"No answer from {ai}")
+            success = True
+        except Exception as e:
+            metrics.record_error(ai, e)
+            raise
+        finally:
+            lease.release(success)
+        if use_cache:
+            await cache_answer(ai, question, answer)
+        job.finish(answer)
+    
+    job = jobs.submit(ai, question, run)
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status, partial text and, once done, the answer of a job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a job, freeing its tab and scheduler slot"""
+    job = await jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+@app.get("/scheduler")
+async def get_scheduler_stats():
+    """Get queue depth and limits per AI service"""
+    return scheduler.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Get stage latencies, queue depth, cache and error metrics in the Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render(scheduler=scheduler.stats(), cache=answer_cache.stats()),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.get("/cache")
+async def get_cache_stats():
+    """Get answer cache hit and miss counts"""
+    return answer_cache.stats()
+
+@app.delete("/cache")
+async def clear_cache():
+    """Drop every cached answer"""
+    await answer_cache.clear()
+    return {"success": True}
+
+@app.get("/selectors")
+async def get_selector_stats():
+    """Get which selectors matched per AI service and stage"""
+    return selector_stats.stats()
+
+@app.get("/latency")
+async def get_latency_stats():
+    """Get the recent stage timings that response and input deadlines are derived from"""
+    return latency_tracker.stats()
+
+@app.get("/startup")
+async def get_startup_report():
+    """Get how long the server took to start and to import each handler"""
+    return startup_report.report()
+
+@app.get("/connection")
+async def get_connection():
+    """Get heartbeat and reconnect state of the attached browsers"""
+    if not browser_manager:
+        raise HTTPException(status_code=500, detail="Browser manager not initialized")
+    
+    return browser_manager.connection_stats()
+
+@app.get("/tabs")
+async def get_tabs():
+    """Get the state of the browser tab pool"""
+    if not browser_manager:
+        raise HTTPException(status_code=500, detail="Browser manager not initialized")
+    
+    return browser_manager.tab_stats()
 
 @app.get("/ais")
 async def get_supported_ais():
@@ -146,7 +504,7 @@ async def get_supported_ais():
             "icon": service.icon,
             "priority": service.priority,
             "authentication_required": service.authentication_required,
-            "capabilities": service.capabilities
+            "capabilities": list(service.capabilities) if service.capabilities is not None else None
         })
     
     default_ai = ai_list[0]["id"] if ai_list else "deepseek"
@@ -0,0 +1,194 @@
+"""
+Metrics module
+Per-stage latency histograms and error counts, rendered in the Prometheus text format
+"""
+
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .utils import load_config
+
+# Stages of one question, in the order they happen
+STAGES = ("navigate", "locate_input", "fill", "submit", "first_token", "completion", "extract")
+
+# Upper bounds in seconds; from navigation (sub-second) to slow generations (minutes)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Prefix of every exported metric name
+PREFIX = "terminai"
+
+
+class Histogram:
+    """Fixed set of buckets, so memory does not grow with the number of observations"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf bucket, not cumulative
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return (le, count) pairs as Prometheus expects them"""
+        total = 0
+        result = []
+        for bound, count in zip([*map(_format_number, self.buckets), "+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def error_cause(error: BaseException) -> str:
+    """Map an exception to a short cause label"""
+    message = str(error).lower()
+    if type(error).__name__ == "SchedulerRejected":
+        return "rejected"
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or type(error).__name__ == "TimeoutError":
+        return "timeout"
+    if isinstance(error, ValueError):
+        return "unsupported"
+    if any(text in message for text in ("target closed", "has been closed", "page not available", "disconnected")):
+        return "browser"
+    if "could not find" in message:
+        return "selector"
+    return "other"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value))
+
+
+def _labels(**labels: Any) -> str:
+    """Format labels, escaping values as the text format requires"""
+    parts = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Metrics:
+    """Latency histograms per service and stage, and error counts per service and cause"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._blocked: Dict[Tuple[str, str], int] = {}
+        self._loaded_bytes: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "Metrics":
+        config = config or {}
+        return cls(buckets=[float(bound) for bound in config.get('buckets') or DEFAULT_BUCKETS])
+
+    def observe(self, service: str, stage: str, seconds: float) -> None:
+        """Record how long a stage took"""
+        key = (service, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, service: str, stage: str) -> Iterator[None]:
+        """Time the enclosed block; stages that raise are not recorded"""
+        start = time.monotonic()
+        yield
+        self.observe(service, stage, time.monotonic() - start)
+
+    def record_error(self, service: str, error: BaseException) -> None:
+        """Count a failed request by its cause"""
+        key = (service, error_cause(error))
+        self._errors[key] = self._errors.get(key, 0) + 1
+
+    def record_blocked(self, service: str, resource_type: str) -> None:
+        """Count a request a tab did not load"""
+        key = (service, resource_type)
+        self._blocked[key] = self._blocked.get(key, 0) + 1
+
+    def record_loaded(self, service: str, size: int) -> None:
+        """Add the size of a response a tab did load"""
+        self._loaded_bytes[service] = self._loaded_bytes.get(service, 0) + size
+
+    def histogram(self, service: str, stage: str) -> Optional[Histogram]:
+        return self._histograms.get((service, stage))
+
+    def errors(self) -> Dict[Tuple[str, str], int]:
+        return dict(self._errors)
+
+    def reset(self) -> None:
+        self._histograms.clear()
+        self._errors.clear()
+        self._blocked.clear()
+        self._loaded_bytes.clear()
+
+    def render(self, scheduler: Optional[Dict[str, Dict[str, Any]]] = None,
+               cache: Optional[Dict[str, Any]] = None) -> str:
+        """Return every metric in the Prometheus text exposition format
+
+        ``scheduler`` and ``cache`` are the stats of the request scheduler and
+        the answer cache, exported as gauges and counters.
+        """
+        lines: List[str] = []
+
+        name = f"{PREFIX}_stage_duration_seconds"
+        lines += [f"# HELP {name} Time spent in each stage of a question", f"# TYPE {name} histogram"]
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        for (service, stage), histogram in sorted(
+            self._histograms.items(), key=lambda item: (item[0][0], order.get(item[0][1], len(order)), item[0][1])
+        ):
+            for bound, count in histogram.cumulative():
+                lines.append(f"{name}_bucket{_labels(service=service, stage=stage, le=bound)} {count}")
+            lines.append(f"{name}_sum{_labels(service=service, stage=stage)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_labels(service=service, stage=stage)} {histogram.count}")
+
+        name = f"{PREFIX}_errors_total"
+        lines += [f"# HELP {name} Failed requests by cause", f"# TYPE {name} counter"]
+        for (service, cause), count in sorted(self._errors.items()):
+            lines.append(f"{name}{_labels(service=service, cause=cause)} {count}")
+
+        name = f"{PREFIX}_blocked_requests_total"
+        lines += [f"# HELP {name} Requests not loaded by the resource blocking profile", f"# TYPE {name} counter"]
+        for (service, resource_type), count in sorted(self._blocked.items()):
+            lines.append(f"{name}{_labels(service=service, type=resource_type)} {count}")
+
+        name = f"{PREFIX}_loaded_bytes_total"
+        lines += [f"# HELP {name} Response bytes loaded by service tabs, as sent in Content-Length", f"# TYPE {name} counter"]
+        for service, size in sorted(self._loaded_bytes.items()):
+            lines.append(f"{name}{_labels(service=service)} {size}")
+
+        if scheduler is not None:
+            for key, metric, help_text in (
+                ("queued", "queue_depth", "Requests waiting for a slot"),
+                ("in_flight", "in_flight", "Requests being answered"),
+            ):
+                name = f"{PREFIX}_{metric}"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+                for service, stats in sorted(scheduler.items()):
+                    lines.append(f"{name}{_labels(service=service)} {stats.get(key, 0)}")
+
+        if cache is not None:
+            for key, help_text in (("hits", "Answers served from the cache"), ("misses", "Cache lookups that missed")):
+                name = f"{PREFIX}_cache_{key}_total"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {cache.get(key, 0)}"]
+            name = f"{PREFIX}_cache_hit_ratio"
+            ratio = cache.get("hit_ratio")
+            lines += [
+                f"# HELP {name} Share of cache lookups that hit",
+                f"# TYPE {name} gauge",
+                f"{name} {ratio if ratio is not None else 'NaN'}"
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics.from_config(load_config().get('metrics'))
@@ -0,0 +1,116 @@
+"""
+Resource blocking module
+Keeps managed tabs from loading images, media, fonts and trackers the chat does not need
+"""
+
+import fnmatch
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from .conversations import key_service
+from .metrics import metrics
+from .tab_pool import PooledTab
+
+logger = logging.getLogger("terminai-mcp-blocking")
+
+DEFAULT_PROFILE = {
+    # Playwright resource types to block: document, stylesheet, image, media, font,
+    # script, texttrack, xhr, fetch, eventsource, websocket, manifest, other
+    "block_types": ["image", "media", "font"],
+    # URL glob patterns blocked whatever their type
+    "deny": [],
+    # URL glob patterns that are never blocked; they win over block_types and deny
+    "allow": []
+}
+
+# Pages themselves always load, or the service could not be opened at all
+NEVER_BLOCKED_TYPES = frozenset({"document"})
+
+
+class BlockingProfile:
+    """Decides per request whether a tab of one service loads it"""
+
+    def __init__(self, block_types: Iterable[str] = (), deny: Iterable[str] = (), allow: Iterable[str] = ()):
+        self.block_types = frozenset(block_types) - NEVER_BLOCKED_TYPES
+        self.deny = tuple(deny)
+        self.allow = tuple(allow)
+
+    def blocks(self, url: str, resource_type: str) -> bool:
+        if resource_type in NEVER_BLOCKED_TYPES:
+            return False
+        if any(fnmatch.fnmatchcase(url, pattern) for pattern in self.allow):
+            return False
+        return resource_type in self.block_types or any(fnmatch.fnmatchcase(url, pattern) for pattern in self.deny)
+
+    @property
+    def empty(self) -> bool:
+        return not self.block_types and not self.deny
+
+
+class ResourceBlocker:
+    """Routes every request of a managed tab through the profile of the service the tab serves
+
+    The route is installed once per page and looks up the tab's service for
+    each request, so a tab reassigned to another service switches profiles.
+    Conversation tabs are handled as tabs of their service.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.defaults = {**DEFAULT_PROFILE, **(config.get("default") or {})}
+        self.overrides: Dict[str, Dict[str, Any]] = config.get("services") or {}
+        self._profiles: Dict[Optional[str], BlockingProfile] = {}
+        # Routing every request through Python has a cost, so skip it when nothing is blocked
+        if self.profile(None).empty and not self.overrides:
+            self.enabled = False
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ResourceBlocker":
+        return cls(config)
+
+    def profile(self, service: Optional[str]) -> BlockingProfile:
+        """The profile of a service: the defaults with its own settings on top"""
+        profile = self._profiles.get(service)
+        if profile is None:
+            settings = {**self.defaults, **(self.overrides.get(service) or {})}
+            profile = BlockingProfile(settings["block_types"] or (), settings["deny"] or (), settings["allow"] or ())
+            self._profiles[service] = profile
+        return profile
+
+    async def apply(self, tab: PooledTab) -> None:
+        """Install the route on the tab's page unless it already has it"""
+        page = tab.page
+        if not self.enabled or page is None or tab.routed_page is page:
+            return
+
+        def service() -> Optional[str]:
+            # Conversation tabs use the profile and metric labels of their service
+            return key_service(tab.key) if tab.page is page and tab.key is not None else None
+
+        async def handle(route: Any) -> None:
+            request = route.request
+            service_id = service()
+            try:
+                if service_id is not None and self.profile(service_id).blocks(request.url, request.resource_type):
+                    metrics.record_blocked(service_id, request.resource_type)
+                    await route.abort("blockedbyclient")
+                else:
+                    await route.continue_()
+            except Exception as e:
+                # The page was closed or navigated away while the request was held
+                logger.debug(f"Could not route {request.url}: {e}")
+
+        def on_response(response: Any) -> None:
+            service_id = service()
+            if service_id is not None:
+                length = response.headers.get("content-length")
+                if length and length.isdigit():
+                    metrics.record_loaded(service_id, int(length))
+
+        await page.route("**/*", handle)
+        try:
+            page.on("response", on_response)
+        except Exception as e:
+            logger.debug(f"Could not watch tab for responses: {e}")
+        tab.routed_page = page
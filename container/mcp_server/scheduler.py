@@ -0,0 +1,236 @@
+"""
+Request scheduler module
+Queues requests per AI service with concurrency limits, rate limits and priorities
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("terminai-mcp-scheduler")
+
+# Lower value is served first
+PRIORITIES = {
+    "interactive": 0,
+    "batch": 1
+}
+
+DEFAULT_LIMITS = {
+    # Requests running at the same time for one service
+    "concurrency": 1,
+    # Requests allowed to wait for one service
+    "queue_size": 8,
+    # Waiting requests allowed for batch work, leaving room for interactive requests
+    "batch_queue_size": 4,
+    # Token bucket refill rate and size
+    "rate_per_minute": 30,
+    "burst": 5,
+    # Seconds a request may wait before it is rejected with 503
+    "max_queue_wait": 120
+}
+
+# Assumed duration of a request until real durations have been observed
+INITIAL_SERVICE_TIME = 15.0
+
+
+class SchedulerRejected(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, message: str, status_code: int, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        # Whole seconds, as required by the Retry-After header
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of refusing outright"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds until it may be used"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self) -> None:
+        """Give back a token from a reservation that was not used"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class ServiceLane:
+    """Admission control for one AI service"""
+
+    def __init__(self, service: str, limits: Dict[str, Any]):
+        self.service = service
+        self.concurrency = max(1, int(limits["concurrency"]))
+        self.queue_size = int(limits["queue_size"])
+        self.batch_queue_size = min(int(limits["batch_queue_size"]), self.queue_size)
+        self.max_queue_wait = float(limits["max_queue_wait"])
+        self.bucket = TokenBucket(float(limits["rate_per_minute"]), int(limits["burst"]))
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.service_time = INITIAL_SERVICE_TIME
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until a request at the given queue position would start"""
+        return (position // self.concurrency + 1) * self.service_time
+
+    def _reject(self, message: str, status_code: int, retry_after: float) -> SchedulerRejected:
+        self.rejected += 1
+        logger.warning(f"Rejected request for {self.service}: {message}")
+        return SchedulerRejected(message, status_code, retry_after)
+
+    async def acquire(self, priority: str) -> None:
+        """Wait for a slot, or raise SchedulerRejected"""
+        rank = PRIORITIES.get(priority)
+        if rank is None:
+            raise ValueError(f"Unknown priority: {priority}")
+
+        # Rate limit: fail fast if the next token is too far away
+        delay = self.bucket.reserve()
+        if delay > self.max_queue_wait:
+            self.bucket.refund()
+            raise self._reject("Rate limit exceeded", 429, delay)
+
+        if self.in_flight < self.concurrency and not self.queued:
+            self.in_flight += 1
+        else:
+            queued = self.queued
+            limit = self.queue_size if rank == PRIORITIES["interactive"] else self.batch_queue_size
+            if queued >= limit:
+                self.bucket.refund()
+                raise self._reject("Queue is full", 429, self.estimated_wait(queued))
+
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (rank, next(self._sequence), future))
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=self.max_queue_wait)
+            except asyncio.TimeoutError:
+                if future.done() and not future.cancelled():
+                    # Slot was handed over just as the timeout fired
+                    self.release()
+                future.cancel()
+                self.bucket.refund()
+                raise self._reject("Timed out waiting in queue", 503, self.estimated_wait(self.queued))
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()
+                future.cancel()
+                raise
+
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+
+    def release(self, duration: Optional[float] = None) -> None:
+        """Free a slot and hand it to the highest priority waiter"""
+        if duration is not None:
+            self.completed += 1
+            # Exponential moving average used for Retry-After estimates
+            self.service_time = 0.8 * self.service_time + 0.2 * duration
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot passes directly to the waiter, in_flight is unchanged
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "average_seconds": round(self.service_time, 3)
+        }
+
+
+class SchedulerLease:
+    """A slot held by one request"""
+
+    def __init__(self, lane: ServiceLane):
+        self._lane = lane
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self, success: bool = True) -> None:
+        if not self._released:
+            self._released = True
+            duration = time.monotonic() - self._started if success else None
+            self._lane.release(duration)
+
+
+class RequestScheduler:
+    """Sits between the API endpoints and BrowserManager"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.defaults = {**DEFAULT_LIMITS, **(config.get("default") or {})}
+        self.overrides: Dict[str, Dict[str, Any]] = config.get("services") or {}
+        self._lanes: Dict[str, ServiceLane] = {}
+
+    def _lane(self, service: str) -> ServiceLane:
+        lane = self._lanes.get(service)
+        if lane is None:
+            limits = {**self.defaults, **(self.overrides.get(service) or {})}
+            lane = ServiceLane(service, limits)
+            self._lanes[service] = lane
+        return lane
+
+    async def acquire(self, service: str, priority: str = "interactive") -> SchedulerLease:
+        """Wait for a slot for the service; the caller must release the lease"""
+        lane = self._lane(service)
+        await lane.acquire(priority)
+        return SchedulerLease(lane)
+
+    @asynccontextmanager
+    async def slot(self, service: str, priority: str = "interactive") -> AsyncIterator[None]:
+        """Context manager that holds a slot for the service"""
+        lease = await self.acquire(service, priority)
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            lease.release(success)
+
+    async def run(self, service: str, func: Callable[..., Awaitable[Any]], *args: Any,
+                  priority: str = "interactive") -> Any:
+        """Run func(*args) once a slot for the service is available"""
+        async with self.slot(service, priority):
+            return await func(*args)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue state per service"""
+        return {service: lane.stats() for service, lane in self._lanes.items()}
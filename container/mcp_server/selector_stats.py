@@ -0,0 +1,128 @@
+"""
+Selector statistics module
+Records which selector matched per service and stage so the last winner is tried first
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from .utils import load_config
+
+logger = logging.getLogger("terminai-mcp-selector-stats")
+
+DEFAULT_STATS_PATH = "~/.terminai/selector_stats.json"
+
+# Seconds between writes of changed statistics
+DEFAULT_SAVE_INTERVAL = 30.0
+
+
+class SelectorStats:
+    """Selector hit counts per service and stage, persisted to a JSON file"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_STATS_PATH, save_interval: float = DEFAULT_SAVE_INTERVAL):
+        self.path = os.path.expanduser(path) if path else None
+        self.save_interval = save_interval
+        # service -> stage -> {"last", "switches", "misses", "selectors": {selector: {"hits", "last_hit"}}}
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "SelectorStats":
+        config = config or {}
+        return cls(
+            path=config.get('path', DEFAULT_STATS_PATH),
+            save_interval=float(config.get('save_interval', DEFAULT_SAVE_INTERVAL))
+        )
+
+    def _stage(self, service: str, stage: str) -> Dict[str, Any]:
+        stages = self._data.setdefault(service, {})
+        return stages.setdefault(stage, {"last": None, "switches": 0, "misses": 0, "selectors": {}})
+
+    def order(self, service: str, stage: str, selectors: Sequence[str]) -> List[str]:
+        """Return the selectors with the last winner first, then by hit count"""
+        entry = self._data.get(service, {}).get(stage)
+        if not entry:
+            return list(selectors)
+        hits = entry["selectors"]
+        last = entry["last"]
+        # sorted() is stable, so selectors that never matched keep the configured order
+        return sorted(
+            selectors,
+            key=lambda s: (s != last, -hits.get(s, {}).get("hits", 0))
+        )
+
+    def record(self, service: str, stage: str, selector: Optional[str]) -> None:
+        """Record the selector that matched, or None when none of them did"""
+        with self._lock:
+            entry = self._stage(service, stage)
+            if selector is None:
+                entry["misses"] += 1
+            else:
+                if entry["last"] is not None and entry["last"] != selector:
+                    # The site changed or the page was in a different state
+                    entry["switches"] += 1
+                    logger.info(f"{service} {stage} selector changed from {entry['last']!r} to {selector!r}")
+                entry["last"] = selector
+                hit = entry["selectors"].setdefault(selector, {"hits": 0, "last_hit": None})
+                hit["hits"] += 1
+                hit["last_hit"] = time.time()
+            self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self._save_soon()
+
+    def _save_soon(self) -> None:
+        """Save now, or in a worker thread when called from the event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        # Claim the interval so the records made meanwhile do not start writes of their own
+        self._saved_at = time.monotonic()
+        loop.run_in_executor(None, self.save)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return a copy of the statistics for status reporting"""
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+    def load(self) -> None:
+        """Read statistics saved by a previous run"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._data = data
+        except Exception as e:
+            logger.warning(f"Failed to load selector statistics: {e}")
+
+    def save(self) -> None:
+        """Write the statistics if they changed since the last write"""
+        with self._lock:
+            self._saved_at = time.monotonic()
+            if not self.path or not self._dirty:
+                return
+            data = json.dumps(self._data, indent=2, sort_keys=True)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Write to a temporary file first so a crash never leaves half a file
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save selector statistics: {e}")
+
+
+selector_stats = SelectorStats.from_config(load_config().get('selector_stats'))
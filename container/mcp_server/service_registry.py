@@ -0,0 +1,110 @@
+"""
+Service registry module
+Parses config.yaml once per change and keeps the AI services indexed by id
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+from .ai_service import AIService
+
+logger = logging.getLogger("terminai-mcp-registry")
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+
+
+def _parse_service(service_data: Dict[str, Any]) -> AIService:
+    """Create an AIService from one ai_services entry"""
+    capabilities = service_data.get('capabilities')
+    return AIService(
+        id=service_data['id'],
+        name=service_data['name'],
+        url=service_data['url'],
+        category=service_data['category'],
+        enabled=service_data.get('enabled', True),
+        sequence=service_data.get('sequence', 0),
+        icon=service_data.get('icon'),
+        priority=service_data.get('priority'),
+        authentication_required=service_data.get('authentication_required'),
+        capabilities=tuple(capabilities) if capabilities is not None else None,
+        response_timeout=service_data.get('response_timeout')
+    )
+
+
+class ServiceRegistry:
+    """Process-wide view of config.yaml, reloaded only when the file's mtime changes"""
+
+    def __init__(self, path: str = CONFIG_PATH):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._config: Dict[str, Any] = {}
+        # Enabled services in configuration order
+        self._services: Tuple[AIService, ...] = ()
+        self._by_id: Dict[str, AIService] = {}
+        self._has_services = False
+
+    def _refresh(self) -> None:
+        """Re-parse the file if it changed; keep the previous state if it cannot be parsed"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            config: Dict[str, Any] = {}
+            if mtime is not None:
+                try:
+                    with open(self.path, 'r') as f:
+                        config = yaml.safe_load(f) or {}
+                    services = tuple(
+                        _parse_service(service_data)
+                        for service_data in config.get('ai_services') or []
+                        if service_data.get('enabled', True)
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to load configuration: {e}")
+                    # Try again once the file changes
+                    self._mtime = mtime
+                    return
+            else:
+                services = ()
+
+            self._config = config
+            self._services = services
+            self._by_id = {service.id: service for service in services}
+            self._has_services = 'ai_services' in config
+            self._mtime = mtime
+            if mtime is not None:
+                logger.info(f"Loaded {len(services)} AI services from {self.path}")
+
+    def config(self) -> Dict[str, Any]:
+        """The parsed configuration; shared between callers, so do not modify it"""
+        self._refresh()
+        return self._config
+
+    def services(self) -> Tuple[AIService, ...]:
+        """Enabled AI services in configuration order"""
+        self._refresh()
+        return self._services
+
+    def get(self, service_id: str) -> Optional[AIService]:
+        """Look up an enabled AI service by id"""
+        self._refresh()
+        return self._by_id.get(service_id)
+
+    def has_services(self) -> bool:
+        """Whether the configuration defines an ai_services list"""
+        self._refresh()
+        return self._has_services
+
+
+service_registry = ServiceRegistry()
@@ -0,0 +1,139 @@
+"""
+Browser sharding module
+Spreads AI service tabs across several Chrome instances attached over CDP
+"""
+
+import bisect
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .tab_pool import TabPool
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page
+
+logger = logging.getLogger("terminai-mcp-shards")
+
+SHARD_STRATEGIES = ("hash", "least_load")
+# Points per shard on the hash ring; more points spread keys more evenly
+RING_REPLICAS = 64
+
+
+def endpoint_url(endpoint: Any) -> str:
+    """Turn a debug port or host:port into a CDP endpoint URL"""
+    if isinstance(endpoint, int) or str(endpoint).isdigit():
+        return f"http://localhost:{endpoint}"
+    endpoint = str(endpoint)
+    return endpoint if "://" in endpoint else f"http://{endpoint}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class BrowserShard:
+    """One Chrome instance with its own tab pool"""
+
+    def __init__(self, endpoint: str, browser: "Browser", page: "Page", max_tabs: int = 4):
+        self.endpoint = endpoint
+        self.browser = browser
+        self.page = page
+        self.alive = True
+        self.tab_pool = TabPool(self._new_page, max_tabs, seed_pages=[page])
+
+    async def _new_page(self) -> "Page":
+        """Open a new tab in the browser context we are attached to"""
+        return await self.page.context.new_page()
+
+
+class ShardRouter:
+    """Assigns keys (AI services) to live shards by consistent hashing or least load
+
+    Assignments are sticky so a service keeps its tab, and only the keys of a
+    shard that is removed move to another one.
+    """
+
+    def __init__(self, strategy: str = "hash"):
+        if strategy not in SHARD_STRATEGIES:
+            raise ValueError(f"Unknown shard strategy: {strategy}")
+        self.strategy = strategy
+        self.shards: List[BrowserShard] = []
+        self._assignments: Dict[str, BrowserShard] = {}
+        # Sorted (hash, shard index) points of the live shards
+        self._ring: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.live())
+
+    def live(self) -> List[BrowserShard]:
+        return [shard for shard in self.shards if shard.alive]
+
+    def _rebuild_ring(self) -> None:
+        self._ring = sorted(
+            (_hash(f"{shard.endpoint}#{replica}"), index)
+            for index, shard in enumerate(self.shards) if shard.alive
+            for replica in range(RING_REPLICAS)
+        )
+
+    def add(self, shard: BrowserShard) -> None:
+        self.shards.append(shard)
+        self._rebuild_ring()
+
+    def remove(self, shard: BrowserShard) -> List[str]:
+        """Take a shard out of rotation, returning the keys that lost their shard"""
+        shard.alive = False
+        moved = [key for key, assigned in self._assignments.items() if assigned is shard]
+        for key in moved:
+            del self._assignments[key]
+        self._rebuild_ring()
+        logger.warning(f"Removed browser {shard.endpoint} from rotation, reassigning {moved}")
+        return moved
+
+    def restore(self, shard: BrowserShard) -> None:
+        """Put a reconnected shard back into rotation; it receives new keys only"""
+        shard.alive = True
+        self._rebuild_ring()
+        logger.info(f"Browser {shard.endpoint} is back in rotation")
+
+    def find(self, endpoint: str) -> Optional[BrowserShard]:
+        return next((shard for shard in self.shards if shard.endpoint == endpoint), None)
+
+    def assigned(self, key: str) -> Optional[BrowserShard]:
+        return self._assignments.get(key)
+
+    def _load(self, shard: BrowserShard) -> Tuple[int, int]:
+        assigned = sum(1 for other in self._assignments.values() if other is shard)
+        return assigned, shard.tab_pool.busy()
+
+    def pick(self, key: str) -> BrowserShard:
+        """Return the shard for the key, assigning one on first use"""
+        shard = self._assignments.get(key)
+        if shard is not None and shard.alive:
+            return shard
+
+        live = self.live()
+        if not live:
+            raise RuntimeError("Browser page not available")
+        if self.strategy == "least_load":
+            shard = min(live, key=self._load)
+        else:
+            index = bisect.bisect(self._ring, (_hash(key), len(self.shards)))
+            shard = self.shards[self._ring[index % len(self._ring)][1]]
+        self._assignments[key] = shard
+        return shard
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the shards and their assigned keys for status reporting"""
+        return {
+            "strategy": self.strategy,
+            "shards": [
+                {
+                    "endpoint": shard.endpoint,
+                    "alive": shard.alive,
+                    "keys": sorted(key for key, assigned in self._assignments.items() if assigned is shard),
+                    **shard.tab_pool.stats()
+                }
+                for shard in self.shards
+            ]
+        }
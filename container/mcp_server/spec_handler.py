@@ -0,0 +1,74 @@
+"""
+Generic spec-driven handler
+Talks to any AI website described by an entry in handler_specs.yaml
+"""
+
+from typing import TYPE_CHECKING, Optional
+from .ai_handler_base import AIHandler
+from .handler_specs import HandlerSpec, get_handler_spec
+from .selector_stats import selector_stats
+from .utils import get_ai_service_by_id
+
+if TYPE_CHECKING:
+    from playwright.async_api import ElementHandle, Page
+
+class SpecHandler(AIHandler):
+    """Handler that executes the spec of one AI service"""
+
+    # Set by subclasses that are bound to a single service
+    service_id: Optional[str] = None
+
+    def __init__(self, page: "Page", service_id: Optional[str] = None):
+        super().__init__(page)
+        self.service_id = service_id or self.service_id
+        if not self.service_id:
+            raise ValueError("SpecHandler needs a service id")
+        self.service = get_ai_service_by_id(self.service_id)
+
+        # The spec is read when the handler is created, so edits apply to the next question
+        spec = get_handler_spec(self.service_id)
+        if spec is None:
+            raise ValueError(f"No handler spec for {self.service_id}")
+        self.spec: HandlerSpec = spec
+        # Selectors that matched last time are tried first
+        self.input_selectors = selector_stats.order(self.service_id, "input", spec.input)
+        self.button_selectors = selector_stats.order(self.service_id, "button", spec.buttons)
+        self.answer_selectors = selector_stats.order(self.service_id, "answer", spec.answer)
+        if spec.stop is not None:
+            self.stop_selectors = list(spec.stop)
+        if spec.done is not None:
+            self.done_selectors = list(spec.done)
+        if spec.new_chat is not None:
+            self.new_chat_selectors = list(spec.new_chat)
+        self.extract_mode = spec.extract
+        self.insert_mode = spec.insert
+
+    @property
+    def display_name(self) -> str:
+        """Name used in error messages"""
+        if self.spec.name:
+            return self.spec.name
+        return self.service.name if self.service else self.service_id
+
+    async def navigate_to_service(self) -> None:
+        """Navigate to the AI service website"""
+        if not self.page:
+            raise RuntimeError("Browser page not available")
+
+        # Get URL from configuration
+        url = self.service.url if self.service else self.spec.url
+        if not url:
+            raise ValueError(f"No URL configured for {self.display_name}")
+        await self.page.goto(url)
+        await self.wait_for_input_ready()
+
+    async def submit(self, input_element: "ElementHandle") -> None:
+        """Click the send button, or press Enter when the spec says so"""
+        if self.spec.submit == "click":
+            await super().submit(input_element)
+        else:
+            await input_element.press("Enter")
+
+    def record_selector(self, stage: str, selector: Optional[str]) -> None:
+        """Remember which selector matched so it is tried first next time"""
+        selector_stats.record(self.service_id, stage, selector)
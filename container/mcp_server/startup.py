@@ -0,0 +1,46 @@
+"""
+Startup timing module
+Records how long the server took to import, become ready and load each handler
+"""
+
+import logging
+import sys
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("terminai-mcp-startup")
+
+
+class StartupReport:
+    """Seconds from the first server import to each startup phase"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        # Seconds spent importing each handler on its first use
+        self.handlers: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        """Record that a phase finished and return the seconds since start"""
+        elapsed = time.perf_counter() - self.started
+        if phase not in self.phases:
+            self.phases[phase] = elapsed
+            logger.info(f"Startup phase '{phase}' reached after {elapsed:.3f} s")
+        return self.phases[phase]
+
+    def record_handler(self, ai_service: str, seconds: float) -> None:
+        """Record the time it took to import a handler"""
+        self.handlers[ai_service] = seconds
+
+    def report(self) -> Dict[str, Any]:
+        """Return the timings for status reporting"""
+        ready: Optional[float] = self.phases.get("ready")
+        return {
+            "ready_seconds": round(ready, 4) if ready is not None else None,
+            "phases": {phase: round(seconds, 4) for phase, seconds in self.phases.items()},
+            "handler_imports": {ai: round(seconds, 4) for ai, seconds in self.handlers.items()},
+            "playwright_loaded": "playwright.async_api" in sys.modules
+        }
+
+
+startup_report = StartupReport()
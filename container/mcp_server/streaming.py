@@ -0,0 +1,146 @@
+"""
+Answer streaming module
+Pushes answer text from the page to Python as the site renders it
+"""
+
+import asyncio
+import logging
+import uuid
+import weakref
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+logger = logging.getLogger("terminai-mcp-streaming")
+
+# Name of the function exposed to every page that streams answers
+BINDING_NAME = "__terminaiStreamEmit"
+
+# Minimum time between two updates pushed from the page
+THROTTLE_MS = 50
+
+# Install a MutationObserver that reports the text of the newest answer.
+# The answer present at install time is the baseline and is never reported.
+_OBSERVER_SCRIPT = """(args) => {
+    const query = (selector) => {
+        try { return Array.from(document.querySelectorAll(selector)); } catch (e) { return []; }
+    };
+    const lastAnswer = () => {
+        for (const selector of args.answer) {
+            const nodes = query(selector);
+            if (nodes.length) {
+                const node = nodes[nodes.length - 1];
+                const text = (node.innerText || node.textContent || '').trim();
+                if (text) return { text, count: nodes.length };
+            }
+        }
+        return { text: '', count: 0 };
+    };
+    const baseline = lastAnswer();
+    let sent = null;
+    let timer = null;
+    const report = () => {
+        timer = null;
+        const answer = lastAnswer();
+        const fresh = answer.text && (answer.text !== baseline.text || answer.count > baseline.count);
+        if (fresh && answer.text !== sent) {
+            sent = answer.text;
+            window[args.binding](args.token, answer.text);
+        }
+    };
+    const observer = new MutationObserver(() => {
+        if (timer === null) timer = setTimeout(report, args.throttleMs);
+    });
+    observer.observe(document.body, { childList: true, subtree: true, characterData: true });
+    window.__terminaiStreams = window.__terminaiStreams || {};
+    window.__terminaiStreams[args.token] = observer;
+}"""
+
+_DISCONNECT_SCRIPT = """(token) => {
+    const streams = window.__terminaiStreams || {};
+    if (streams[token]) {
+        streams[token].disconnect();
+        delete streams[token];
+    }
+}"""
+
+# Streams waiting for updates, per page and token
+_listeners: "weakref.WeakKeyDictionary[Page, Dict[str, asyncio.Queue]]" = weakref.WeakKeyDictionary()
+
+
+async def _ensure_binding(page: "Page") -> Dict[str, asyncio.Queue]:
+    """Expose the emit function to the page once and return its listeners"""
+    listeners = _listeners.get(page)
+    if listeners is None:
+        listeners = {}
+        _listeners[page] = listeners
+
+        def on_emit(source: Any, token: str, text: str) -> None:
+            queue = listeners.get(token)
+            if queue is not None:
+                queue.put_nowait(text)
+
+        # The binding survives navigations, so one registration per page is enough
+        await page.expose_binding(BINDING_NAME, on_emit)
+    return listeners
+
+
+class AnswerStream:
+    """Observes a page and yields answer text updates as they are rendered"""
+
+    def __init__(self, page: "Page", answer_selectors: List[str]):
+        self.page = page
+        self.answer_selectors = answer_selectors
+        self.token = uuid.uuid4().hex
+        self.text = ""
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._listeners: Optional[Dict[str, asyncio.Queue]] = None
+
+    async def start(self) -> None:
+        """Start observing; call before the question is submitted"""
+        self._listeners = await _ensure_binding(self.page)
+        self._listeners[self.token] = self._queue
+        await self.page.evaluate(_OBSERVER_SCRIPT, {
+            "answer": self.answer_selectors,
+            "binding": BINDING_NAME,
+            "token": self.token,
+            "throttleMs": THROTTLE_MS
+        })
+
+    async def stop(self) -> None:
+        """Stop observing the page"""
+        if self._listeners is not None:
+            self._listeners.pop(self.token, None)
+        try:
+            await self.page.evaluate(_DISCONNECT_SCRIPT, self.token)
+        except Exception as e:
+            # The page may have navigated or closed, which also ends the observer
+            logger.debug(f"Could not disconnect answer observer: {e}")
+
+    async def follow(self, task: "asyncio.Task") -> AsyncIterator[Dict[str, Any]]:
+        """Yield updates until the task finishes, then any that are still queued"""
+        update: Optional[asyncio.Task] = None
+        try:
+            while not task.done():
+                update = asyncio.create_task(self._queue.get())
+                await asyncio.wait({task, update}, return_when=asyncio.FIRST_COMPLETED)
+                if update.done():
+                    yield self._to_event(update.result())
+                else:
+                    update.cancel()
+            while not self._queue.empty():
+                yield self._to_event(self._queue.get_nowait())
+        finally:
+            if update is not None and not update.done():
+                update.cancel()
+
+    def _to_event(self, text: str) -> Dict[str, Any]:
+        """Convert the full answer text into a delta against what was sent"""
+        if text.startswith(self.text):
+            event = {"event": "delta", "text": text[len(self.text):]}
+        else:
+            # The site rewrote earlier text (e.g. markdown re-rendering)
+            event = {"event": "replace", "text": text}
+        self.text = text
+        return event
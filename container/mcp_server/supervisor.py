@@ -0,0 +1,194 @@
+"""
+Connection supervisor module
+Heartbeats the CDP connections to Chrome and reconnects lost ones with backoff
+"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, CDPSession
+
+logger = logging.getLogger("terminai-mcp-supervisor")
+
+# Seconds between heartbeats of a healthy connection
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+# Seconds a heartbeat may take before the connection counts as lost
+DEFAULT_HEARTBEAT_TIMEOUT = 5.0
+# Backoff between reconnect attempts, in seconds
+INITIAL_RECONNECT_DELAY = 0.5
+DEFAULT_MAX_RECONNECT_DELAY = 30.0
+
+
+class SupervisedLink:
+    """State of one supervised CDP endpoint"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.healthy = True
+        self.session: "Optional[CDPSession]" = None
+        self.retry_delay = INITIAL_RECONNECT_DELAY
+        # Monotonic time of the next reconnect attempt while unhealthy
+        self.next_retry = 0.0
+        self.reconnects = 0
+        self.failed_heartbeats = 0
+        self.last_heartbeat: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class ConnectionSupervisor:
+    """Keeps CDP connections alive for the lifetime of the process
+
+    The owner supplies three callbacks: ``browser_of(endpoint)`` returns the
+    current browser for an endpoint, ``reconnect(endpoint)`` attaches a new
+    one, and ``lost(endpoint)`` takes the endpoint out of service.
+    """
+
+    def __init__(self, interval: float = DEFAULT_HEARTBEAT_INTERVAL, timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+                 max_backoff: float = DEFAULT_MAX_RECONNECT_DELAY):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.links: Dict[str, SupervisedLink] = {}
+        self._browser_of: Optional[Callable[[str], "Optional[Browser]"]] = None
+        self._reconnect: Optional[Callable[[str], Awaitable[None]]] = None
+        self._lost: Optional[Callable[[str], None]] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ConnectionSupervisor":
+        config = config or {}
+        return cls(
+            interval=float(config.get('heartbeat_interval', DEFAULT_HEARTBEAT_INTERVAL)),
+            timeout=float(config.get('heartbeat_timeout', DEFAULT_HEARTBEAT_TIMEOUT)),
+            max_backoff=float(config.get('reconnect_max_backoff', DEFAULT_MAX_RECONNECT_DELAY))
+        )
+
+    def start(self, browser_of: Callable[[str], "Optional[Browser]"],
+              reconnect: Callable[[str], Awaitable[None]], lost: Callable[[str], None]) -> None:
+        """Start supervising the watched endpoints in the background"""
+        self._browser_of, self._reconnect, self._lost = browser_of, reconnect, lost
+        if self._task is None or self._task.done():
+            # The event belongs to the loop of the task that waits on it
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop supervising and forget every endpoint"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.links.clear()
+
+    def watch(self, endpoint: str) -> None:
+        self.links[endpoint] = SupervisedLink(endpoint)
+
+    def notify_lost(self, endpoint: str) -> None:
+        """Mark an endpoint lost, e.g. on a disconnected event, and reconnect at once"""
+        link = self.links.get(endpoint)
+        if link is None or not link.healthy:
+            return
+        self._mark_lost(link, "disconnected")
+        self._wake.set()
+
+    def _mark_lost(self, link: SupervisedLink, error: str) -> None:
+        link.healthy = False
+        link.session = None
+        link.last_error = error
+        link.retry_delay = INITIAL_RECONNECT_DELAY
+        link.next_retry = time.monotonic()
+        logger.warning(f"Lost connection to browser at {link.endpoint}: {error}")
+        if self._lost is not None:
+            self._lost(link.endpoint)
+
+    async def heartbeat(self, link: SupervisedLink) -> bool:
+        """Send Browser.getVersion over CDP and report whether Chrome answered"""
+        browser = self._browser_of(link.endpoint) if self._browser_of else None
+        if browser is None:
+            return False
+        try:
+            if link.session is None:
+                link.session = await asyncio.wait_for(browser.new_browser_cdp_session(), timeout=self.timeout)
+            await asyncio.wait_for(link.session.send("Browser.getVersion"), timeout=self.timeout)
+        except Exception as e:
+            link.session = None
+            link.last_error = str(e) or type(e).__name__
+            return False
+        link.last_heartbeat = time.time()
+        return True
+
+    async def check(self, endpoint: str) -> bool:
+        """Heartbeat one endpoint now, e.g. after a request failed, and handle a loss"""
+        link = self.links.get(endpoint)
+        if link is None or not link.healthy:
+            return False
+        if await self.heartbeat(link):
+            return True
+        self._mark_lost(link, link.last_error or "heartbeat failed")
+        self._wake.set()
+        return False
+
+    async def _try_reconnect(self, link: SupervisedLink) -> None:
+        try:
+            await self._reconnect(link.endpoint)
+        except Exception as e:
+            link.last_error = str(e) or type(e).__name__
+            link.next_retry = time.monotonic() + link.retry_delay
+            logger.info(f"Reconnecting to {link.endpoint} failed, retrying in {link.retry_delay:.1f} s: {e}")
+            link.retry_delay = min(link.retry_delay * 2, self.max_backoff)
+            return
+        link.healthy = True
+        link.failed_heartbeats = 0
+        link.reconnects += 1
+        link.last_error = None
+        logger.info(f"Reconnected to browser at {link.endpoint}")
+
+    async def _run(self) -> None:
+        next_heartbeat = time.monotonic() + self.interval
+        while True:
+            now = time.monotonic()
+            retries = [link.next_retry for link in self.links.values() if not link.healthy]
+            wake_at = min([next_heartbeat, *retries])
+            # asyncio.wait rather than wait_for, which can swallow a cancellation
+            # that arrives just as the event is set
+            waiter = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait([waiter], timeout=max(0.0, wake_at - now))
+            finally:
+                waiter.cancel()
+            self._wake.clear()
+
+            now = time.monotonic()
+            heartbeat_due = now >= next_heartbeat
+            if heartbeat_due:
+                next_heartbeat = now + self.interval
+            for link in list(self.links.values()):
+                if link.healthy:
+                    if heartbeat_due and not await self.heartbeat(link):
+                        link.failed_heartbeats += 1
+                        self._mark_lost(link, link.last_error or "heartbeat failed")
+                elif now >= link.next_retry:
+                    await self._try_reconnect(link)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state of each endpoint for status reporting"""
+        return {
+            "heartbeat_interval": self.interval,
+            "endpoints": [
+                {
+                    "endpoint": link.endpoint,
+                    "healthy": link.healthy,
+                    "reconnects": link.reconnects,
+                    "last_heartbeat": link.last_heartbeat,
+                    "last_error": link.last_error
+                }
+                for link in self.links.values()
+            ]
+        }
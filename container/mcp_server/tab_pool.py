@@ -0,0 +1,262 @@
+"""
+Tab pool module
+Keeps long-lived browser tabs keyed by AI service id
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .tracing import tracer
+
+logger = logging.getLogger("terminai-mcp-tab-pool")
+
+
+def _page_url(page: Any) -> Optional[str]:
+    """Address a page shows, or None for blank and unknown pages"""
+    url = getattr(page, "url", None)
+    if not isinstance(url, str) or not url or url == "about:blank":
+        return None
+    return url
+
+
+def _same_host(first: str, second: str) -> bool:
+    host = urlparse(first).hostname
+    return bool(host) and host == urlparse(second).hostname
+
+
+class PooledTab:
+    """A browser tab owned by the pool and assigned to one key"""
+
+    def __init__(self, page: Any = None, owned: bool = True):
+        self.page = page
+        self.key: Optional[str] = None
+        # Whether the pool opened this page and must close it on shutdown
+        self.owned = owned
+        # Whether the service page is loaded and can be reused without navigation
+        self.ready = False
+        # Page the resource blocking route was installed on
+        self.routed_page: Any = None
+        self.leases = 0
+        self.uses = 0
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class TabPool:
+    """Pool of browser tabs with a tab budget, LRU eviction and per-tab leases"""
+
+    def __init__(
+        self,
+        page_factory: Callable[[], Awaitable[Any]],
+        max_tabs: int = 4,
+        seed_pages: Optional[List[Any]] = None,
+    ):
+        self._page_factory = page_factory
+        self.max_tabs = max(1, max_tabs)
+        # Assigned tabs in LRU order, least recently used first
+        self._tabs: "OrderedDict[str, PooledTab]" = OrderedDict()
+        # Unassigned tabs, e.g. the page that was already open when we connected
+        self._idle: List[PooledTab] = []
+        self._changed = asyncio.Condition()
+        for page in seed_pages or []:
+            tab = PooledTab(page, owned=False)
+            self._watch_page(tab)
+            self._idle.append(tab)
+
+    def __len__(self) -> int:
+        return len(self._tabs) + len(self._idle)
+
+    def busy(self) -> int:
+        """Number of tabs currently leased"""
+        return sum(1 for tab in self._tabs.values() if tab.leases > 0)
+
+    def _watch_page(self, tab: PooledTab) -> None:
+        """Forget the page when the user closes the tab"""
+        page = tab.page
+
+        def on_close(*_):
+            # A reconnect may have given the tab a new page already
+            if tab.page is page:
+                tab.page = None
+                tab.ready = False
+
+        try:
+            page.on("close", on_close)
+        except Exception as e:
+            logger.debug(f"Could not watch tab for close events: {e}")
+
+    def _reserve(self, key: str) -> Optional[PooledTab]:
+        """Find or assign a tab for the key, or None when every tab is leased"""
+        tab = self._tabs.get(key)
+        if tab:
+            return tab
+
+        if self._idle:
+            tab = self._idle.pop()
+        elif len(self) < self.max_tabs:
+            tab = PooledTab()
+        else:
+            # Evict the least recently used tab that nobody is holding
+            victim_key = next((k for k, t in self._tabs.items() if t.leases == 0), None)
+            if victim_key is None:
+                return None
+            tab = self._tabs.pop(victim_key)
+            tab.ready = False
+            logger.info(f"Evicting tab for {victim_key} to make room for {key}")
+
+        tab.key = key
+        self._tabs[key] = tab
+        return tab
+
+    async def acquire(self, key: str) -> PooledTab:
+        """Lease the tab for the key, waiting if it is busy or the budget is exhausted"""
+        with tracer.span("tab_pool.acquire", {"tab.key": key}):
+            return await self._acquire(key)
+
+    async def _acquire(self, key: str) -> PooledTab:
+        async with self._changed:
+            tab = await self._changed.wait_for(lambda: self._reserve(key))
+            tab.leases += 1
+
+        await tab.lock.acquire()
+        try:
+            if tab.page is None:
+                tab.page = await self._page_factory()
+                tab.owned = True
+                tab.ready = False
+                self._watch_page(tab)
+                logger.info(f"Opened new tab for {key} ({len(self)}/{self.max_tabs})")
+        except Exception:
+            await self.release(tab, healthy=False)
+            raise
+
+        tab.uses += 1
+        tab.last_used = time.monotonic()
+        self._tabs.move_to_end(key)
+        return tab
+
+    async def release(self, tab: PooledTab, healthy: bool = True) -> None:
+        """Return a leased tab to the pool"""
+        if not healthy:
+            # Force a fresh navigation on the next lease
+            tab.ready = False
+        tab.lock.release()
+        async with self._changed:
+            tab.leases -= 1
+            if tab.page is None and tab.leases == 0 and self._tabs.get(tab.key) is tab:
+                # Tab could not be opened or was closed, free its slot
+                del self._tabs[tab.key]
+            self._changed.notify_all()
+
+    async def discard(self, key: str) -> bool:
+        """Give up the tab assigned to the key unless it is leased
+
+        Pages the pool opened are closed, others become idle tabs again.
+        """
+        async with self._changed:
+            tab = self._tabs.get(key)
+            if tab is None or tab.leases > 0:
+                return False
+            del self._tabs[key]
+            tab.key = None
+            tab.ready = False
+            page = None
+            if tab.owned or tab.page is None:
+                page, tab.page = tab.page, None
+            else:
+                self._idle.append(tab)
+            self._changed.notify_all()
+
+        if page is not None:
+            try:
+                await page.close()
+            except Exception as e:
+                logger.warning(f"Error closing tab {key}: {e}")
+        return True
+
+    def reattach(self, page_factory: Callable[[], Awaitable[Any]], seed_pages: Optional[List[Any]] = None,
+                 open_pages: Optional[List[Any]] = None) -> None:
+        """Point the pool at a new browser connection after a reconnect
+
+        Chrome keeps its tabs when only the connection was lost, so each tab
+        adopts the page of the new connection that shows the address its old
+        page showed, or else a page on the same host. Tabs keep their keys and
+        LRU order; the most recently used ones without such a page take over
+        the seed pages and the rest open a new page on their next lease.
+        """
+        self._page_factory = page_factory
+        tabs = list(reversed(self._tabs.values()))
+        old_urls = {tab: _page_url(tab.page) for tab in tabs}
+        candidates = [page for page in open_pages or [] if _page_url(page)]
+        adopted: Dict[PooledTab, Any] = {}
+        for matches in (str.__eq__, _same_host):
+            for tab in tabs:
+                if tab in adopted or old_urls[tab] is None:
+                    continue
+                page = next((page for page in candidates if matches(_page_url(page), old_urls[tab])), None)
+                if page is not None:
+                    candidates.remove(page)
+                    adopted[tab] = page
+        seeds = [page for page in seed_pages or [] if not any(page is taken for taken in adopted.values())]
+        for tab in tabs:
+            if tab in adopted:
+                # Whoever opened the page before still owns it
+                tab.page = adopted[tab]
+            else:
+                tab.page = seeds.pop(0) if seeds else None
+                tab.owned = tab.page is None
+            tab.ready = False
+            if tab.page is not None:
+                self._watch_page(tab)
+        self._idle = []
+        for page in seeds:
+            tab = PooledTab(page, owned=False)
+            self._watch_page(tab)
+            self._idle.append(tab)
+
+    @asynccontextmanager
+    async def lease(self, key: str) -> AsyncIterator[PooledTab]:
+        """Context manager that leases the tab for the key"""
+        tab = await self.acquire(key)
+        healthy = False
+        try:
+            yield tab
+            healthy = True
+        finally:
+            await self.release(tab, healthy=healthy)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool for status reporting"""
+        now = time.monotonic()
+        return {
+            "max_tabs": self.max_tabs,
+            "open_tabs": len(self),
+            "tabs": [
+                {
+                    "key": key,
+                    "ready": tab.ready,
+                    "leased": tab.leases > 0,
+                    "uses": tab.uses,
+                    "idle_seconds": round(now - tab.last_used, 1),
+                }
+                for key, tab in self._tabs.items()
+            ],
+        }
+
+    async def close(self) -> None:
+        """Close every tab the pool opened itself"""
+        tabs = list(self._tabs.values()) + self._idle
+        self._tabs.clear()
+        self._idle.clear()
+        for tab in tabs:
+            if tab.owned and tab.page is not None:
+                try:
+                    await tab.page.close()
+                except Exception as e:
+                    logger.warning(f"Error closing tab {tab.key}: {e}")
+            tab.page = None
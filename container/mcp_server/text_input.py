@@ -0,0 +1,77 @@
+"""
+Text input helpers
+Put long questions into chat inputs in one step and check that all of the text arrived
+"""
+
+import logging
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.async_api import ElementHandle, Page
+
+logger = logging.getLogger("terminai-mcp-text-input")
+
+# "fill" uses Playwright's fill, "insert_text" a single CDP Input.insertText,
+# "paste" a paste event carrying the text, as if it came from the clipboard
+INSERT_MODES = ("fill", "insert_text", "paste")
+
+# Questions shorter than this are always filled; the check costs a round trip
+BULK_INSERT_CHARS = 2000
+
+# Dispatch a paste event; editors that do not handle it get the text through
+# execCommand, which also keeps their undo history and input events intact
+_PASTE_SCRIPT = """(element, text) => {
+    element.focus();
+    const data = new DataTransfer();
+    data.setData('text/plain', text);
+    const event = new ClipboardEvent('paste', { clipboardData: data, bubbles: true, cancelable: true });
+    if (element.dispatchEvent(event)) document.execCommand('insertText', false, text);
+}"""
+
+# Characters in the input, ignoring whitespace that editors add or fold
+_LENGTH_SCRIPT = """(element) => {
+    const text = ('value' in element && typeof element.value === 'string') ? element.value : element.innerText;
+    return (text || '').replace(/\\s+/g, '').length;
+}"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def visible_length(text: str) -> int:
+    """Length of the text without whitespace, as _LENGTH_SCRIPT counts it"""
+    return len(_WHITESPACE.sub("", text))
+
+
+async def insert_text(page: "Page", element: "ElementHandle", text: str, mode: str = "insert_text") -> None:
+    """Replace the input's content with the text and check that all of it arrived
+
+    Falls back to fill once if the input holds less than the text, and raises
+    RuntimeError if it still does.
+    """
+    if mode not in INSERT_MODES:
+        raise ValueError(f"Unknown insert mode: {mode}")
+
+    if mode == "fill":
+        await element.fill(text)
+    else:
+        # Clear the input and give it the focus, which insert_text types into
+        await element.fill("")
+        await element.focus()
+        if mode == "insert_text":
+            await page.keyboard.insert_text(text)
+        else:
+            await element.evaluate(_PASTE_SCRIPT, text)
+
+    expected = visible_length(text)
+    received = await element.evaluate(_LENGTH_SCRIPT)
+    if received == expected:
+        return
+    if mode == "fill":
+        raise RuntimeError(f"Only {received} of {expected} characters of the question reached the input")
+
+    logger.warning(f"Input holds {received} of {expected} characters after {mode}, filling instead")
+    await element.fill(text)
+    received = await element.evaluate(_LENGTH_SCRIPT)
+    if received != expected:
+        raise RuntimeError(f"Only {received} of {expected} characters of the question reached the input")
@@ -0,0 +1,261 @@
+"""
+Tracing module
+Per-request correlation ids and timing spans, exported as OpenTelemetry (OTLP/JSON) lines
+"""
+
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .utils import load_config
+
+logger = logging.getLogger("terminai-mcp-tracing")
+
+# Header that carries the correlation id in requests and responses
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Name reported as service.name on every exported span
+SERVICE_NAME = "terminai-mcp"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Correlation id of the request being handled, inherited by tasks it creates
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+_current_span: "ContextVar[Optional[Span]]" = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_OK
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds the span took, or has taken so far"""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Return the span in the OTLP/JSON encoding"""
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"]["message"] = self.error
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+class Tracer:
+    """Creates spans and appends finished ones to a JSON lines file
+
+    Each line is an OTLP ExportTraceServiceRequest with one span, so the file
+    can be read by the OpenTelemetry collector's otlpjsonfile receiver.
+    Without a path spans are still created, but not written anywhere.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.expanduser(path) if path else None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "Tracer":
+        config = config or {}
+        return cls(path=config.get('path'))
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+             kind: int = SPAN_KIND_INTERNAL) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span"""
+        parent = _current_span.get()
+        request_id = correlation_id.get()
+        if parent is not None:
+            trace_id = parent.trace_id
+        elif request_id and _TRACE_ID.match(request_id):
+            trace_id = request_id
+        else:
+            trace_id = uuid.uuid4().hex
+        span = Span(name, trace_id, parent.span_id if parent else None, kind, attributes)
+        if request_id:
+            span.set_attribute("request.id", request_id)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = STATUS_ERROR
+            span.error = str(e) or type(e).__name__
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Closed in another context, e.g. by a generator finalized elsewhere
+                _current_span.set(parent)
+            self.export(span)
+
+    def export(self, span: Span) -> None:
+        """Append the finished span to the trace file"""
+        if not self.path:
+            return
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [span.to_otlp()]}]
+            }]
+        }, ensure_ascii=False)
+        try:
+            with self._lock:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+                self._file.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write span: {e}")
+
+    def wrap(self, target: Any) -> Any:
+        """Trace every Playwright call made through the target when spans are exported"""
+        return _TracedObject(self, target) if self.enabled and target is not None else target
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _TracedObject:
+    """Proxy that records a span for each awaited method of a page or element"""
+
+    def __init__(self, tracer: Tracer, target: Any):
+        self._tracer = tracer
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            with self._tracer.span(f"playwright.{name}", kind=SPAN_KIND_CLIENT):
+                result = await attribute(*args, **kwargs)
+            # Elements returned by the page are traced as well
+            if isinstance(result, list):
+                return [self._wrap_result(item) for item in result]
+            return self._wrap_result(result)
+
+        return traced
+
+    def _wrap_result(self, result: Any) -> Any:
+        if result is None or isinstance(result, (str, bytes, int, float, bool, dict, list)):
+            return result
+        return _TracedObject(self._tracer, result)
+
+    def __eq__(self, other: Any) -> bool:
+        return self._target == (other._target if isinstance(other, _TracedObject) else other)
+
+    def __hash__(self) -> int:
+        return hash(self._target)
+
+    def __bool__(self) -> bool:
+        return bool(self._target)
+
+
+class RequestTracingMiddleware:
+    """ASGI middleware that assigns each request a correlation id and a root span
+
+    The id is taken from the X-Request-ID header when the client sends one and
+    is echoed in the response, so a slow request can be found in the trace file.
+    """
+
+    def __init__(self, app: Any, tracer: Optional[Tracer] = None):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = REQUEST_ID_HEADER.lower().encode()
+        request_id = next(
+            (value.decode("latin-1") for key, value in scope.get("headers", []) if key.lower() == header), None
+        ) or uuid.uuid4().hex
+        token = correlation_id.set(request_id)
+        # Looked up per request so the process-wide tracer can be replaced
+        active = self.tracer or tracer
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers: List = list(message.get("headers", []))
+                headers.append((header, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+                span.set_attribute("http.status_code", message.get("status", 0))
+            await send(message)
+
+        try:
+            with active.span(
+                f"{scope.get('method', 'GET')} {scope.get('path', '')}",
+                {"http.method": scope.get("method", ""), "http.target": scope.get("path", "")},
+                kind=SPAN_KIND_SERVER
+            ) as span:
+                await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
+
+
+tracer = Tracer.from_config(load_config().get('tracing'))
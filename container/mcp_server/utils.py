@@ -2,75 +2,44 @@
 Utility functions for the MCP server
 """
 
-import logging
-import os
-import yaml
 from typing import Dict, List, Optional
 from .ai_service import AIService
+from .service_registry import service_registry
 
-logger = logging.getLogger("terminai-mcp-utils")
+def load_config() -> Dict:
+    """Load the container configuration file
+
+    The parsed file is cached until it changes; callers must not modify it.
+    """
+    return service_registry.config()
 
 def load_ai_urls() -> Dict[str, str]:
     """Load AI URLs from container configuration"""
-    ai_urls = {
-        "deepseek": "https://chat.deepseek.com",
-        "qwen": "https://qianwen.aliyun.com/chat", 
-        "doubao": "https://www.doubao.com/chat"
-    }
-    
-    # Load from container configuration file
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
-    if os.path.exists(config_path):
-        try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                if 'ai_services' in config:
-                    # Update ai_urls with configured services
-                    ai_urls = {}
-                    for service in config['ai_services']:
-                        if service.get('enabled', True):
-                            ai_urls[service['id']] = service['url']
-        except Exception as e:
-            logger.warning(f"Failed to load AI services configuration: {e}")
+    if not service_registry.has_services():
+        return {
+            "deepseek": "https://chat.deepseek.com",
+            "qwen": "https://qianwen.aliyun.com/chat", 
+            "doubao": "https://www.doubao.com/chat"
+        }
     
-    return ai_urls
+    return {service.id: service.url for service in service_registry.services()}
 
 def load_ai_services() -> List[AIService]:
     """Load AI services from container configuration"""
-    ai_services = []
-    
-    # Load from container configuration file
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
-    if os.path.exists(config_path):
-        try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                if 'ai_services' in config:
-                    # Create AIService objects for configured services
-                    for service_data in config['ai_services']:
-                        if service_data.get('enabled', True):
-                            ai_service = AIService(
-                                id=service_data['id'],
-                                name=service_data['name'],
-                                url=service_data['url'],
-                                category=service_data['category'],
-                                enabled=service_data.get('enabled', True),
-                                sequence=service_data.get('sequence', 0),
-                                icon=service_data.get('icon'),
-                                priority=service_data.get('priority'),
-                                authentication_required=service_data.get('authentication_required'),
-                                capabilities=service_data.get('capabilities')
-                            )
-                            ai_services.append(ai_service)
-        except Exception as e:
-            logger.warning(f"Failed to load AI services configuration: {e}")
-    
-    return ai_services
+    return list(service_registry.services())
 
 def get_ai_service_by_id(service_id: str) -> Optional[AIService]:
     """Get AI service by ID from container configuration"""
-    ai_services = load_ai_services()
-    for service in ai_services:
-        if service.id == service_id:
-            return service
-    return None
\ No newline at end of file
+    return service_registry.get(service_id)
+
+def load_warm_up_services(count: int) -> List[str]:
+    """Ids of the first ``count`` enabled AI services, the ones /init opens ahead of time
+
+    Services with a priority come first, lowest value first; the rest follow
+    in sequence order.
+    """
+    services = sorted(
+        service_registry.services(),
+        key=lambda service: (service.priority is None, service.priority or 0, service.sequence)
+    )
+    return [service.id for service in services[:max(0, count)]]
@@ -0,0 +1,151 @@
+"""
+Condition-based waiting helpers
+Detect when a chat page is ready for input and when an answer has finished
+"""
+
+import logging
+from typing import TYPE_CHECKING, List, Sequence
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+logger = logging.getLogger("terminai-mcp-waiting")
+
+# "Stop generating" controls that are visible while an answer is streaming
+DEFAULT_STOP_SELECTORS = [
+    "[data-testid='stop-button']",
+    "button[aria-label*='Stop']",
+    "button[aria-label*='stop']",
+    "button[aria-label*='停止']",
+    ".stop-generating",
+    ".stop-button"
+]
+
+# Controls that appear under an answer once it is complete
+DEFAULT_DONE_SELECTORS = [
+    "[data-testid='copy-turn-action-button']",
+    "button[aria-label*='Copy']",
+    "button[aria-label*='复制']",
+    "button[aria-label*='Regenerate']",
+    "button[aria-label*='重新生成']",
+    ".copy-button",
+    ".regenerate-button"
+]
+
+# How long the answer text must stay unchanged to count as finished
+DEFAULT_STABLE_MS = 1000
+
+# How often the in-page predicate is evaluated
+DEFAULT_POLL_MS = 200
+
+# Shared helpers for the snippets below. Selectors that the browser does not
+# understand (e.g. Playwright's :has-text) are skipped instead of throwing.
+_PAGE_HELPERS = """
+    const query = (selector) => {
+        try { return Array.from(document.querySelectorAll(selector)); } catch (e) { return []; }
+    };
+    const shown = (el) => el.getClientRects().length > 0;
+    const lastAnswer = (selectors) => {
+        for (const selector of selectors) {
+            const nodes = query(selector);
+            if (nodes.length) {
+                const node = nodes[nodes.length - 1];
+                const text = (node.innerText || node.textContent || '').trim();
+                if (text) return { text, count: nodes.length };
+            }
+        }
+        return { text: '', count: 0 };
+    };
+    const countShown = (selectors) => selectors.reduce((n, s) => n + query(s).filter(shown).length, 0);
+"""
+
+# Record what the page looks like before the question is submitted, so the
+# previous answer in a reused conversation is not mistaken for the new one.
+# The answer elements already on the page are kept for extraction to skip.
+_ARM_SCRIPT = """(args) => {
+    %s
+    const answer = lastAnswer(args.answer);
+    const seen = new WeakSet();
+    args.answer.forEach((selector) => query(selector).forEach((node) => seen.add(node)));
+    window.__terminaiAnswerWait = {
+        baselineText: answer.text,
+        baselineCount: answer.count,
+        baselineDone: countShown(args.done),
+        seen,
+        text: null,
+        changedAt: Date.now()
+    };
+}""" % _PAGE_HELPERS
+
+# Evaluated repeatedly inside the page until the new answer is complete
+_COMPLETE_PREDICATE = """(args) => {
+    %s
+    const now = Date.now();
+    const state = window.__terminaiAnswerWait || (window.__terminaiAnswerWait = {
+        baselineText: '', baselineCount: 0, baselineDone: 0, text: null, changedAt: now
+    });
+    const answer = lastAnswer(args.answer);
+    if (answer.text !== state.text) {
+        state.text = answer.text;
+        state.changedAt = now;
+    }
+    const fresh = answer.text && (answer.text !== state.baselineText || answer.count > state.baselineCount);
+    if (!fresh) return false;
+    if (args.stop.some((s) => query(s).some(shown))) return false;
+    if (countShown(args.done) > state.baselineDone) return true;
+    return now - state.changedAt >= args.stableMs;
+}""" % _PAGE_HELPERS
+
+
+async def wait_for_input_ready(page: "Page", selectors: Sequence[str], timeout_ms: int) -> bool:
+    """Wait until any of the input selectors is visible on the page"""
+    if not selectors:
+        return False
+    # Imported here so the server can start without loading Playwright
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    try:
+        await page.wait_for_selector(", ".join(selectors), state="visible", timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning(f"Input was not ready after {timeout_ms} ms")
+        return False
+
+
+async def prepare_answer_wait(
+    page: "Page",
+    answer_selectors: List[str],
+    done_selectors: List[str] = DEFAULT_DONE_SELECTORS
+) -> None:
+    """Snapshot the current answer area before the question is submitted"""
+    await page.evaluate(_ARM_SCRIPT, {"answer": answer_selectors, "done": done_selectors})
+
+
+async def wait_for_answer(
+    page: "Page",
+    answer_selectors: List[str],
+    timeout_ms: int,
+    stop_selectors: List[str] = DEFAULT_STOP_SELECTORS,
+    done_selectors: List[str] = DEFAULT_DONE_SELECTORS,
+    stable_ms: int = DEFAULT_STABLE_MS,
+    poll_ms: int = DEFAULT_POLL_MS
+) -> bool:
+    """Wait until a new answer is complete
+
+    The answer counts as complete when it is new, no stop button is visible,
+    and either a copy/regenerate control appeared or the text stopped changing.
+    Returns False if the timeout expired first; the caller extracts whatever
+    text is present at that point.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    args = {
+        "answer": answer_selectors,
+        "stop": stop_selectors,
+        "done": done_selectors,
+        "stableMs": stable_ms
+    }
+    try:
+        await page.wait_for_function(_COMPLETE_PREDICATE, arg=args, polling=poll_ms, timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning(f"Answer was not complete after {timeout_ms} ms, extracting partial answer")
+        return False
@@ -3,10 +3,13 @@ Pytest configuration and fixtures for TerminAI MCP Server tests
 """
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 
+from mcp_server.answer_cache import AnswerCache
+from mcp_server.latency import latency_tracker
 from mcp_server.main import app
+from mcp_server.selector_stats import SelectorStats
 from mcp_server.browser import BrowserManager
 
 
@@ -34,13 +37,32 @@ def test_client():
     # Set the browser manager in the app state
     app.state.browser_manager = mock_browser_manager
     
-    with TestClient(app) as client:
+    # Answers cached by one test must not leak into the next
+    with patch('mcp_server.main.answer_cache', AnswerCache()), TestClient(app) as client:
         yield client
     
     # Cleanup
     app.state.browser_manager = None
 
 
+@pytest.fixture(autouse=True)
+def reset_latency_tracker():
+    """Stage timings of mocked questions must not shorten the deadlines of later tests"""
+    latency_tracker.reset()
+    yield
+    latency_tracker.reset()
+
+
+@pytest.fixture(autouse=True)
+def isolate_selector_stats():
+    """Selectors matched on mocked pages must not be written to the statistics in the home directory"""
+    stats = SelectorStats(path=None)
+    with patch('mcp_server.selector_stats.selector_stats', stats), \
+         patch('mcp_server.spec_handler.selector_stats', stats), \
+         patch('mcp_server.main.selector_stats', stats):
+        yield stats
+
+
 @pytest.fixture
 def event_loop():
     """Create an instance of the default event loop for each test case"""
@@ -21,7 +21,7 @@ async def demo_complete_terminai_functionality():
     logging.basicConfig(level=logging.INFO)
     
     # Use context manager for automatic resource management
-    with ChromeManager() as chrome_manager:
+    async with ChromeManager() as chrome_manager:
         print("\n1. Chrome started automatically by TerminAI extension")
         
         manager = BrowserManager()
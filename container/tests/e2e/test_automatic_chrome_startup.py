@@ -20,25 +20,25 @@ class TestAutomaticChromeStartupE2E:
         
         try:
             # Check if Chrome is already running
-            was_running = chrome_manager.is_chrome_running()
+            was_running = await chrome_manager.is_chrome_running()
             print(f"Chrome was {'already' if was_running else 'not'} running")
             
             # Start Chrome automatically
-            success = chrome_manager.start_chrome()
+            success = await chrome_manager.start_chrome()
             assert success, "Failed to start Chrome"
             print("✓ Chrome started automatically")
             
             # Verify Chrome is running
-            assert chrome_manager.is_chrome_running(), "Chrome is not running after start"
+            assert await chrome_manager.is_chrome_running(), "Chrome is not running after start"
             print("✓ Chrome is confirmed running on debug port")
             
             # Stop Chrome
-            chrome_manager.stop_chrome()
+            await chrome_manager.stop_chrome()
             print("✓ Chrome stopped successfully")
             
         except Exception as e:
             # Clean up on failure
-            chrome_manager.stop_chrome()
+            await chrome_manager.stop_chrome()
             pytest.fail(f"Chrome manager standalone test failed: {e}")
     
     @pytest.mark.e2e
@@ -88,11 +88,11 @@ class TestAutomaticChromeStartupE2E:
         print("\n=== Chrome Manager Context Manager Test ===")
         
         try:
-            with ChromeManager() as chrome_manager:
+            async with ChromeManager() as chrome_manager:
                 print("✓ Chrome started via context manager")
                 
                 # Verify Chrome is running
-                assert chrome_manager.is_chrome_running(), "Chrome is not running"
+                assert await chrome_manager.is_chrome_running(), "Chrome is not running"
                 print("✓ Chrome is confirmed running")
                 
                 # Simulate some work
@@ -26,7 +26,7 @@ class TestContainerChromeManagementE2E:
                 print("✓ Detected container environment")
                 
                 # Try to start Chrome (should provide instructions)
-                success = chrome_manager.start_chrome()
+                success = await chrome_manager.start_chrome()
                 assert success is False  # Should fail since Chrome isn't running
                 print("✓ Correctly handled case where Chrome is not running in container")
     
@@ -46,7 +46,7 @@ class TestContainerChromeManagementE2E:
                 print("✓ Detected container environment")
                 
                 # Try to start Chrome (should succeed since it's already running)
-                success = chrome_manager.start_chrome()
+                success = await chrome_manager.start_chrome()
                 assert success is True  # Should succeed since Chrome is already running
                 print("✓ Successfully detected running Chrome in container environment")
     
@@ -64,5 +64,5 @@ class TestContainerChromeManagementE2E:
         print(f"✓ Container detection result: {is_container} (will vary based on actual environment)")
         
         # Test Chrome running detection
-        is_running = chrome_manager.is_chrome_running()
+        is_running = await chrome_manager.is_chrome_running()
         print(f"✓ Chrome running detection: {is_running}")
\ No newline at end of file
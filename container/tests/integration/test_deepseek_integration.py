@@ -2,6 +2,7 @@
 Integration tests for DeepSeek AI service
 """
 import pytest
+from dataclasses import replace
 from unittest.mock import AsyncMock, patch
 from mcp_server.handlers.deepseek_handler import DeepSeekHandler
 from mcp_server.ai_handler_base import AIHandler
@@ -50,14 +51,16 @@ class TestDeepSeekIntegration:
         
         # Mock the service URL
         if handler.service:
-            original_url = handler.service.url
-            handler.service.url = "https://chat.deepseek.com"
+            # Configured services are shared and frozen, so replace rather than modify
+            handler.service = replace(handler.service, url="https://chat.deepseek.com")
         
         await handler.navigate_to_service()
         
         # Verify navigation
         mock_page.goto.assert_called_once_with("https://chat.deepseek.com")
-        mock_page.wait_for_timeout.assert_called_once_with(3000)
+        # Navigation waits for the chat input instead of sleeping
+        mock_page.wait_for_selector.assert_called_once()
+        mock_page.wait_for_timeout.assert_not_called()
     
     @pytest.mark.integration
     @pytest.mark.asyncio
@@ -83,6 +86,8 @@ class TestDeepSeekIntegration:
             return None
         
         mock_page.query_selector.side_effect = selector_side_effect
+        # Answers are extracted in one in-page call
+        mock_page.evaluate.return_value = {"selector": ".answer-content", "text": "Test response"}
         
         # Call the method
         result = await handler.ask_question("Test question")
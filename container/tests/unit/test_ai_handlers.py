@@ -56,4 +56,125 @@ class TestAIHandlers:
             handler = create_ai_handler(ai, mock_page)
             assert handler is not None, f"Handler for {ai} should not be None"
             assert hasattr(handler, 'page'), f"Handler for {ai} should have page attribute"
-            assert handler.page is not None, f"Page attribute for {ai} should not be None"
\ No newline at end of file
+            assert handler.page is not None, f"Page attribute for {ai} should not be None"
+
+class TestPageStateNavigation:
+    """Test cases for navigation that is aware of the page state"""
+    
+    def make_handler(self, page_url, visible=True):
+        """Create a DeepSeek handler on a page at the given URL"""
+        mock_page = AsyncMock()
+        mock_page.url = page_url
+        mock_page.is_visible.return_value = visible
+        return create_ai_handler("deepseek", mock_page)
+    
+    @pytest.mark.asyncio
+    async def test_skips_goto_when_already_on_service(self):
+        """Test that a page already on the service with a ready input is reused"""
+        handler = self.make_handler("https://chat.deepseek.com/a/chat/s/123")
+        
+        navigated = await handler.open_service()
+        
+        assert navigated is False
+        handler.page.goto.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_navigates_from_other_site(self):
+        """Test that a page on another site is navigated to the service"""
+        handler = self.make_handler("https://chatgpt.com/")
+        
+        navigated = await handler.open_service()
+        
+        assert navigated is True
+        handler.page.goto.assert_called_once_with(handler.service.url)
+    
+    @pytest.mark.asyncio
+    async def test_navigates_when_input_missing(self):
+        """Test that a matching page without a chat input is reloaded"""
+        handler = self.make_handler("https://chat.deepseek.com/sign_in", visible=False)
+        
+        assert await handler.open_service() is True
+    
+    def test_www_prefix_is_ignored(self):
+        """Test that www and bare hosts are treated as the same site"""
+        mock_page = AsyncMock()
+        mock_page.url = "https://doubao.com/chat/"
+        handler = create_ai_handler("doubao", mock_page)
+        
+        assert handler.is_on_service() is True
+    
+    def test_parent_domain_is_another_site(self):
+        """Test that the parent domain of a service's host is not taken for the service"""
+        mock_page = AsyncMock()
+        mock_page.url = "https://google.com/"
+        handler = create_ai_handler("gemini", mock_page)
+        
+        assert handler.service.url.startswith("https://gemini.google.com")
+        assert handler.is_on_service() is False
+    
+    @pytest.mark.asyncio
+    async def test_new_chat_uses_in_app_action(self):
+        """Test that a new chat clicks the site's button instead of reloading"""
+        handler = self.make_handler("https://chat.deepseek.com/a/chat/s/123")
+        new_chat_button = AsyncMock()
+        new_chat_button.is_visible.return_value = True
+        handler.page.query_selector.return_value = new_chat_button
+        
+        await handler.open_service(new_chat=True)
+        
+        new_chat_button.click.assert_called_once()
+        handler.page.goto.assert_not_called()
+
+
+class TestAskQuestionTemplate:
+    """Test cases for the hooks of AIHandler.ask_question"""
+    
+    class PasteHandler(AIHandler):
+        """Handler that overrides the fill and extract hooks"""
+        input_selectors = ["textarea"]
+        answer_selectors = [".answer"]
+        
+        def __init__(self, page):
+            super().__init__(page)
+            self.calls = []
+        
+        async def navigate_to_service(self):
+            pass
+        
+        async def fill_input(self, input_element, question):
+            self.calls.append(("fill", question))
+        
+        async def extract_response(self):
+            self.calls.append(("extract",))
+            return "pasted answer"
+        
+        async def wait_for_answer(self):
+            self.calls.append(("wait",))
+            return True
+    
+    @pytest.mark.asyncio
+    async def test_hooks_run_in_order(self):
+        """Test that the template calls overridden hooks between the default ones"""
+        mock_page = AsyncMock()
+        mock_input = AsyncMock()
+        mock_page.query_selector_all.return_value = [mock_input]
+        mock_page.query_selector.return_value = None
+        handler = self.PasteHandler(mock_page)
+        
+        answer = await handler.ask_question("Hello")
+        
+        assert answer == "pasted answer"
+        assert handler.calls == [("fill", "Hello"), ("wait",), ("extract",)]
+        # Default submit hook: no send button, so Enter is pressed
+        mock_input.press.assert_called_once_with("Enter")
+    
+    @pytest.mark.asyncio
+    async def test_missing_input_raises(self):
+        """Test that the template stops when the locate hook finds no input"""
+        mock_page = AsyncMock()
+        mock_page.query_selector_all.return_value = []
+        handler = self.PasteHandler(mock_page)
+        
+        with pytest.raises(RuntimeError, match="Could not find input element for PasteHandler"):
+            await handler.ask_question("Hello")
+        assert handler.calls == []
@@ -0,0 +1,95 @@
+"""
+Unit tests for the answer cache
+"""
+import pytest
+from unittest.mock import patch
+
+from mcp_server.answer_cache import AnswerCache, normalize_question
+
+
+class TestAnswerCache:
+    """Test cases for AnswerCache"""
+
+    def test_normalize_question(self):
+        """Test that case and whitespace differences are ignored"""
+        assert normalize_question("  How do I\n  revert a   COMMIT? ") == "how do i revert a commit?"
+
+    @pytest.mark.asyncio
+    async def test_hit_after_put(self):
+        """Test that a stored answer is returned for the same service and question"""
+        cache = AnswerCache()
+
+        assert await cache.get("deepseek", "How do I revert a commit?") is None
+        await cache.put("deepseek", "How do I revert a commit?", "git revert")
+
+        assert await cache.get("DeepSeek", "how do i  revert a commit?") == "git revert"
+        assert await cache.get("kimi", "How do I revert a commit?") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["memory_hits"]) == (1, 2, 1)
+        assert stats["hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_after_ttl(self):
+        """Test that answers older than the TTL are misses"""
+        cache = AnswerCache(ttl=10)
+        with patch('mcp_server.answer_cache.time.time', return_value=1000.0):
+            await cache.put("deepseek", "q", "a")
+        with patch('mcp_server.answer_cache.time.time', return_value=1009.0):
+            assert await cache.get("deepseek", "q") == "a"
+        with patch('mcp_server.answer_cache.time.time', return_value=1011.0):
+            assert await cache.get("deepseek", "q") is None
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entry_is_dropped(self):
+        """Test that the memory tier keeps at most max_entries answers"""
+        cache = AnswerCache(max_entries=2)
+        await cache.put("deepseek", "one", "1")
+        await cache.put("deepseek", "two", "2")
+        # Touch "one" so "two" becomes the least recently used
+        await cache.get("deepseek", "one")
+        await cache.put("deepseek", "three", "3")
+
+        assert await cache.get("deepseek", "one") == "1"
+        assert await cache.get("deepseek", "two") is None
+        assert await cache.get("deepseek", "three") == "3"
+
+    @pytest.mark.asyncio
+    async def test_empty_answers_and_disabled_cache(self):
+        """Test that empty answers are not stored and a disabled cache never hits"""
+        cache = AnswerCache()
+        await cache.put("deepseek", "q", "")
+        assert await cache.get("deepseek", "q") is None
+
+        disabled = AnswerCache(enabled=False)
+        await disabled.put("deepseek", "q", "a")
+        assert await disabled.get("deepseek", "q") is None
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_is_shared(self, tmp_path):
+        """Test that a second cache on the same SQLite file sees stored answers"""
+        path = str(tmp_path / "cache" / "answers.sqlite3")
+        writer = AnswerCache(path=path)
+        await writer.put("deepseek", "How do I revert a commit?", "git revert")
+
+        reader = AnswerCache(path=path)
+        assert await reader.get("deepseek", "how do I revert a commit?") == "git revert"
+        assert reader.stats()["disk_hits"] == 1
+        # Promoted to memory, so the next lookup does not touch the disk
+        assert await reader.get("deepseek", "how do I revert a commit?") == "git revert"
+        assert reader.stats()["memory_hits"] == 1
+
+        await writer.clear()
+        assert await AnswerCache(path=path).get("deepseek", "How do I revert a commit?") is None
+        writer.close()
+        reader.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_disk_entry_is_a_miss(self, tmp_path):
+        """Test that the TTL applies to answers read from disk"""
+        path = str(tmp_path / "answers.sqlite3")
+        with patch('mcp_server.answer_cache.time.time', return_value=1000.0):
+            await AnswerCache(ttl=10, path=path).put("deepseek", "q", "a")
+
+        with patch('mcp_server.answer_cache.time.time', return_value=1020.0):
+            assert await AnswerCache(ttl=10, path=path).get("deepseek", "q") is None
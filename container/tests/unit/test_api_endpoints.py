@@ -1,12 +1,19 @@
 """
 Unit tests for FastAPI endpoints
 """
+import asyncio
+import json
+import time
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
+from mcp_server.ai_handler_base import PartialAnswer
 from mcp_server.main import app
 from mcp_server.browser import BrowserManager
+from mcp_server.jobs import JobManager
+from mcp_server.metrics import Metrics
+from mcp_server.scheduler import RequestScheduler, SchedulerRejected
 
 
 class TestAPIEndpoints:
@@ -74,6 +81,24 @@ class TestAPIEndpoints:
             assert "detail" in data
             assert "Connection failed" in data["detail"]
     
+    def test_init_warms_up_services(self, test_client):
+        """Test that /init opens the requested services and reports their readiness"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.warm_up.return_value = {"deepseek": {"ready": True, "seconds": 1.2}}
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/init", json={"warm_up": ["deepseek"]})
+            assert response.status_code == 200
+            assert response.json()["warm_up"] == {"deepseek": {"ready": True, "seconds": 1.2}}
+            mock_browser_manager.warm_up.assert_called_once_with(["deepseek"])
+            
+            response = test_client.post("/init", json={"warm_up": 0})
+            assert "warm_up" not in response.json()
+            mock_browser_manager.warm_up.assert_called_once()
+            
+            response = test_client.post("/init", json={"warm_up": "all"})
+            assert response.status_code == 400
+    
     def test_ask_question_success(self, test_client):
         """Test successful question asking"""
         mock_browser_manager = AsyncMock()
@@ -87,7 +112,172 @@ class TestAPIEndpoints:
             data = response.json()
             assert data["success"] is True
             assert data["answer"] == "Mocked AI response"
-            mock_browser_manager.ask_ai.assert_called_once_with("deepseek", "Hello")
+            mock_browser_manager.ask_ai.assert_called_once_with("deepseek", "Hello", new_chat=False, conversation_id=None)
+    
+    def test_ask_question_served_from_cache(self, test_client):
+        """Test that a repeated question is answered from the cache unless bypassed"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.ask_ai.return_value = "Mocked AI response"
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            first = test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true").json()
+            second = test_client.post("/ask?ai=deepseek&question=%20hello%20&new_chat=true").json()
+            bypassed = test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true&no_cache=true").json()
+            stats = test_client.get("/cache").json()
+        
+        assert first["cached"] is False
+        assert second == {"success": True, "answer": "Mocked AI response", "cached": True}
+        assert bypassed["cached"] is False
+        assert mock_browser_manager.ask_ai.call_count == 2
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_only_complete_context_free_answers_are_cached(self, test_client):
+        """Test that answers continuing a thread and partial answers are not cached"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.ask_ai.side_effect = [
+            "Follow-up answer", PartialAnswer("Half an ans"), "Full answer", "Full answer"
+        ]
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            test_client.post("/ask?ai=deepseek&question=Hello")
+            partial = test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true").json()
+            complete = test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true").json()
+            cached = test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true").json()
+            plain = test_client.post("/ask?ai=deepseek&question=Hello").json()
+        
+        assert partial == {"success": True, "answer": "Half an ans", "cached": False}
+        assert complete["cached"] is False
+        assert cached == {"success": True, "answer": "Full answer", "cached": True}
+        assert plain == {"success": True, "answer": "Full answer", "cached": False}
+        assert mock_browser_manager.ask_ai.call_count == 4
+    
+    def test_ask_question_with_json_body(self, test_client):
+        """Test that the question can be sent in a JSON body instead of the URL"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        mock_browser_manager.ask_ai.return_value = "Mocked AI response"
+        question = "Why does this fail?\n" + "at line 1\n" * 5000
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/ask", json={"ai": "deepseek", "question": question, "new_chat": True})
+            missing = test_client.post("/ask", json={"ai": "deepseek"})
+            not_an_object = test_client.post("/ask?ai=deepseek", json=["Hello"])
+        
+        assert response.status_code == 200
+        mock_browser_manager.ask_ai.assert_called_once_with("deepseek", question, new_chat=True, conversation_id=None)
+        assert missing.status_code == 400
+        assert not_an_object.status_code == 422
+    
+    def test_json_body_is_typed_like_the_query(self, test_client):
+        """Test that body values are parsed like query parameters and bad types get a 422"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        mock_browser_manager.ask_ai.return_value = "Mocked AI response"
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post(
+                "/ask?new_chat=true", json={"ai": "deepseek", "question": "Hello", "new_chat": "false"}
+            )
+            bad_flag = test_client.post("/ask", json={"ai": "deepseek", "question": "Hello", "no_cache": "maybe"})
+            bad_priority = test_client.post("/ask", json={"ai": "deepseek", "question": "Hello", "priority": 1})
+            bad_id = test_client.post("/ask", json={"ai": "deepseek", "question": "Hello", "conversation_id": 42})
+            bad_job = test_client.post("/jobs", json={"ai": "deepseek", "question": ["Hello"]})
+        
+        assert response.status_code == 200
+        mock_browser_manager.ask_ai.assert_called_once_with("deepseek", "Hello", new_chat=False, conversation_id=None)
+        assert bad_flag.status_code == 422
+        assert bad_priority.status_code == 422
+        assert bad_id.status_code == 422
+        assert bad_job.status_code == 422
+    
+    def test_ask_question_in_conversation(self, test_client):
+        """Test that conversation turns are passed on and never served from the cache"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        mock_browser_manager.ask_ai.return_value = "Mocked AI response"
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            test_client.post("/ask?ai=deepseek&question=Continue")
+            data = test_client.post("/ask?ai=deepseek&question=Continue&conversation_id=debug-1").json()
+            invalid = test_client.post("/ask?ai=deepseek&question=Continue&conversation_id=a%23b")
+        
+        assert data == {"success": True, "answer": "Mocked AI response", "cached": False, "conversation_id": "debug-1"}
+        mock_browser_manager.ask_ai.assert_called_with("deepseek", "Continue", new_chat=False, conversation_id="debug-1")
+        assert invalid.status_code == 400
+    
+    def test_jobs(self, test_client):
+        """Test that a job returns at once, shows partial text, can be cancelled and finishes"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        
+        async def events(ai, question, new_chat=False, conversation_id=None):
+            yield {"event": "start", "ai": ai}
+            yield {"event": "delta", "text": "Partial"}
+            if question == "slow":
+                await asyncio.sleep(10)
+            yield {"event": "done", "answer": "Partial answer", "elapsed": 0.1}
+        mock_browser_manager.ask_ai_stream = events
+        
+        def poll(job_id, condition):
+            for _ in range(100):
+                job = test_client.get(f"/jobs/{job_id}").json()
+                if condition(job):
+                    return job
+                time.sleep(0.01)
+            raise AssertionError(f"job did not reach the expected state: {job}")
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager), \
+             patch('mcp_server.main.jobs', JobManager()), \
+             patch('mcp_server.main.scheduler', RequestScheduler()):
+            created = test_client.post("/jobs", json={"ai": "deepseek", "question": "slow"})
+            assert created.status_code == 202
+            job_id = created.json()["job_id"]
+            running = poll(job_id, lambda job: job["text"] == "Partial")
+            assert running["status"] == "running"
+            
+            cancelled = test_client.delete(f"/jobs/{job_id}").json()
+            assert cancelled["status"] == "cancelled"
+            
+            job_id = test_client.post("/jobs", json={"ai": "deepseek", "question": "fast"}).json()["job_id"]
+            done = poll(job_id, lambda job: job["status"] == "done")
+            assert done["answer"] == "Partial answer"
+            
+            assert test_client.get("/jobs/unknown").status_code == 404
+            assert test_client.post("/jobs", json={"ai": "deepseek"}).status_code == 400
+    
+    def test_metrics(self, test_client):
+        """Test that /metrics exports errors, cache and queue metrics as Prometheus text"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        mock_browser_manager.ask_ai.side_effect = RuntimeError("Target closed")
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager), \
+             patch('mcp_server.main.metrics', Metrics()):
+            test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true")
+            response = test_client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'terminai_errors_total{service="deepseek",cause="browser"} 1' in response.text
+        assert 'terminai_in_flight{service="deepseek"} 0' in response.text
+        assert "terminai_cache_misses_total 1" in response.text
+    
+    def test_clear_cache(self, test_client):
+        """Test that clearing the cache makes the next question ask the AI again"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.ask_ai.return_value = "Mocked AI response"
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true")
+            assert test_client.delete("/cache").json() == {"success": True}
+            response = test_client.post("/ask?ai=deepseek&question=Hello&new_chat=true").json()
+        
+        assert response["cached"] is False
+        assert mock_browser_manager.ask_ai.call_count == 2
     
     def test_ask_question_browser_not_connected(self, test_client):
         """Test asking question when browser is not connected"""
@@ -183,4 +373,106 @@ class TestAPIEndpoints:
         # Test CORS headers on GET request with Origin header
         response = test_client.get("/", headers={"Origin": "http://localhost:3000"})
         assert "access-control-allow-origin" in response.headers
-        assert response.headers["access-control-allow-origin"] == "*"
\ No newline at end of file
+        assert response.headers["access-control-allow-origin"] == "*"
+    
+    def test_ask_broadcast_by_category(self, test_client):
+        """Test broadcasting a question to every service in a category"""
+        async def results():
+            yield {"ai": "kimi", "success": True, "answer": "Kimi answer", "elapsed": 1.0}
+            yield {"ai": "deepseek", "success": True, "answer": "DeepSeek answer", "elapsed": 2.0}
+        
+        mock_browser_manager = MagicMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.broadcast.return_value = results()
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/ask/broadcast", json={"question": "Hello", "category": "domestic"})
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["success"] is True
+            assert [r["ai"] for r in data["results"]] == ["kimi", "deepseek"]
+            ais, question = mock_browser_manager.broadcast.call_args.args
+            assert "deepseek" in ais and "qwen" in ais
+            assert "chatgpt" not in ais
+            assert question == "Hello"
+    
+    def test_ask_broadcast_stream(self, test_client):
+        """Test streaming broadcast results as NDJSON"""
+        async def results():
+            yield {"ai": "qwen", "success": False, "error": "timeout", "elapsed": 5.0}
+        
+        mock_browser_manager = MagicMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.broadcast.return_value = results()
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/ask/broadcast", json={"question": "Hello", "ais": ["qwen"], "stream": True})
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert lines == [{"ai": "qwen", "success": False, "error": "timeout", "elapsed": 5.0}]
+    
+    def test_ask_broadcast_requires_services(self, test_client):
+        """Test broadcasting without any selected service"""
+        mock_browser_manager = MagicMock()
+        mock_browser_manager.is_connected.return_value = True
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/ask/broadcast", json={"question": "Hello"})
+            
+            assert response.status_code == 400
+            assert "No AI services selected" in response.json()["detail"]
+    
+    def test_ask_question_stream(self, test_client):
+        """Test streaming an answer as Server-Sent Events"""
+        async def events(ai, question, new_chat=False, conversation_id=None):
+            yield {"event": "start", "ai": ai}
+            yield {"event": "first_token", "elapsed": 0.5}
+            yield {"event": "delta", "text": "Hi"}
+            yield {"event": "done", "answer": "Hi", "elapsed": 1.0}
+        
+        mock_browser_manager = MagicMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.ask_ai_stream.side_effect = events
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/ask/stream?ai=deepseek&question=Hello")
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            blocks = [b for b in response.text.split("\n\n") if b]
+            names = [b.splitlines()[0] for b in blocks]
+            assert names == ["event: start", "event: first_token", "event: delta", "event: done"]
+            assert json.loads(blocks[-1].splitlines()[1][len("data: "):]) == {"answer": "Hi", "elapsed": 1.0}
+    
+    def test_ask_question_stream_error_event(self, test_client):
+        """Test that failures during streaming are sent as an error event"""
+        async def events(ai, question, new_chat=False, conversation_id=None):
+            yield {"event": "start", "ai": ai}
+            raise RuntimeError("Could not find input element")
+        
+        mock_browser_manager = MagicMock()
+        mock_browser_manager.is_connected.return_value = True
+        mock_browser_manager.ask_ai_stream.side_effect = events
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager):
+            response = test_client.post("/ask/stream?ai=deepseek&question=Hello")
+            
+            assert "event: error" in response.text
+            assert "Could not find input element" in response.text
+    
+    def test_ask_question_rejected_by_scheduler(self, test_client):
+        """Test that a full queue returns 429 with Retry-After"""
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        
+        with patch('mcp_server.main.browser_manager', mock_browser_manager), \
+             patch('mcp_server.main.scheduler.acquire', side_effect=SchedulerRejected("Queue is full", 429, 12.5)):
+            response = test_client.post("/ask?ai=deepseek&question=Hello")
+            
+            assert response.status_code == 429
+            assert response.headers["retry-after"] == "13"
+            assert "Queue is full" in response.json()["detail"]
+            mock_browser_manager.ask_ai.assert_not_called()
@@ -0,0 +1,117 @@
+"""
+Unit tests for the fake-site benchmark suite
+"""
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.fake_sites import FakeSiteServer, SiteSettings, parse_selector, render_page
+from benchmarks.harness import Result, Sample, benchmark_config, check_answer, percentile
+
+
+def page_config(html):
+    """Return the CONFIG object embedded in a fake page"""
+    start = html.index("const CONFIG = ") + len("const CONFIG = ")
+    return json.loads(html[start:html.index(";\n", start)])
+
+
+class TestFakeSites:
+    """Test cases for the fake chat pages"""
+
+    def test_parse_selector(self):
+        """Test that simple selectors become element chains and others are rejected"""
+        assert parse_selector("textarea[placeholder*='Ask anything']") == [
+            {"tag": "textarea", "attrs": {"placeholder": "Ask anything"}}
+        ]
+        assert parse_selector(".message:last-child .markdown") == [
+            {"tag": "div", "attrs": {"class": "message"}}, {"tag": "div", "attrs": {"class": "markdown"}}
+        ]
+        assert parse_selector("#chat-input", default_tag="textarea") == [
+            {"tag": "textarea", "attrs": {"id": "chat-input"}}
+        ]
+        assert parse_selector(".markdown ol li, .markdown ul li")[-1]["tag"] == "li"
+        assert parse_selector("button:has-text('Send')") is None
+
+    def test_page_follows_handler_spec(self):
+        """Test that a page uses the spec's input, send button and answer selectors"""
+        config = page_config(render_page("deepseek", SiteSettings(rate=10, seed=7)))
+
+        assert config["rate"] == 10
+        assert config["seed"] == 7
+        assert config["input"] == parse_selector("textarea", "textarea")
+        assert config["answer"] and config["stop"] and config["done"]
+
+    def test_settings_from_query(self):
+        """Test that URL parameters override the server defaults"""
+        settings = SiteSettings.from_query("rate=5&failure_rate=0.5&failure_mode=drop", SiteSettings(tokens=10))
+
+        assert (settings.rate, settings.tokens, settings.failure_rate, settings.failure_mode) == (5.0, 10, 0.5, "drop")
+        with pytest.raises(ValueError):
+            SiteSettings.from_query("failure_mode=explode")
+
+    def test_server_serves_pages(self):
+        """Test that the server answers known services and rejects unknown ones"""
+        server = FakeSiteServer(settings=SiteSettings(tokens=5)).start()
+        try:
+            with urllib.request.urlopen(server.url_for("kimi", SiteSettings(rate=80))) as response:
+                config = page_config(response.read().decode("utf-8"))
+            assert (config["rate"], config["tokens"]) == (80, 60)
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(server.url_for("no-such-ai"))
+            assert error.value.code == 404
+        finally:
+            server.stop()
+
+
+class TestHarness:
+    """Test cases for the benchmark harness"""
+
+    def test_percentile(self):
+        """Test interpolated percentiles"""
+        values = [float(value) for value in range(1, 101)]
+        assert percentile(values, 50) == 50.5
+        assert percentile(values, 99) == pytest.approx(99.01)
+        assert percentile([3.0], 95) == 3.0
+        assert percentile([], 50) is None
+
+    def test_summary(self):
+        """Test that failed samples count as errors and not in the latencies"""
+        result = Result("deepseek", "stream", wall_seconds=2.0, samples=[
+            Sample(1.0, True, first_token=0.2), Sample(3.0, True, first_token=0.4),
+            Sample(15.0, False, error="incomplete_answer")
+        ])
+
+        summary = result.summary()
+        assert (summary["requests"], summary["ok"], summary["p50"]) == (3, 2, 2.0)
+        assert summary["first_token_p50"] == pytest.approx(0.3)
+        assert summary["errors"] == {"incomplete_answer": 1}
+        assert summary["throughput"] == 1.0
+
+    def test_check_answer(self):
+        """Test that truncated and unrelated answers are detected"""
+        assert check_answer("Reply to q-1: lorem ipsum [done]", "q-1") is None
+        assert check_answer("Reply to q-1: lorem", "q-1") == "incomplete_answer"
+        assert check_answer("Reply to q-2: lorem [done]", "q-1") == "wrong_answer"
+        assert check_answer("Reply to q-0: lorem [done]\nReply to q-1: lorem [done]", "q-1") == "earlier_answer"
+        assert check_answer(None, "q-1") == "wrong_answer"
+
+    def test_benchmark_config(self):
+        """Test that only benchmarked services are kept and point at the fake sites"""
+        base = {
+            "ai_services": [
+                {"id": "deepseek", "url": "https://chat.deepseek.com", "enabled": False, "response_timeout": 1},
+                {"id": "kimi", "url": "https://kimi.moonshot.cn"}
+            ],
+            "scheduler": {"default": {"concurrency": 2, "rate_per_minute": 30}}
+        }
+
+        config = benchmark_config(base, {"deepseek": "http://127.0.0.1:1/deepseek/"}, 5000)
+
+        assert config["ai_services"] == [{"id": "deepseek", "url": "http://127.0.0.1:1/deepseek/", "enabled": True}]
+        assert config["browser"]["response_timeout"] == 5000
+        assert config["answer_cache"] == {"enabled": False}
+        assert config["scheduler"]["default"]["concurrency"] == 2
+        assert config["scheduler"]["default"]["rate_per_minute"] == 0
+        assert base["ai_services"][0]["enabled"] is False
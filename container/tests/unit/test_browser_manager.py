@@ -1,6 +1,7 @@
 """
 Unit tests for BrowserManager class
 """
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
 from mcp_server.browser import BrowserManager
@@ -44,6 +45,14 @@ class TestBrowserManager:
         for ai in expected_ais:
             assert ai in ai_urls, f"AI service {ai} not found in ai_urls"
     
+    def test_ai_urls_follow_registry_reloads(self):
+        """Test that services added to the registry after start-up are supported"""
+        manager = BrowserManager()
+        
+        with patch('mcp_server.browser.load_ai_urls', return_value={"newchat": "https://newchat.example"}):
+            assert manager.ai_urls == {"newchat": "https://newchat.example"}
+            manager._check_supported("newchat")
+    
     @pytest.mark.asyncio
     async def test_connect_success(self):
         """Test successful browser connection"""
@@ -190,6 +199,108 @@ class TestBrowserManager:
         with pytest.raises(RuntimeError, match="Browser page not available"):
             await manager.switch_ai("deepseek")
     
+    @pytest.mark.asyncio
+    async def test_ready_tab_skips_navigation(self, mock_page):
+        """Test that a ready tab is reused and only asked for a new chat on request"""
+        manager = BrowserManager()
+        manager.page = mock_page
+        mock_handler = AsyncMock()
+        mock_handler.ask_question.return_value = "Answer"
+        
+        with patch('mcp_server.browser.create_ai_handler', return_value=mock_handler):
+            await manager.ask_ai("deepseek", "First")
+            await manager.ask_ai("deepseek", "Second")
+            assert mock_handler.open_service.call_count == 1
+            
+            await manager.ask_ai("deepseek", "Third", new_chat=True)
+            mock_handler.open_service.assert_called_with(new_chat=True)
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_yields_in_completion_order(self, mock_page):
+        """Test that broadcast returns the fastest answer first"""
+        manager = BrowserManager()
+        manager.page = mock_page
+        delays = {"deepseek": 0.05, "kimi": 0.01, "qwen": 0.03}
+        
+        async def fake_ask(ai, question):
+            await asyncio.sleep(delays[ai])
+            if ai == "qwen":
+                raise RuntimeError("Could not find input element")
+            return f"{ai}: {question}"
+        
+        with patch.object(manager, 'ask_ai', side_effect=fake_ask):
+            results = [r async for r in manager.broadcast(["deepseek", "kimi", "qwen"], "Hi")]
+        
+        assert [r["ai"] for r in results] == ["kimi", "qwen", "deepseek"]
+        assert results[0]["answer"] == "kimi: Hi"
+        assert results[1]["success"] is False
+        assert "Could not find input element" in results[1]["error"]
+    
+    def test_broadcast_unsupported_ai(self, mock_page):
+        """Test that broadcast rejects unknown services before asking any"""
+        manager = BrowserManager()
+        manager.page = mock_page
+        
+        with pytest.raises(ValueError, match="Unsupported AI: unknown"):
+            manager.broadcast(["deepseek", "unknown"], "Hi")
+    
+    @pytest.mark.asyncio
+    async def test_ask_ai_stream_events(self, mock_page):
+        """Test that streaming reports first token, deltas and the final answer"""
+        manager = BrowserManager()
+        manager.page = mock_page
+        
+        mock_handler = AsyncMock()
+        mock_handler.answer_selectors = [".answer"]
+        
+        mock_stream = AsyncMock()
+        async def follow(task):
+            yield {"event": "delta", "text": "Partial"}
+            await task
+        mock_stream.follow = follow
+        mock_handler.ask_question.return_value = "Partial answer"
+        
+        with patch('mcp_server.browser.create_ai_handler', return_value=mock_handler), \
+             patch('mcp_server.browser.AnswerStream', return_value=mock_stream):
+            events = [e async for e in manager.ask_ai_stream("deepseek", "Hi")]
+        
+        assert [e["event"] for e in events] == ["start", "first_token", "delta", "done"]
+        assert events[-1]["answer"] == "Partial answer"
+        mock_handler.open_service.assert_called_once_with(new_chat=False)
+        mock_stream.start.assert_called_once()
+        mock_stream.stop.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_opens_services_in_parallel(self, mock_page):
+        """Test that warm-up navigates each service concurrently and reports readiness"""
+        manager = BrowserManager()
+        manager.page = mock_page
+        manager.max_tabs = 2
+        opened = []
+        
+        def make_handler(ai, page):
+            handler = AsyncMock()
+            async def open_service(new_chat=False):
+                opened.append(ai)
+                await asyncio.sleep(0.05)
+                if ai == "kimi":
+                    raise RuntimeError("Timeout 30000ms exceeded")
+            handler.open_service.side_effect = open_service
+            handler.is_input_ready.return_value = True
+            return handler
+        
+        with patch('mcp_server.browser.create_ai_handler', side_effect=make_handler):
+            start = asyncio.get_running_loop().time()
+            results = await manager.warm_up(["deepseek", "kimi", "qwen"])
+            elapsed = asyncio.get_running_loop().time() - start
+        
+        # The third service would evict a warm tab, so only the tab budget is used
+        assert list(results) == ["deepseek", "kimi"]
+        assert results["deepseek"]["ready"] is True
+        assert results["kimi"] == {"ready": False, "error": "Timeout 30000ms exceeded", "seconds": results["kimi"]["seconds"]}
+        assert elapsed < 0.1
+        assert [tab["key"] for tab in manager.tab_stats()["tabs"] if tab["ready"]] == ["deepseek"]
+    
     def test_is_connected_false(self):
         """Test is_connected when browser is not connected"""
         manager = BrowserManager()
@@ -0,0 +1,135 @@
+"""
+Unit tests for the asyncio Chrome manager
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from mcp_server.chrome_manager import ChromeManager
+
+
+async def start_devtools_server(status: str = "200 OK", port: int = 0):
+    """Serve a minimal /json/version on a free port, returning the server and port"""
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        body = json.dumps({"Browser": "Chrome/120.0", "webSocketDebuggerUrl": "ws://x"}).encode()
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def free_port() -> int:
+    """A port that nothing listens on"""
+    server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
+
+
+class TestChromeManager:
+    """Test cases for ChromeManager"""
+
+    @pytest.mark.asyncio
+    async def test_get_version_reads_devtools_endpoint(self):
+        """Test that /json/version is parsed from the DevTools endpoint"""
+        server, port = await start_devtools_server()
+        async with server:
+            manager = ChromeManager(port)
+
+            version = await manager.get_version()
+
+            assert version["Browser"] == "Chrome/120.0"
+            assert await manager.is_chrome_running() is True
+
+    @pytest.mark.asyncio
+    async def test_open_port_without_devtools_is_not_ready(self):
+        """Test that an answer other than 200 does not count as ready"""
+        server, port = await start_devtools_server(status="404 Not Found")
+        async with server:
+            manager = ChromeManager(port)
+
+            assert await manager.is_port_open() is True
+            assert await manager.is_chrome_running() is False
+
+    @pytest.mark.asyncio
+    async def test_closed_port_is_not_running(self):
+        """Test that nothing listening is reported without raising"""
+        manager = ChromeManager(await free_port())
+
+        assert await manager.is_port_open() is False
+        assert await manager.is_chrome_running() is False
+
+    @pytest.mark.asyncio
+    async def test_wait_until_ready_returns_when_endpoint_answers(self):
+        """Test that readiness is reported as soon as DevTools answers, without blocking the loop"""
+        port = await free_port()
+        manager = ChromeManager(port)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        ready_task = asyncio.create_task(manager.wait_until_ready(timeout=5))
+        await asyncio.sleep(0.2)
+
+        # Bring up the endpoint on the port the manager polls
+        devtools, _ = await start_devtools_server(port=port)
+        async with devtools:
+            assert await ready_task is True
+        elapsed = loop.time() - started
+        tick_task.cancel()
+
+        assert elapsed < 2
+        # The event loop kept running while waiting
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_wait_until_ready_timeout(self):
+        """Test that a missing endpoint is reported after the timeout"""
+        manager = ChromeManager(await free_port())
+
+        assert await manager.wait_until_ready(timeout=0.2) is False
+
+    @pytest.mark.asyncio
+    async def test_wait_until_ready_stops_when_chrome_exits(self):
+        """Test that an exited Chrome process ends the wait early"""
+        manager = ChromeManager(await free_port())
+        manager.chrome_process = MagicMock(returncode=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        assert await manager.wait_until_ready(timeout=5) is False
+        assert loop.time() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_start_chrome_reports_startup_time(self):
+        """Test that an already running Chrome is reported with its startup time"""
+        server, port = await start_devtools_server()
+        async with server:
+            manager = ChromeManager(port)
+
+            assert await manager.start_chrome() is True
+            assert manager.startup_seconds is not None
+            assert manager.chrome_process is None
+
+    @pytest.mark.asyncio
+    async def test_container_without_host_service(self):
+        """Test that a container without host service or Chrome fails without hanging"""
+        manager = ChromeManager(await free_port())
+        manager.is_container = True
+
+        with patch('mcp_server.chrome_manager.HOST_SERVICE_PORT', await free_port()), \
+                patch('mcp_server.chrome_manager.HOST_MANUAL_START_TIMEOUT', 0.2):
+            assert await manager.start_chrome() is False
+        assert manager.startup_seconds is None
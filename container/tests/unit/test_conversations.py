@@ -0,0 +1,123 @@
+"""
+Unit tests for conversations pinned to their own tab
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from mcp_server.browser import BrowserManager
+from mcp_server.conversations import ConversationRegistry, key_service, validate_conversation_id
+
+
+def make_page(url="https://chat.deepseek.com/"):
+    page = AsyncMock()
+    page.on = MagicMock()
+    page.url = url
+    page.context.new_page = AsyncMock(side_effect=lambda: make_page("about:blank"))
+    return page
+
+
+class TestConversationRegistry:
+    """Test cases for ConversationRegistry"""
+
+    def test_open_returns_the_same_conversation(self):
+        """Test that an id names one conversation per service"""
+        registry = ConversationRegistry()
+
+        first = registry.open("deepseek", "debug-1")
+        assert registry.open("deepseek", "debug-1") is first
+        assert registry.open("kimi", "debug-1") is not first
+        assert first.key == "deepseek#debug-1"
+        assert key_service(first.key) == "deepseek"
+        assert key_service("deepseek") == "deepseek"
+
+    def test_invalid_ids_are_rejected(self):
+        """Test that ids that could clash with tab keys are rejected"""
+        assert validate_conversation_id("session:42.a_b-c") == "session:42.a_b-c"
+        for conversation_id in ("", "a#b", "a b", "x" * 129):
+            with pytest.raises(ValueError):
+                validate_conversation_id(conversation_id)
+
+    def test_idle_conversations_expire(self):
+        """Test that only conversations idle for longer than the TTL expire"""
+        registry = ConversationRegistry.from_config({"ttl": 60})
+        old = registry.open("deepseek", "old")
+        registry.open("deepseek", "new")
+
+        with patch('mcp_server.conversations.time.monotonic', return_value=old.last_used + 61):
+            registry.get("deepseek", "new").touch()
+            assert registry.expire() == [old]
+
+        assert [c["conversation_id"] for c in registry.stats()["conversations"]] == ["new"]
+
+
+class TestBrowserManagerConversations:
+    """Test cases for conversation affinity in BrowserManager"""
+
+    def make_manager(self):
+        manager = BrowserManager()
+        manager.page = make_page()
+        manager.max_tabs = 3
+        handler = AsyncMock()
+        handler.ask_question.return_value = "Answer"
+        return manager, handler
+
+    @pytest.mark.asyncio
+    async def test_follow_up_continues_in_place(self):
+        """Test that a conversation starts a new chat in its own tab and then stays there"""
+        manager, handler = self.make_manager()
+
+        with patch('mcp_server.browser.create_ai_handler', return_value=handler) as create:
+            await manager.ask_ai("deepseek", "Plain question")
+            await manager.ask_ai("deepseek", "Why does this fail?", conversation_id="debug-1")
+            conversation_page = create.call_args.args[1]
+            conversation_page.url = "https://chat.deepseek.com/a/chat/s/123"
+            await manager.ask_ai("deepseek", "And now?", conversation_id="debug-1")
+
+        assert conversation_page is not manager.page
+        assert create.call_args.args[1] is conversation_page
+        assert [call.kwargs for call in handler.open_service.call_args_list] == [
+            {"new_chat": False}, {"new_chat": True}
+        ]
+        conversation = manager.conversations.get("deepseek", "debug-1")
+        assert conversation.turns == 2
+        assert conversation.url == "https://chat.deepseek.com/a/chat/s/123"
+        assert sorted(tab["key"] for tab in manager.tab_stats()["tabs"]) == ["deepseek", "deepseek#debug-1"]
+
+    @pytest.mark.asyncio
+    async def test_lost_tab_returns_to_the_thread(self):
+        """Test that a conversation whose tab was evicted reopens its thread instead of a new chat"""
+        manager, handler = self.make_manager()
+        manager.max_tabs = 1
+
+        with patch('mcp_server.browser.create_ai_handler', return_value=handler):
+            await manager.ask_ai("deepseek", "First", conversation_id="debug-1")
+            await manager.ask_ai("kimi", "Elsewhere")
+            await manager.ask_ai("deepseek", "Second", conversation_id="debug-1")
+
+        handler.open_url.assert_called_once_with("https://chat.deepseek.com/")
+        assert handler.open_service.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_conversation_gives_back_its_tab(self):
+        """Test that expired conversations free their tab and start over when used again"""
+        manager, handler = self.make_manager()
+        manager.conversations.ttl = 0
+
+        with patch('mcp_server.browser.create_ai_handler', return_value=handler):
+            await manager.ask_ai("deepseek", "First", conversation_id="debug-1")
+            await manager.ask_ai("deepseek", "Unrelated")
+
+            assert [tab["key"] for tab in manager.tab_stats()["tabs"]] == ["deepseek"]
+            assert manager.conversations.get("deepseek", "debug-1") is None
+
+    @pytest.mark.asyncio
+    async def test_end_conversation(self):
+        """Test that ending a conversation frees its tab"""
+        manager, handler = self.make_manager()
+
+        with patch('mcp_server.browser.create_ai_handler', return_value=handler):
+            await manager.ask_ai("deepseek", "First", conversation_id="debug-1")
+
+        assert await manager.end_conversation("deepseek", "debug-1") is True
+        assert await manager.end_conversation("deepseek", "debug-1") is False
+        assert manager.tab_stats()["tabs"] == []
@@ -2,6 +2,7 @@
 Unit tests for DeepSeek AI handler
 """
 import pytest
+from dataclasses import replace
 from unittest.mock import AsyncMock, patch
 from mcp_server.handlers.deepseek_handler import DeepSeekHandler
 from mcp_server.ai_handler_base import AIHandler
@@ -53,7 +54,8 @@ class TestDeepSeekHandler:
         
         # Mock the service URL
         if handler.service:
-            handler.service.url = "https://chat.deepseek.com"
+            # Configured services are shared and frozen, so replace rather than modify
+            handler.service = replace(handler.service, url="https://chat.deepseek.com")
         else:
             # Fallback if service is not loaded
             with patch.object(handler, 'service', None):
@@ -97,6 +99,8 @@ class TestDeepSeekHandler:
         mock_answer_element.text_content = AsyncMock(return_value="Test response")
         # Mock the answer selector
         mock_page.query_selector.side_effect = [mock_button, mock_answer_element]
+        # Answers are extracted in one in-page call
+        mock_page.evaluate.return_value = {"selector": ".answer-content", "text": "Test response"}
         
         # Call the method
         result = await handler.ask_question("Test question")
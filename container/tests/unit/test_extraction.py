@@ -0,0 +1,40 @@
+"""
+Unit tests for single-round-trip answer extraction
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from mcp_server.extraction import extract_answer
+
+
+class TestExtraction:
+    """Test cases for answer extraction"""
+    
+    @pytest.mark.asyncio
+    async def test_extracts_in_one_evaluate(self):
+        """Test that every selector is handled by a single in-page call"""
+        mock_page = AsyncMock()
+        mock_page.evaluate.return_value = {"selector": ".markdown p", "text": "One\nTwo"}
+        
+        text, selector = await extract_answer(mock_page, [".markdown li", ".markdown p"], "all")
+        
+        assert (text, selector) == ("One\nTwo", ".markdown p")
+        mock_page.evaluate.assert_called_once()
+        assert mock_page.evaluate.call_args.args[1] == {"selectors": [".markdown li", ".markdown p"], "mode": "all"}
+        mock_page.query_selector_all.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_no_answer(self):
+        """Test that a page without answer text yields nothing"""
+        mock_page = AsyncMock()
+        mock_page.evaluate.return_value = None
+        
+        assert await extract_answer(mock_page, [".answer"]) == (None, None)
+    
+    @pytest.mark.asyncio
+    async def test_no_selectors_skips_page(self):
+        """Test that an empty selector list does not touch the page"""
+        mock_page = AsyncMock()
+        
+        assert await extract_answer(mock_page, []) == (None, None)
+        mock_page.evaluate.assert_not_called()
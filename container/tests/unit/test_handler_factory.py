@@ -1,10 +1,15 @@
 """
 Unit tests for handler factory
 """
+import os
+import subprocess
+import sys
 import pytest
-from mcp_server.handler_factory import create_ai_handler
+from mcp_server import handler_factory
+from mcp_server.handler_factory import create_ai_handler, register_handler
 from mcp_server.ai_handler_base import AIHandler
-from unittest.mock import AsyncMock
+from mcp_server.startup import startup_report
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 class TestHandlerFactory:
@@ -46,4 +51,42 @@ class TestHandlerFactory:
         assert handler2 is not None, "Handler for mixed case DeepSeek should not be None"
         assert handler3 is not None, "Handler for lowercase deepseek should not be None"
         assert isinstance(handler1, type(handler2)), "Handlers should be of the same type"
-        assert isinstance(handler2, type(handler3)), "Handlers should be of the same type"
\ No newline at end of file
+        assert isinstance(handler2, type(handler3)), "Handlers should be of the same type"
+    
+    def test_registered_path_imported_on_first_use(self):
+        """Test that a handler registered by path is imported when first created"""
+        with patch.dict(handler_factory.AI_HANDLERS):
+            register_handler("Kimi-Test", "mcp_server.handlers.kimi_handler:KimiHandler")
+            assert handler_factory.AI_HANDLERS["kimi-test"] == "mcp_server.handlers.kimi_handler:KimiHandler"
+            
+            handler = create_ai_handler("kimi-test", AsyncMock())
+            
+            assert type(handler).__name__ == "KimiHandler"
+            assert isinstance(handler_factory.AI_HANDLERS["kimi-test"], type)
+            assert "kimi-test" in startup_report.handlers
+    
+    def test_entry_point_handlers_registered(self):
+        """Test that handlers from installed packages are found through entry points"""
+        entry_point = MagicMock()
+        entry_point.name = "Plugin-AI"
+        entry_point.value = "mcp_server.handlers.pi_handler:PiHandler"
+        
+        with patch.dict(handler_factory.AI_HANDLERS), \
+                patch.object(handler_factory, '_entry_points_loaded', False), \
+                patch('importlib.metadata.entry_points', return_value=[entry_point]) as entry_points:
+            handler = create_ai_handler("plugin-ai", AsyncMock())
+            
+            entry_points.assert_called_once_with(group=handler_factory.ENTRY_POINT_GROUP)
+            assert type(handler).__name__ == "PiHandler"
+    
+    def test_server_import_does_not_load_handlers_or_playwright(self):
+        """Test that importing the server defers handler and Playwright imports"""
+        code = (
+            "import sys, mcp_server.main; "
+            "print(any(m.startswith('mcp_server.handlers') for m in sys.modules), "
+            "'playwright' in sys.modules)"
+        )
+        container_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=container_dir)
+        
+        assert result.stdout.split() == ["False", "False"]
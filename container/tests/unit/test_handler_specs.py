@@ -0,0 +1,233 @@
+"""
+Unit tests for declarative handler specs and the generic spec handler
+"""
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from mcp_server.ai_handler_base import PartialAnswer
+from mcp_server.handler_factory import AI_HANDLERS, create_ai_handler
+from mcp_server.handler_specs import HandlerSpecRegistry, handler_specs, parse_handler_spec
+from mcp_server.metrics import Metrics
+from mcp_server.spec_handler import SpecHandler
+
+
+SPEC_YAML = """
+demo:
+  name: "Demo"
+  url: "https://demo.example.com"
+  input: ["textarea"]
+  buttons: [".send"]
+  answer: [".answer"]
+"""
+
+
+def write_specs(path, text, mtime):
+    """Write the specs file with a distinct mtime so the change is detected"""
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+def make_page(answer):
+    """Mock page with one input, one send button and the given extraction result"""
+    mock_page = AsyncMock()
+    mock_input = AsyncMock()
+    mock_button = AsyncMock()
+
+    async def query_selector_all(selector):
+        return [mock_input] if selector == "textarea" else []
+
+    async def query_selector(selector):
+        return mock_button if selector == ".send" else None
+
+    async def evaluate(script, args=None):
+        # Only the extraction script is passed a mode
+        if isinstance(args, dict) and "mode" in args:
+            return answer
+        return None
+
+    mock_page.query_selector_all.side_effect = query_selector_all
+    mock_page.query_selector.side_effect = query_selector
+    mock_page.evaluate.side_effect = evaluate
+    return mock_page, mock_input, mock_button
+
+
+def extraction_args(mock_page):
+    """Arguments of the extraction call"""
+    return next(c.args[1] for c in mock_page.evaluate.call_args_list if "mode" in c.args[1])
+
+
+class TestHandlerSpecRegistry:
+    """Test cases for loading and reloading handler specs"""
+
+    def test_every_handler_has_a_spec(self):
+        """Test that the shipped specs cover every registered handler"""
+        for ai in AI_HANDLERS:
+            assert handler_specs.get(ai) is not None, f"Missing handler spec for {ai}"
+        assert handler_specs.get_default() is not None
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        """Test that edits to the specs file apply without a restart"""
+        path = tmp_path / "specs.yaml"
+        write_specs(path, SPEC_YAML, 1000)
+        registry = HandlerSpecRegistry(str(path))
+        assert registry.get("demo").answer == (".answer",)
+
+        write_specs(path, SPEC_YAML.replace('[".answer"]', '[".reply", ".answer"]'), 2000)
+
+        assert registry.get("demo").answer == (".reply", ".answer")
+
+    def test_keeps_previous_specs_on_broken_file(self, tmp_path):
+        """Test that a file that cannot be parsed does not drop the loaded specs"""
+        path = tmp_path / "specs.yaml"
+        write_specs(path, SPEC_YAML, 1000)
+        registry = HandlerSpecRegistry(str(path))
+        registry.get("demo")
+
+        write_specs(path, "demo: [unclosed", 2000)
+
+        assert registry.get("demo") is not None
+
+    def test_invalid_entry_keeps_previous_version(self, tmp_path):
+        """Test that an invalid entry keeps its last good version"""
+        path = tmp_path / "specs.yaml"
+        write_specs(path, SPEC_YAML, 1000)
+        registry = HandlerSpecRegistry(str(path))
+        registry.get("demo")
+
+        write_specs(path, SPEC_YAML.replace('buttons: [".send"]', 'submit: "shout"'), 2000)
+
+        assert registry.get("demo").submit == "click"
+        assert registry.get("demo").buttons == (".send",)
+
+    def test_invalid_insert_mode_is_rejected(self):
+        """Test that the insert mode must be one of the known modes"""
+        with pytest.raises(ValueError, match="'insert' must be one of fill, insert_text, paste"):
+            parse_handler_spec("demo", {"input": ["textarea"], "answer": [".answer"], "insert": "type"})
+
+
+class TestSpecHandler:
+    """Test cases for the generic spec handler"""
+
+    @pytest.fixture
+    def registry(self, tmp_path):
+        path = tmp_path / "specs.yaml"
+        write_specs(path, SPEC_YAML + """
+demo-enter:
+  input: ["textarea"]
+  buttons: [".send"]
+  submit: "enter"
+  answer: [".answer"]
+  extract: "all"
+  insert: "paste"
+""", 1000)
+        registry = HandlerSpecRegistry(str(path))
+        with patch('mcp_server.handler_specs.handler_specs', registry):
+            yield registry
+
+    @pytest.mark.asyncio
+    async def test_click_submit_and_first_answer(self, registry):
+        """Test that the send button is clicked and the first answer element returned"""
+        mock_page, mock_input, mock_button = make_page({"selector": ".answer", "text": "First"})
+        handler = SpecHandler(mock_page, "demo")
+
+        answer = await handler.ask_question("Hello")
+
+        assert answer == "First"
+        assert extraction_args(mock_page) == {"selectors": [".answer"], "mode": "first"}
+        mock_input.fill.assert_called_once_with("Hello")
+        mock_button.click.assert_called_once()
+        mock_input.press.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stage_timings_are_recorded(self, registry):
+        """Test that each stage of a question is timed under the service id"""
+        mock_page, _, _ = make_page({"selector": ".answer", "text": "First"})
+        handler = SpecHandler(mock_page, "demo")
+        metrics = Metrics()
+
+        with patch('mcp_server.ai_handler_base.metrics', metrics):
+            await handler.open_service()
+            await handler.ask_question("Hello")
+
+        for stage in ("navigate", "locate_input", "fill", "submit", "completion", "extract"):
+            assert metrics.histogram("demo", stage).count == 1
+
+    @pytest.mark.asyncio
+    async def test_enter_submit_and_all_answers(self, registry):
+        """Test that Enter is pressed and every answer element is joined"""
+        mock_page, mock_input, mock_button = make_page({"selector": ".answer", "text": "First\nSecond"})
+        handler = SpecHandler(mock_page, "demo-enter")
+
+        answer = await handler.ask_question("Hello")
+
+        assert answer == "First\nSecond"
+        assert extraction_args(mock_page)["mode"] == "all"
+        mock_input.press.assert_called_once_with("Enter")
+        mock_button.click.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_long_question_uses_spec_insert_mode(self, registry):
+        """Test that long questions are inserted with the spec's mode and short ones filled"""
+        mock_page, mock_input, _ = make_page({"selector": ".answer", "text": "First"})
+        handler = SpecHandler(mock_page, "demo-enter")
+        question = "x" * 5000
+
+        with patch('mcp_server.ai_handler_base.insert_text', new=AsyncMock()) as mock_insert:
+            await handler.ask_question(question)
+            await handler.ask_question("Hello")
+
+        mock_insert.assert_called_once_with(handler.page, mock_input, question, "paste")
+        mock_input.fill.assert_called_once_with("Hello")
+        assert SpecHandler(mock_page, "demo").insert_mode == "insert_text"
+
+    @pytest.mark.asyncio
+    async def test_no_answer_raises(self, registry):
+        """Test that an empty extraction is an error naming the website structure problem"""
+        mock_page, _, _ = make_page(None)
+        handler = SpecHandler(mock_page, "demo")
+
+        with pytest.raises(RuntimeError, match="No answer found from Demo - please check the website structure"):
+            await handler.ask_question("Hello")
+
+    @pytest.mark.asyncio
+    async def test_timed_out_answer_is_partial(self, registry):
+        """Test that text extracted after the completion wait timed out is flagged as partial"""
+        mock_page, _, _ = make_page({"selector": ".answer", "text": "Half an ans"})
+        handler = SpecHandler(mock_page, "demo")
+
+        with patch.object(handler, 'wait_for_answer', AsyncMock(return_value=False)):
+            partial = await handler.ask_question("Hello")
+        with patch.object(handler, 'wait_for_answer', AsyncMock(return_value=True)):
+            complete = await handler.ask_question("Hello")
+
+        assert isinstance(partial, PartialAnswer) and partial == "Half an ans"
+        assert not isinstance(complete, PartialAnswer)
+
+    @pytest.mark.asyncio
+    async def test_missing_input_names_service(self, registry):
+        """Test that a missing input element is reported with the spec name"""
+        mock_page = AsyncMock()
+        mock_page.query_selector_all.return_value = []
+        handler = SpecHandler(mock_page, "demo")
+
+        with pytest.raises(RuntimeError, match="Could not find input element for Demo"):
+            await handler.ask_question("Hello")
+
+    @pytest.mark.asyncio
+    async def test_navigates_to_spec_url_without_config(self, registry):
+        """Test that the spec URL is used for services missing from config.yaml"""
+        mock_page = AsyncMock()
+        handler = SpecHandler(mock_page, "demo")
+
+        await handler.navigate_to_service()
+
+        assert handler.service is None
+        mock_page.goto.assert_called_once_with("https://demo.example.com")
+
+    def test_factory_uses_spec_handler_for_spec_only_service(self, registry):
+        """Test that a service added only to the specs file gets a handler"""
+        handler = create_ai_handler("demo", MagicMock())
+
+        assert isinstance(handler, SpecHandler)
+        assert handler.input_selectors == ["textarea"]
@@ -0,0 +1,234 @@
+"""
+Unit tests for the host agent protocol, client and scripts/host_chrome_service.py
+"""
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from mcp_server.chrome_manager import ChromeManager
+from mcp_server.host_agent import HostAgentClient, HostAgentError, HostAgentTimeout, encode_message, read_message
+
+SERVICE_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "..", "scripts", "host_chrome_service.py")
+
+
+def load_service_module():
+    """Import the host script, which is not part of the server package"""
+    spec = importlib.util.spec_from_file_location("host_chrome_service", SERVICE_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+host_service = load_service_module()
+
+
+async def start_devtools_server():
+    """Serve /json/version and /json/list on a free port, returning the server and port"""
+    async def handle(reader, writer):
+        request_line = (await reader.readuntil(b"\r\n\r\n")).split(b" ")[1]
+        if request_line == b"/json/list":
+            body = [{"id": "T1", "type": "page", "url": "https://chat.deepseek.com"}]
+        else:
+            body = {"Browser": "Chrome/120.0"}
+        data = json.dumps(body).encode()
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def free_port() -> int:
+    """A port that nothing listens on"""
+    server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
+
+
+@contextlib.asynccontextmanager
+async def running_agent():
+    """Run the host agent on a free port"""
+    service = host_service.HostChromeService(listen_port=0)
+    await service.listen()
+    try:
+        yield service
+    finally:
+        await service.close()
+
+
+class TestHostAgent:
+    """Test cases for the host agent and its client"""
+
+    @pytest.mark.asyncio
+    async def test_framing_round_trip(self):
+        """Test that a framed message is read back unchanged"""
+        reader = asyncio.StreamReader()
+        reader.feed_data(encode_message({"action": "status", "id": 1}) + encode_message({"id": 2}))
+        reader.feed_eof()
+
+        assert await read_message(reader) == {"action": "status", "id": 1}
+        assert await read_message(reader) == {"id": 2}
+        with pytest.raises(HostAgentError):
+            await read_message(reader)
+
+    @pytest.mark.asyncio
+    async def test_actions_share_one_connection(self):
+        """Test that status, list_targets and wait_ready are answered over a single connection"""
+        devtools, port = await start_devtools_server()
+        service = host_service.HostChromeService(listen_port=0)
+        connections = 0
+        handle_client = service.handle_client
+
+        async def counting_handle_client(reader, writer):
+            nonlocal connections
+            connections += 1
+            await handle_client(reader, writer)
+
+        service.handle_client = counting_handle_client
+        await service.listen()
+        client = HostAgentClient(port=service.listen_port)
+        async with devtools:
+            status = await client.status(port)
+            targets = await client.list_targets(port)
+            ready = await client.wait_ready(port, timeout=1)
+        await client.close()
+        await service.close()
+
+        assert status["running"] is True
+        assert status["browser"] == "Chrome/120.0"
+        assert targets["targets"][0]["id"] == "T1"
+        assert ready["success"] is True
+        assert connections == 1
+
+    @pytest.mark.asyncio
+    async def test_start_reports_running_chrome_immediately(self):
+        """Test that start answers at once when DevTools already answers"""
+        devtools, port = await start_devtools_server()
+        async with running_agent() as agent, devtools:
+            client = HostAgentClient(port=agent.listen_port)
+            response = await client.start(port)
+            await client.close()
+
+        assert response["success"] is True
+        assert response["message"] == "Chrome already running"
+        assert response["startup_seconds"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_wait_ready_times_out_without_chrome(self):
+        """Test that wait_ready fails after its timeout when nothing answers"""
+        async with running_agent() as agent:
+            client = HostAgentClient(port=agent.listen_port)
+            response = await client.wait_ready(await free_port(), timeout=0.2)
+            await client.close()
+
+        assert response["success"] is False
+
+    @pytest.mark.asyncio
+    async def test_unknown_action_and_invalid_parameters(self):
+        """Test that bad requests are answered with an error without dropping the connection"""
+        async with running_agent() as agent:
+            client = HostAgentClient(port=agent.listen_port)
+            unknown = await client.request("reboot")
+            invalid = await client.request("status", colour="blue")
+            await client.close()
+
+        assert unknown == {"success": False, "error": "Unknown action", "id": 1}
+        assert invalid["success"] is False
+        assert "Invalid parameters" in invalid["error"]
+
+    @pytest.mark.asyncio
+    async def test_client_reconnects_after_dropped_connection(self):
+        """Test that a connection the agent dropped is replaced transparently"""
+        connections = 0
+
+        async def answer_once(reader, writer):
+            # Answer one request, then drop the connection like a restarted agent
+            nonlocal connections
+            connections += 1
+            request = await read_message(reader)
+            writer.write(encode_message({"success": True, "id": request["id"]}))
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(answer_once, "127.0.0.1", 0)
+        async with server:
+            client = HostAgentClient(port=server.sockets[0].getsockname()[1])
+            first = await client.status()
+            await asyncio.sleep(0.05)
+            second = await client.status()
+            await client.close()
+
+        assert first["success"] is True
+        assert second["success"] is True
+        assert connections == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_is_not_retried(self):
+        """Test that a request the agent did not answer in time is reported and sent only once"""
+        received = []
+
+        async def never_answer(reader, writer):
+            try:
+                while True:
+                    received.append(await read_message(reader))
+            except HostAgentError:
+                writer.close()
+
+        server = await asyncio.start_server(never_answer, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            client = HostAgentClient(port=port)
+            # A reused connection must not turn the timeout into a retry either
+            client._reader, client._writer = await asyncio.open_connection("127.0.0.1", port)
+            with pytest.raises(HostAgentTimeout, match="did not answer 'start'"):
+                await client.request("start", response_timeout=0.2)
+            await asyncio.sleep(0.05)
+
+        assert [message["action"] for message in received] == ["start"]
+        assert not client.connected
+
+    @pytest.mark.asyncio
+    async def test_unreachable_agent_raises(self):
+        """Test that a missing agent is reported as HostAgentError"""
+        client = HostAgentClient(port=await free_port())
+
+        with pytest.raises(HostAgentError):
+            await client.status()
+
+    @pytest.mark.asyncio
+    async def test_legacy_unframed_request(self):
+        """Test that an older container sending raw JSON still gets an answer"""
+        async with running_agent() as agent:
+            reader, writer = await asyncio.open_connection("127.0.0.1", agent.listen_port)
+            writer.write(json.dumps({"action": "status", "debug_port": await free_port()}).encode())
+            await writer.drain()
+            response = json.loads(await reader.read())
+            writer.close()
+
+        assert response["success"] is True
+        assert response["running"] is False
+
+    @pytest.mark.asyncio
+    async def test_chrome_manager_uses_host_agent_in_container(self):
+        """Test that a container ChromeManager is ready as soon as the agent reports Chrome"""
+        devtools, port = await start_devtools_server()
+        manager = ChromeManager(port)
+        manager.is_container = True
+
+        async with running_agent() as agent, devtools:
+            agent.actions['start'] = AsyncMock(wraps=agent.start)
+            # The first probe finds no Chrome, so the manager asks the agent
+            with patch('mcp_server.chrome_manager.HOST_SERVICE_PORT', agent.listen_port), \
+                    patch.object(ChromeManager, 'is_chrome_running', side_effect=[False, True]):
+                assert await manager.start_chrome() is True
+                await manager.stop_chrome()
+
+        agent.actions['start'].assert_awaited_once_with(debug_port=port, headless=False, timeout=15.0)
+        assert manager.startup_seconds < 1
@@ -0,0 +1,103 @@
+"""
+Unit tests for background question jobs
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from mcp_server.jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobManager
+
+
+class TestJobManager:
+    """Test cases for JobManager"""
+
+    @pytest.mark.asyncio
+    async def test_job_reports_partial_text_then_answer(self):
+        """Test that a job moves from queued to running to done with its text"""
+        manager = JobManager()
+        proceed = asyncio.Event()
+
+        async def run(job):
+            job.start()
+            job.apply({"event": "delta", "text": "Hel"})
+            job.apply({"event": "delta", "text": "lo"})
+            await proceed.wait()
+            job.finish("Hello there")
+
+        job = manager.submit("deepseek", "Hi", run)
+        assert job.status == QUEUED
+        await asyncio.sleep(0)
+        assert (job.status, job.text) == (RUNNING, "Hello")
+
+        proceed.set()
+        await job.task
+        status = manager.get(job.id).to_dict()
+        assert (status["status"], status["answer"], status["text"]) == (DONE, "Hello there", "Hello there")
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self):
+        """Test that an exception from the runner fails the job"""
+        manager = JobManager()
+
+        async def run(job):
+            raise RuntimeError("Could not find input element")
+
+        job = manager.submit("deepseek", "Hi", run)
+        await job.task
+
+        assert (job.status, job.error) == (FAILED, "Could not find input element")
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_the_runner(self):
+        """Test that cancelling waits for the runner to clean up"""
+        manager = JobManager()
+        cleaned_up = []
+
+        async def run(job):
+            job.start()
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned_up.append(job.id)
+
+        job = manager.submit("deepseek", "Hi", run)
+        await asyncio.sleep(0)
+        cancelled = await manager.cancel(job.id)
+
+        assert cancelled is job
+        assert (job.status, job.error) == (CANCELLED, "Job cancelled")
+        assert cleaned_up == [job.id]
+        assert await manager.cancel("unknown") is None
+
+    @pytest.mark.asyncio
+    async def test_cancel_before_start(self):
+        """Test that a job cancelled before it ran is still marked cancelled"""
+        manager = JobManager()
+
+        async def run(job):
+            job.finish("never")
+
+        job = manager.submit("deepseek", "Hi", run)
+        await manager.cancel(job.id)
+
+        assert job.status == CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_pruned(self):
+        """Test that finished jobs expire after the TTL and beyond max_jobs"""
+        manager = JobManager.from_config({"ttl": 60, "max_jobs": 2})
+
+        async def run(job):
+            job.finish("answer")
+
+        first = manager.submit("deepseek", "1", run)
+        await first.task
+        second = manager.submit("deepseek", "2", run)
+        await second.task
+        third = manager.submit("deepseek", "3", run)
+        await third.task
+
+        assert manager.get(first.id) is None
+        assert manager.get(second.id) is second
+        with patch('mcp_server.jobs.time.monotonic', return_value=third.finished + 61):
+            assert manager.get(third.id) is None
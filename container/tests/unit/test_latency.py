@@ -0,0 +1,111 @@
+"""
+Unit tests for rolling latency windows and the deadlines derived from them
+"""
+from mcp_server.latency import LatencyTracker, LatencyWindow
+
+
+class TestLatencyWindow:
+    """Test cases for LatencyWindow"""
+
+    def test_percentile_uses_nearest_rank(self):
+        """Test that percentiles are taken from the recorded timings"""
+        window = LatencyWindow(10)
+        for seconds in (1.0, 2.0, 3.0, 4.0):
+            window.add(seconds)
+
+        assert window.percentile(50) == 2.0
+        assert window.percentile(99) == 4.0
+        assert window.percentile(0) == 1.0
+
+    def test_old_timings_are_forgotten(self):
+        """Test that the window keeps only the last timings"""
+        window = LatencyWindow(2)
+        for seconds in (30.0, 1.0, 2.0):
+            window.add(seconds)
+
+        assert len(window) == 2
+        assert window.percentile(100) == 2.0
+
+    def test_empty_window_has_no_percentile(self):
+        """Test that an empty window reports no percentile"""
+        assert LatencyWindow().percentile(99) is None
+
+
+class TestLatencyTracker:
+    """Test cases for LatencyTracker"""
+
+    def test_default_until_enough_samples(self):
+        """Test that the configured timeout applies until min_samples timings are recorded"""
+        tracker = LatencyTracker(min_samples=3)
+        tracker.observe("deepseek", "completion", 2.0)
+        tracker.observe("deepseek", "completion", 2.0)
+
+        assert tracker.deadline_ms("deepseek", "completion", 45000, 60000) == 45000
+        assert tracker.deadline_ms("deepseek", "completion", 90000, 60000) == 60000
+        assert tracker.poll_ms("deepseek", "completion", 200) == 200
+
+    def test_deadline_follows_percentile_and_margin(self):
+        """Test that the deadline is the percentile plus the margin"""
+        tracker = LatencyTracker(min_samples=3, margin=0.5, min_deadline_ms=1000)
+        for seconds in (4.0, 6.0, 8.0):
+            tracker.observe("deepseek", "completion", seconds)
+
+        assert tracker.deadline_ms("deepseek", "completion", 45000, 60000) == 12000
+
+    def test_slow_service_may_exceed_its_own_timeout(self):
+        """Test that a slow service waits longer than its configured timeout, up to the limit"""
+        tracker = LatencyTracker(min_samples=3, margin=0.5)
+        for seconds in (20.0, 25.0, 30.0):
+            tracker.observe("perplexity", "completion", seconds)
+
+        assert tracker.deadline_ms("perplexity", "completion", 30000, 60000) == 45000
+        assert tracker.deadline_ms("perplexity", "completion", 30000, 40000) == 40000
+
+    def test_deadline_floor(self):
+        """Test that fast services still get at least min_deadline"""
+        tracker = LatencyTracker(min_samples=1, min_deadline_ms=5000)
+        tracker.observe("kimi", "completion", 0.5)
+
+        assert tracker.deadline_ms("kimi", "completion", 45000, 60000) == 5000
+
+    def test_poll_interval_scales_with_median(self):
+        """Test that fast stages are polled more often, within bounds"""
+        tracker = LatencyTracker(min_samples=1)
+        tracker.observe("fast", "completion", 2.0)
+        tracker.observe("slow", "completion", 60.0)
+        tracker.observe("instant", "completion", 0.1)
+
+        assert tracker.poll_ms("fast", "completion", 200) == 100
+        assert tracker.poll_ms("slow", "completion", 200) == 500
+        assert tracker.poll_ms("instant", "completion", 200) == 50
+
+    def test_disabled_tracker_keeps_configured_timeouts(self):
+        """Test that enabled: false leaves the configured timeouts in place"""
+        tracker = LatencyTracker.from_config({"enabled": False, "min_samples": 1})
+        tracker.observe("deepseek", "completion", 1.0)
+
+        assert tracker.deadline_ms("deepseek", "completion", 45000, 60000) == 45000
+        assert tracker.poll_ms("deepseek", "completion", 200) == 200
+
+    def test_timeouts_are_counted_apart(self):
+        """Test that timed-out waits are reported but do not change the deadline"""
+        tracker = LatencyTracker(min_samples=3, margin=0.5, min_deadline_ms=1000)
+        for seconds in (4.0, 4.0, 4.0):
+            tracker.observe("deepseek", "completion", seconds)
+        tracker.record_timeout("deepseek", "completion")
+        tracker.record_timeout("kimi", "navigate")
+
+        assert tracker.deadline_ms("deepseek", "completion", 45000, 60000) == 6000
+        stats = tracker.stats()
+        assert stats["deepseek"]["completion"]["timeouts"] == 1
+        assert stats["kimi"]["navigate"] == {"samples": 0, "p50": None, "p99": None, "timeouts": 1, "learned": False}
+
+    def test_stats(self):
+        """Test that stats report samples, median and percentile per service and stage"""
+        tracker = LatencyTracker(min_samples=2, percentile=99)
+        tracker.observe("deepseek", "completion", 1.0)
+        tracker.observe("deepseek", "completion", 3.0)
+
+        assert tracker.stats() == {
+            "deepseek": {"completion": {"samples": 2, "p50": 1.0, "p99": 3.0, "timeouts": 0, "learned": True}}
+        }
@@ -0,0 +1,91 @@
+"""
+Unit tests for the metrics registry and its Prometheus rendering
+"""
+import asyncio
+
+from mcp_server.metrics import Histogram, Metrics, error_cause
+from mcp_server.scheduler import SchedulerRejected
+
+
+class TestHistogram:
+    """Test cases for Histogram"""
+
+    def test_observations_fill_fixed_buckets(self):
+        """Test that values land in the first bucket whose bound they do not exceed"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0, 7.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 2]
+        assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 5)]
+        assert histogram.count == 5
+        assert histogram.sum == 10.65
+
+
+class TestMetrics:
+    """Test cases for Metrics"""
+
+    def test_error_causes(self):
+        """Test that exceptions are grouped into a few causes"""
+        assert error_cause(SchedulerRejected("Queue is full", 429, 3)) == "rejected"
+        assert error_cause(asyncio.TimeoutError()) == "timeout"
+        assert error_cause(ValueError("Unsupported AI: foo")) == "unsupported"
+        assert error_cause(RuntimeError("Target closed")) == "browser"
+        assert error_cause(RuntimeError("Could not find input element for Demo")) == "selector"
+        assert error_cause(Exception("boom")) == "other"
+
+    def test_timer_skips_failed_stages(self):
+        """Test that only stages that completed are observed"""
+        metrics = Metrics(buckets=(1.0,))
+        with metrics.timer("deepseek", "fill"):
+            pass
+        try:
+            with metrics.timer("deepseek", "submit"):
+                raise RuntimeError("Target closed")
+        except RuntimeError:
+            pass
+
+        assert metrics.histogram("deepseek", "fill").count == 1
+        assert metrics.histogram("deepseek", "submit") is None
+
+    def test_render_prometheus_text(self):
+        """Test the exposition format of histograms, gauges and counters"""
+        metrics = Metrics(buckets=(1.0, 10.0))
+        metrics.observe("deepseek", "completion", 4.0)
+        metrics.observe("deepseek", "navigate", 0.5)
+        metrics.record_error("kimi", RuntimeError("Target closed"))
+        metrics.record_error("kimi", RuntimeError("Target closed"))
+
+        text = metrics.render(
+            scheduler={"deepseek": {"in_flight": 1, "queued": 3}},
+            cache={"hits": 2, "misses": 6, "hit_ratio": 0.25}
+        )
+        lines = text.splitlines()
+
+        assert "# TYPE terminai_stage_duration_seconds histogram" in lines
+        assert 'terminai_stage_duration_seconds_bucket{service="deepseek",stage="completion",le="1.0"} 0' in lines
+        assert 'terminai_stage_duration_seconds_bucket{service="deepseek",stage="completion",le="10.0"} 1' in lines
+        assert 'terminai_stage_duration_seconds_bucket{service="deepseek",stage="completion",le="+Inf"} 1' in lines
+        assert 'terminai_stage_duration_seconds_count{service="deepseek",stage="completion"} 1' in lines
+        # Stages are listed in the order they happen
+        assert text.index('stage="navigate"') < text.index('stage="completion"')
+        assert 'terminai_errors_total{service="kimi",cause="browser"} 2' in lines
+        assert 'terminai_queue_depth{service="deepseek"} 3' in lines
+        assert 'terminai_in_flight{service="deepseek"} 1' in lines
+        assert "terminai_cache_hits_total 2" in lines
+        assert "terminai_cache_hit_ratio 0.25" in lines
+        assert text.endswith("\n")
+
+    def test_render_escapes_label_values(self):
+        """Test that quotes and backslashes in label values are escaped"""
+        metrics = Metrics()
+        metrics.record_error('odd"service\\', Exception("boom"))
+
+        assert 'terminai_errors_total{service="odd\\"service\\\\",cause="other"} 1' in metrics.render()
+
+    def test_from_config(self):
+        """Test that configured buckets are sorted and used by new histograms"""
+        metrics = Metrics.from_config({"buckets": [5, 1]})
+        metrics.observe("deepseek", "extract", 2)
+
+        assert metrics.histogram("deepseek", "extract").buckets == (1.0, 5.0)
@@ -0,0 +1,138 @@
+"""
+Unit tests for resource blocking in service tabs
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from mcp_server.metrics import Metrics
+from mcp_server.resource_blocking import BlockingProfile, ResourceBlocker
+from mcp_server.tab_pool import PooledTab
+
+
+def make_route(url, resource_type):
+    route = AsyncMock()
+    route.request.url = url
+    route.request.resource_type = resource_type
+    return route
+
+
+def make_tab(key):
+    page = AsyncMock()
+    page.on = MagicMock()
+    tab = PooledTab(page)
+    tab.key = key
+    return tab
+
+
+class TestBlockingProfile:
+    """Test cases for BlockingProfile"""
+
+    def test_blocks_types_and_denied_urls(self):
+        """Test that blocked types and denied URLs are blocked and allowed URLs win"""
+        profile = BlockingProfile(
+            block_types=["image", "font"],
+            deny=["*://*.google-analytics.com/*"],
+            allow=["https://cdn.example.com/logo.*"]
+        )
+
+        assert profile.blocks("https://chat.example.com/a.png", "image") is True
+        assert profile.blocks("https://www.google-analytics.com/collect", "script") is True
+        assert profile.blocks("https://cdn.example.com/logo.png", "image") is False
+        assert profile.blocks("https://chat.example.com/api/chat", "fetch") is False
+
+    def test_documents_always_load(self):
+        """Test that the page itself is never blocked"""
+        profile = BlockingProfile(block_types=["document"], deny=["*"])
+
+        assert profile.blocks("https://chat.example.com/", "document") is False
+
+
+class TestResourceBlocker:
+    """Test cases for ResourceBlocker"""
+
+    def test_service_overrides_replace_defaults(self):
+        """Test that a service's own settings replace the default lists"""
+        blocker = ResourceBlocker({
+            "default": {"block_types": ["image", "media"], "deny": ["*tracker*"]},
+            "services": {"leonardo-ai": {"block_types": ["media"]}}
+        })
+
+        assert blocker.profile("leonardo-ai").blocks("https://x/a.png", "image") is False
+        assert blocker.profile("leonardo-ai").blocks("https://tracker/x.js", "script") is True
+        assert blocker.profile("deepseek").blocks("https://x/a.png", "image") is True
+
+    def test_disabled_without_anything_to_block(self):
+        """Test that no route is installed when the profiles block nothing"""
+        assert ResourceBlocker({"default": {"block_types": []}}).enabled is False
+        assert ResourceBlocker({"enabled": False}).enabled is False
+        assert ResourceBlocker().enabled is True
+
+    @pytest.mark.asyncio
+    async def test_route_is_installed_once_per_page(self):
+        """Test that leasing the same page again does not add another route"""
+        blocker = ResourceBlocker()
+        tab = make_tab("deepseek")
+
+        await blocker.apply(tab)
+        await blocker.apply(tab)
+        tab.page.route.assert_awaited_once()
+
+        tab.page = make_tab("deepseek").page
+        await blocker.apply(tab)
+        tab.page.route.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_requests_are_blocked_and_counted(self):
+        """Test that the route aborts blocked requests, continues others and counts both"""
+        blocker = ResourceBlocker({"services": {"kimi": {"block_types": []}}})
+        tab = make_tab("deepseek")
+        metrics = Metrics()
+
+        with patch('mcp_server.resource_blocking.metrics', metrics):
+            await blocker.apply(tab)
+            handle = tab.page.route.call_args.args[1]
+            on_response = tab.page.on.call_args.args[1]
+
+            image = make_route("https://chat.deepseek.com/a.png", "image")
+            await handle(image)
+            api = make_route("https://chat.deepseek.com/api/chat", "fetch")
+            await handle(api)
+            on_response(MagicMock(headers={"content-length": "1200"}))
+
+            # The tab now serves a service that loads images
+            tab.key = "kimi"
+            second = make_route("https://kimi.com/b.png", "image")
+            await handle(second)
+
+        image.abort.assert_awaited_once_with("blockedbyclient")
+        api.continue_.assert_awaited_once()
+        second.continue_.assert_awaited_once()
+        text = metrics.render()
+        assert 'terminai_blocked_requests_total{service="deepseek",type="image"} 1' in text
+        assert 'terminai_loaded_bytes_total{service="deepseek"} 1200' in text
+
+    @pytest.mark.asyncio
+    async def test_conversation_tab_uses_its_service(self):
+        """Test that a conversation tab gets its service's profile and metric label"""
+        blocker = ResourceBlocker({"services": {"leonardo-ai": {"block_types": ["media"]}}})
+        tab = make_tab("leonardo-ai#session-1")
+        metrics = Metrics()
+
+        with patch('mcp_server.resource_blocking.metrics', metrics):
+            await blocker.apply(tab)
+            handle = tab.page.route.call_args.args[1]
+            on_response = tab.page.on.call_args.args[1]
+
+            image = make_route("https://app.leonardo.ai/answer.png", "image")
+            await handle(image)
+            video = make_route("https://app.leonardo.ai/intro.mp4", "media")
+            await handle(video)
+            on_response(MagicMock(headers={"content-length": "800"}))
+
+        image.continue_.assert_awaited_once()
+        video.abort.assert_awaited_once_with("blockedbyclient")
+        text = metrics.render()
+        assert 'terminai_blocked_requests_total{service="leonardo-ai",type="media"} 1' in text
+        assert 'terminai_loaded_bytes_total{service="leonardo-ai"} 800' in text
+        assert "session-1" not in text
+        assert set(blocker._profiles) == {None, "leonardo-ai"}
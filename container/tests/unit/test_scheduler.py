@@ -0,0 +1,177 @@
+"""
+Unit tests for the request scheduler
+"""
+import asyncio
+import pytest
+
+from mcp_server.scheduler import RequestScheduler, SchedulerRejected, TokenBucket
+
+
+def make_scheduler(**limits):
+    """Create a scheduler with generous defaults overridden by the given limits"""
+    defaults = {"concurrency": 1, "queue_size": 4, "batch_queue_size": 2,
+                "rate_per_minute": 6000, "burst": 100, "max_queue_wait": 5}
+    defaults.update(limits)
+    return RequestScheduler({"default": defaults})
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket class"""
+    
+    def test_burst_then_delay(self):
+        """Test that tokens beyond the burst are reserved in the future"""
+        bucket = TokenBucket(rate_per_minute=60, burst=2)
+        
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    
+    def test_refund(self):
+        """Test that a refunded reservation frees the token again"""
+        bucket = TokenBucket(rate_per_minute=60, burst=1)
+        
+        bucket.reserve()
+        bucket.refund()
+        assert bucket.reserve() == 0
+
+
+class TestRequestScheduler:
+    """Test cases for RequestScheduler class"""
+    
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        """Test that run calls the function once admitted"""
+        scheduler = make_scheduler()
+        
+        async def ask(ai, question):
+            return f"{ai}: {question}"
+        
+        assert await scheduler.run("deepseek", ask, "deepseek", "Hi") == "deepseek: Hi"
+        assert scheduler.stats()["deepseek"]["completed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test that no more than the configured requests run at once"""
+        scheduler = make_scheduler(concurrency=2)
+        running = 0
+        peak = 0
+        
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        await asyncio.gather(*(scheduler.run("kimi", work) for _ in range(4)))
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_services_are_independent(self):
+        """Test that a busy service does not block another one"""
+        scheduler = make_scheduler()
+        
+        held = await scheduler.acquire("deepseek")
+        other = await asyncio.wait_for(scheduler.acquire("qwen"), timeout=1)
+        held.release()
+        other.release()
+    
+    @pytest.mark.asyncio
+    async def test_queue_full_is_rejected_with_429(self):
+        """Test fast rejection with Retry-After when the queue is full"""
+        scheduler = make_scheduler(queue_size=1)
+        
+        held = await scheduler.acquire("deepseek")
+        waiter = asyncio.create_task(scheduler.acquire("deepseek"))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(SchedulerRejected) as info:
+            await scheduler.acquire("deepseek")
+        assert info.value.status_code == 429
+        assert info.value.retry_after >= 1
+        
+        held.release()
+        (await waiter).release()
+    
+    @pytest.mark.asyncio
+    async def test_batch_has_smaller_queue(self):
+        """Test that batch requests are rejected before interactive ones"""
+        scheduler = make_scheduler(queue_size=2, batch_queue_size=1)
+        
+        held = await scheduler.acquire("deepseek")
+        first = asyncio.create_task(scheduler.acquire("deepseek", "batch"))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(SchedulerRejected):
+            await scheduler.acquire("deepseek", "batch")
+        interactive = asyncio.create_task(scheduler.acquire("deepseek", "interactive"))
+        await asyncio.sleep(0)
+        assert not interactive.done()
+        
+        held.release()
+        # Interactive requests are served first
+        (await interactive).release()
+        (await first).release()
+    
+    @pytest.mark.asyncio
+    async def test_interactive_served_before_batch(self):
+        """Test that waiting interactive requests overtake waiting batch requests"""
+        scheduler = make_scheduler()
+        order = []
+        
+        async def request(name, priority):
+            async with scheduler.slot("deepseek", priority):
+                order.append(name)
+        
+        held = await scheduler.acquire("deepseek")
+        tasks = [asyncio.create_task(request("batch", "batch"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("interactive", "interactive")))
+        await asyncio.sleep(0)
+        held.release()
+        await asyncio.gather(*tasks)
+        
+        assert order == ["interactive", "batch"]
+    
+    @pytest.mark.asyncio
+    async def test_queue_timeout_is_rejected_with_503(self):
+        """Test that a request waiting too long is rejected as unavailable"""
+        scheduler = make_scheduler(max_queue_wait=0.05)
+        
+        held = await scheduler.acquire("deepseek")
+        with pytest.raises(SchedulerRejected) as info:
+            await scheduler.acquire("deepseek")
+        assert info.value.status_code == 503
+        
+        held.release()
+        # The slot is usable again after the timed out waiter left
+        (await asyncio.wait_for(scheduler.acquire("deepseek"), timeout=1)).release()
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_is_rejected_with_429(self):
+        """Test that requests beyond the rate limit are refused when the wait is too long"""
+        scheduler = make_scheduler(rate_per_minute=1, burst=1, max_queue_wait=1)
+        
+        (await scheduler.acquire("deepseek")).release()
+        with pytest.raises(SchedulerRejected) as info:
+            await scheduler.acquire("deepseek")
+        assert info.value.status_code == 429
+        assert info.value.retry_after >= 59
+    
+    @pytest.mark.asyncio
+    async def test_unknown_priority(self):
+        """Test that an unknown priority class is refused"""
+        scheduler = make_scheduler()
+        
+        with pytest.raises(ValueError, match="Unknown priority"):
+            await scheduler.acquire("deepseek", "urgent")
+    
+    def test_per_service_overrides(self):
+        """Test that per-service settings override the defaults"""
+        scheduler = RequestScheduler({"default": {"queue_size": 3}, "services": {"perplexity": {"queue_size": 1}}})
+        
+        scheduler._lane("perplexity")
+        scheduler._lane("deepseek")
+        stats = scheduler.stats()
+        assert stats["perplexity"]["queue_size"] == 1
+        assert stats["deepseek"]["queue_size"] == 3
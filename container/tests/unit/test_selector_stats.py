@@ -0,0 +1,105 @@
+"""
+Unit tests for adaptive selector ordering
+"""
+import asyncio
+import json
+import threading
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from mcp_server.selector_stats import SelectorStats
+from mcp_server.handlers.deepseek_handler import DeepSeekHandler
+
+
+class TestSelectorStats:
+    """Test cases for selector statistics"""
+
+    def test_order_unchanged_without_stats(self):
+        """Test that selectors keep the configured order until one matches"""
+        stats = SelectorStats(path=None)
+
+        assert stats.order("kimi", "input", ["a", "b", "c"]) == ["a", "b", "c"]
+
+    def test_last_winner_first(self):
+        """Test that the last matching selector moves to the front"""
+        stats = SelectorStats(path=None)
+        for _ in range(3):
+            stats.record("kimi", "input", "b")
+        stats.record("kimi", "input", "c")
+
+        assert stats.order("kimi", "input", ["a", "b", "c"]) == ["c", "b", "a"]
+
+    def test_records_switches_and_misses(self):
+        """Test that selector drift and failed lookups are visible"""
+        stats = SelectorStats(path=None)
+        stats.record("kimi", "answer", ".old")
+        stats.record("kimi", "answer", ".new")
+        stats.record("kimi", "answer", None)
+
+        entry = stats.stats()["kimi"]["answer"]
+        assert entry["last"] == ".new"
+        assert entry["switches"] == 1
+        assert entry["misses"] == 1
+        assert entry["selectors"][".old"]["hits"] == 1
+
+    def test_persists_across_restarts(self, tmp_path):
+        """Test that saved statistics are loaded by a new instance"""
+        path = tmp_path / "stats" / "selector_stats.json"
+        stats = SelectorStats(path=str(path))
+        stats.record("kimi", "input", "b")
+        stats.save()
+
+        assert json.loads(path.read_text())["kimi"]["input"]["last"] == "b"
+        assert SelectorStats(path=str(path)).order("kimi", "input", ["a", "b"]) == ["b", "a"]
+
+    def test_saves_after_interval(self, tmp_path):
+        """Test that changes are written once the save interval has passed"""
+        path = tmp_path / "selector_stats.json"
+        stats = SelectorStats(path=str(path), save_interval=0)
+
+        stats.record("kimi", "input", "b")
+
+        assert path.exists()
+
+    @pytest.mark.asyncio
+    async def test_saves_off_the_event_loop(self, tmp_path):
+        """Test that a record made on the event loop writes the file in a worker thread"""
+        path = tmp_path / "selector_stats.json"
+        stats = SelectorStats(path=str(path), save_interval=0)
+        save = stats.save
+        threads = []
+
+        def tracked_save():
+            threads.append(threading.get_ident())
+            save()
+
+        with patch.object(stats, 'save', side_effect=tracked_save):
+            stats.record("kimi", "input", "b")
+            for _ in range(100):
+                if path.exists():
+                    break
+                await asyncio.sleep(0.01)
+
+        assert path.exists()
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_handler_records_matching_selectors(self):
+        """Test that a handler records the selectors that found the input and answer"""
+        stats = SelectorStats(path=None)
+        mock_page = AsyncMock()
+        mock_input = AsyncMock()
+
+        async def query_selector_all(selector):
+            return [mock_input] if selector == "#chat-input" else []
+
+        mock_page.query_selector_all.side_effect = query_selector_all
+        mock_page.evaluate.return_value = {"selector": ".chat-message:last-child", "text": "Answer"}
+
+        with patch('mcp_server.spec_handler.selector_stats', stats):
+            handler = DeepSeekHandler(mock_page)
+            assert await handler.ask_question("Hello") == "Answer"
+            reordered = DeepSeekHandler(mock_page)
+
+        assert reordered.input_selectors[0] == "#chat-input"
+        assert reordered.answer_selectors[0] == ".chat-message:last-child"
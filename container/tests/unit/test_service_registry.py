@@ -0,0 +1,111 @@
+"""
+Unit tests for the in-memory service registry
+"""
+import dataclasses
+import os
+import pytest
+import yaml
+from unittest.mock import patch
+
+from mcp_server.service_registry import ServiceRegistry
+
+
+CONFIG_YAML = """
+browser:
+  response_timeout: 60000
+ai_services:
+  - id: "deepseek"
+    name: "DeepSeek"
+    url: "https://chat.deepseek.com"
+    category: "domestic"
+    sequence: 1
+    capabilities: ["chat", "code"]
+  - id: "kimi"
+    name: "Kimi"
+    url: "https://kimi.com"
+    category: "domestic"
+    enabled: false
+"""
+
+
+def write_config(path, text, mtime):
+    """Write the config file with a distinct mtime so the change is detected"""
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+class TestServiceRegistry:
+    """Test cases for the service registry"""
+
+    @pytest.fixture
+    def config_path(self, tmp_path):
+        path = tmp_path / "config.yaml"
+        write_config(path, CONFIG_YAML, 1000)
+        return path
+
+    def test_indexes_enabled_services(self, config_path):
+        """Test that enabled services are available by id"""
+        registry = ServiceRegistry(str(config_path))
+
+        service = registry.get("deepseek")
+        assert service.name == "DeepSeek"
+        assert service.capabilities == ("chat", "code")
+        assert registry.get("kimi") is None
+        assert [s.id for s in registry.services()] == ["deepseek"]
+        assert registry.config()["browser"]["response_timeout"] == 60000
+
+    def test_parses_once_until_file_changes(self, config_path):
+        """Test that repeated lookups do not re-parse an unchanged file"""
+        registry = ServiceRegistry(str(config_path))
+
+        with patch('mcp_server.service_registry.yaml.safe_load', wraps=yaml.safe_load) as safe_load:
+            for _ in range(5):
+                registry.get("deepseek")
+                registry.services()
+            assert safe_load.call_count == 1
+
+            write_config(config_path, CONFIG_YAML.replace("DeepSeek", "DeepSeek Chat"), 2000)
+            assert registry.get("deepseek").name == "DeepSeek Chat"
+            assert safe_load.call_count == 2
+
+    def test_keeps_previous_services_on_broken_file(self, config_path):
+        """Test that a file that cannot be parsed keeps the loaded services"""
+        registry = ServiceRegistry(str(config_path))
+        registry.get("deepseek")
+
+        write_config(config_path, "ai_services: [unclosed", 2000)
+
+        assert registry.get("deepseek") is not None
+
+    def test_services_are_frozen(self, config_path):
+        """Test that shared service objects cannot be modified"""
+        service = ServiceRegistry(str(config_path)).get("deepseek")
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            service.url = "https://example.com"
+        assert not hasattr(service, "__dict__")
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file yields an empty configuration"""
+        registry = ServiceRegistry(str(tmp_path / "missing.yaml"))
+
+        assert registry.config() == {}
+        assert registry.services() == ()
+        assert registry.has_services() is False
+
+    def test_warm_up_services_by_priority_then_sequence(self, tmp_path):
+        """Test that services with a priority come first, then the rest in sequence order"""
+        path = tmp_path / "config.yaml"
+        services = [
+            {"id": "a", "sequence": 0}, {"id": "b", "sequence": 1, "priority": 2},
+            {"id": "c", "sequence": 2}, {"id": "d", "sequence": 3, "priority": 1},
+            {"id": "e", "sequence": -1}
+        ]
+        for service in services:
+            service.update(name=service["id"], url="https://example.com", category="test")
+        write_config(path, yaml.safe_dump({"ai_services": services}), 1000)
+
+        with patch('mcp_server.utils.service_registry', ServiceRegistry(str(path))):
+            from mcp_server.utils import load_warm_up_services
+            assert load_warm_up_services(4) == ["d", "b", "e", "a"]
+            assert load_warm_up_services(0) == []
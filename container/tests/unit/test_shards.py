@@ -0,0 +1,206 @@
+"""
+Unit tests for spreading AI services across several browsers
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from mcp_server.browser import BrowserManager
+from mcp_server.shards import BrowserShard, ShardRouter, endpoint_url
+
+SERVICES = [
+    "deepseek", "doubao", "yuanbao", "qwen", "ernie", "kimi",
+    "tongyi-wanxiang", "wenxin-yiyan", "chatgpt", "claude", "gemini",
+    "copilot", "perplexity", "grok", "pi", "quark", "huggingchat", "leonardo-ai"
+]
+
+
+def make_page(browser=None):
+    """Create a mock page that remembers its browser"""
+    page = AsyncMock()
+    page.on = MagicMock()
+    page.owner = browser
+    page.context.new_page = AsyncMock(side_effect=lambda: make_page(browser))
+    return page
+
+
+def make_browser():
+    """Create a mock browser with one open page"""
+    browser = AsyncMock()
+    browser.on = MagicMock()
+    browser.is_connected = MagicMock(return_value=True)
+    context = MagicMock()
+    context.pages = [make_page(browser)]
+    browser.contexts = [context]
+    return browser
+
+
+def make_shard(port):
+    browser = make_browser()
+    return BrowserShard(endpoint_url(port), browser, browser.contexts[0].pages[0])
+
+
+class TestShardRouter:
+    """Test cases for ShardRouter"""
+
+    def test_endpoint_url(self):
+        """Test that ports and host:port become CDP URLs"""
+        assert endpoint_url(9222) == "http://localhost:9222"
+        assert endpoint_url("9224") == "http://localhost:9224"
+        assert endpoint_url("host.containers.internal:9222") == "http://host.containers.internal:9222"
+        assert endpoint_url("http://10.0.0.2:9222") == "http://10.0.0.2:9222"
+
+    def test_hash_spreads_services_and_is_stable(self):
+        """Test that consistent hashing uses every browser and gives the same answer each time"""
+        router = ShardRouter("hash")
+        for port in (9222, 9224, 9226):
+            router.add(make_shard(port))
+
+        first = {ai: router.pick(ai).endpoint for ai in SERVICES}
+
+        other = ShardRouter("hash")
+        for port in (9222, 9224, 9226):
+            other.add(make_shard(port))
+        assert {ai: other.pick(ai).endpoint for ai in SERVICES} == first
+        assert len(set(first.values())) == 3
+
+    def test_removed_shard_only_moves_its_services(self):
+        """Test that removing a browser reassigns only the services it held"""
+        router = ShardRouter("hash")
+        shards = [make_shard(port) for port in (9222, 9224, 9226)]
+        for shard in shards:
+            router.add(shard)
+        before = {ai: router.pick(ai) for ai in SERVICES}
+
+        moved = router.remove(shards[1])
+        after = {ai: router.pick(ai) for ai in SERVICES}
+
+        assert sorted(moved) == sorted(ai for ai, shard in before.items() if shard is shards[1])
+        for ai in SERVICES:
+            assert after[ai] is not shards[1]
+            if ai not in moved:
+                assert after[ai] is before[ai]
+        assert len(router) == 2
+
+    def test_least_load_balances_assignments(self):
+        """Test that least load gives each browser an equal share"""
+        router = ShardRouter("least_load")
+        shards = [make_shard(port) for port in (9222, 9224)]
+        for shard in shards:
+            router.add(shard)
+
+        for ai in SERVICES:
+            router.pick(ai)
+
+        assert [len(s["keys"]) for s in router.stats()["shards"]] == [9, 9]
+
+    def test_no_live_shard(self):
+        """Test that picking without a live browser fails clearly"""
+        router = ShardRouter()
+        shard = make_shard(9222)
+        router.add(shard)
+        router.remove(shard)
+
+        with pytest.raises(RuntimeError, match="Browser page not available"):
+            router.pick("deepseek")
+
+    def test_unknown_strategy(self):
+        """Test that an unknown strategy is rejected"""
+        with pytest.raises(ValueError):
+            ShardRouter("random")
+
+
+class TestBrowserManagerSharding:
+    """Test cases for BrowserManager attached to several browsers"""
+
+    async def connect(self, manager, browsers):
+        """Connect the manager to mock browsers, one per endpoint"""
+        with patch('mcp_server.browser.async_playwright') as mock_async_playwright:
+            playwright = AsyncMock()
+            playwright.chromium.connect_over_cdp.side_effect = browsers
+            mock_async_playwright.return_value.start = AsyncMock(return_value=playwright)
+            await manager.connect(9222, endpoints=[9222, 9224, 9226])
+            return playwright
+
+    @pytest.mark.asyncio
+    async def test_connect_skips_unreachable_endpoint(self):
+        """Test that browsers that answer are used when another one does not"""
+        manager = BrowserManager()
+        browsers = [make_browser(), ConnectionError("refused"), make_browser()]
+
+        playwright = await self.connect(manager, browsers)
+
+        assert len(manager.shard_router) == 2
+        assert manager.browser is browsers[0]
+        assert manager.is_connected() is True
+        endpoints = [call.args[0] for call in playwright.chromium.connect_over_cdp.call_args_list]
+        assert endpoints == ["http://localhost:9222", "http://localhost:9224", "http://localhost:9226"]
+
+    @pytest.mark.asyncio
+    async def test_questions_use_the_assigned_browser(self):
+        """Test that each service's tab is opened in the browser it is assigned to"""
+        manager = BrowserManager()
+        await self.connect(manager, [make_browser(), make_browser(), make_browser()])
+        handler = AsyncMock()
+        handler.ask_question.return_value = "answer"
+
+        with patch('mcp_server.browser.create_ai_handler', return_value=handler) as create_handler:
+            for ai in SERVICES[:6]:
+                await manager.ask_ai(ai, "question")
+
+        for call in create_handler.call_args_list:
+            ai, page = call.args
+            assert page.owner is manager.shard_router.assigned(ai).browser
+        stats = manager.tab_stats()
+        assert sum(len(shard["keys"]) for shard in stats["shards"]) == 6
+        assert stats["open_tabs"] == 6
+
+    @pytest.mark.asyncio
+    async def test_disconnected_browser_leaves_rotation(self):
+        """Test that a browser that disconnects no longer receives services"""
+        manager = BrowserManager()
+        browsers = [make_browser(), make_browser(), make_browser()]
+        await self.connect(manager, browsers)
+        for ai in SERVICES:
+            manager.shard_router.pick(ai)
+
+        # Fire the disconnected handler registered for the first browser
+        event, on_disconnected = browsers[0].on.call_args.args
+        assert event == "disconnected"
+        on_disconnected(browsers[0])
+
+        assert len(manager.shard_router) == 2
+        assert all(manager.shard_router.pick(ai).browser is not browsers[0] for ai in SERVICES)
+        # The primary browser moves to a live one
+        assert manager.browser is browsers[1]
+
+    @pytest.mark.asyncio
+    async def test_failed_question_on_dead_browser_drops_it(self):
+        """Test that a browser found dead after a failure is removed from rotation"""
+        manager = BrowserManager()
+        browsers = [make_browser(), make_browser(), make_browser()]
+        await self.connect(manager, browsers)
+        shard = manager.shard_router.pick("deepseek")
+        # The heartbeat sent after the failure gets no answer
+        shard.browser.new_browser_cdp_session.side_effect = RuntimeError("Target closed")
+        handler = AsyncMock()
+        handler.open_service.side_effect = RuntimeError("Target closed")
+
+        with patch('mcp_server.browser.create_ai_handler', return_value=handler):
+            with pytest.raises(RuntimeError):
+                await manager.ask_ai("deepseek", "question")
+
+        assert shard.alive is False
+        assert manager.shard_router.pick("deepseek") is not shard
+
+    @pytest.mark.asyncio
+    async def test_close_closes_every_browser(self):
+        """Test that closing the manager closes all attached browsers"""
+        manager = BrowserManager()
+        browsers = [make_browser(), make_browser(), make_browser()]
+        await self.connect(manager, browsers)
+
+        await manager.close()
+
+        for browser in browsers:
+            browser.close.assert_called_once()
+        assert manager.shard_router is None
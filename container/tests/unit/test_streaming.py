@@ -0,0 +1,89 @@
+"""
+Unit tests for answer streaming
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from mcp_server.streaming import AnswerStream, BINDING_NAME
+
+
+async def started_stream(mock_page):
+    """Start a stream and return it with the exposed emit callback"""
+    stream = AnswerStream(mock_page, [".answer"])
+    await stream.start()
+    name, emit = mock_page.expose_binding.call_args.args
+    assert name == BINDING_NAME
+    return stream, emit
+
+
+class TestAnswerStream:
+    """Test cases for AnswerStream class"""
+    
+    @pytest.mark.asyncio
+    async def test_start_installs_observer(self):
+        """Test that starting a stream injects the observer with the answer selectors"""
+        mock_page = AsyncMock()
+        stream, _ = await started_stream(mock_page)
+        
+        script, args = mock_page.evaluate.call_args.args
+        assert "MutationObserver" in script
+        assert args["answer"] == [".answer"]
+        assert args["token"] == stream.token
+    
+    @pytest.mark.asyncio
+    async def test_binding_is_exposed_once_per_page(self):
+        """Test that several streams on one page share the exposed binding"""
+        mock_page = AsyncMock()
+        await AnswerStream(mock_page, [".answer"]).start()
+        await AnswerStream(mock_page, [".answer"]).start()
+        
+        assert mock_page.expose_binding.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_follow_yields_deltas(self):
+        """Test that full-text updates from the page become deltas"""
+        mock_page = AsyncMock()
+        stream, emit = await started_stream(mock_page)
+        
+        async def generate():
+            emit(None, stream.token, "Hello")
+            await asyncio.sleep(0.01)
+            emit(None, stream.token, "Hello, world")
+            await asyncio.sleep(0.01)
+            emit(None, stream.token, "Rewritten")
+            return "Rewritten"
+        
+        task = asyncio.create_task(generate())
+        events = [event async for event in stream.follow(task)]
+        
+        assert events == [
+            {"event": "delta", "text": "Hello"},
+            {"event": "delta", "text": ", world"},
+            {"event": "replace", "text": "Rewritten"},
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_updates_for_other_tokens_are_ignored(self):
+        """Test that a stream only receives updates for its own token"""
+        mock_page = AsyncMock()
+        stream, emit = await started_stream(mock_page)
+        
+        async def generate():
+            emit(None, "someone-else", "Not mine")
+            return ""
+        
+        task = asyncio.create_task(generate())
+        assert [event async for event in stream.follow(task)] == []
+    
+    @pytest.mark.asyncio
+    async def test_stop_disconnects_observer(self):
+        """Test that stopping a stream disconnects the in-page observer"""
+        mock_page = AsyncMock()
+        stream, emit = await started_stream(mock_page)
+        
+        await stream.stop()
+        emit(None, stream.token, "Late text")
+        
+        assert mock_page.evaluate.call_args.args[1] == stream.token
+        assert stream._queue.empty()
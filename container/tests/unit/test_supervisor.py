@@ -0,0 +1,258 @@
+"""
+Unit tests for the CDP connection supervisor
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from mcp_server.browser import BrowserManager
+from mcp_server.supervisor import ConnectionSupervisor, INITIAL_RECONNECT_DELAY
+from mcp_server.tab_pool import TabPool
+
+
+def make_page():
+    page = AsyncMock()
+    page.on = MagicMock()
+    page.context.new_page = AsyncMock(side_effect=make_page)
+    return page
+
+
+def make_browser():
+    """Create a mock browser whose CDP session answers heartbeats"""
+    browser = AsyncMock()
+    browser.on = MagicMock()
+    context = MagicMock()
+    context.pages = [make_page()]
+    browser.contexts = [context]
+    browser.new_browser_cdp_session = AsyncMock(return_value=AsyncMock())
+    return browser
+
+
+def disconnect(browser):
+    """Fire the browser's disconnected event the way Playwright would"""
+    for call in browser.on.call_args_list:
+        if call.args[0] == "disconnected":
+            call.args[1](browser)
+
+
+async def wait_until(condition, timeout=2.0):
+    """Let the supervisor loop run until the condition holds"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestConnectionSupervisor:
+    """Test cases for ConnectionSupervisor"""
+
+    def test_from_config(self):
+        """Test that heartbeat settings are read from the browser config"""
+        supervisor = ConnectionSupervisor.from_config(
+            {"heartbeat_interval": 3, "heartbeat_timeout": 1, "reconnect_max_backoff": 8}
+        )
+        assert (supervisor.interval, supervisor.timeout, supervisor.max_backoff) == (3.0, 1.0, 8.0)
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_reuses_cdp_session(self):
+        """Test that heartbeats send Browser.getVersion over one CDP session"""
+        browser = make_browser()
+        supervisor = ConnectionSupervisor()
+        supervisor.watch("http://localhost:9222")
+        supervisor.start(lambda endpoint: browser, AsyncMock(), MagicMock())
+
+        assert await supervisor.check("http://localhost:9222") is True
+        assert await supervisor.check("http://localhost:9222") is True
+
+        browser.new_browser_cdp_session.assert_called_once()
+        session = browser.new_browser_cdp_session.return_value
+        session.send.assert_called_with("Browser.getVersion")
+        await supervisor.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_heartbeat_reconnects_with_backoff(self):
+        """Test that a lost endpoint is reconnected, backing off between failed attempts"""
+        browser = make_browser()
+        browser.new_browser_cdp_session.side_effect = RuntimeError("Target closed")
+        reconnect = AsyncMock(side_effect=[ConnectionError("refused"), ConnectionError("refused"), None])
+        lost = MagicMock()
+        supervisor = ConnectionSupervisor(interval=60, max_backoff=1)
+        supervisor.watch("http://localhost:9222")
+        supervisor.start(lambda endpoint: browser, reconnect, lost)
+
+        with patch('mcp_server.supervisor.INITIAL_RECONNECT_DELAY', 0.01):
+            assert await supervisor.check("http://localhost:9222") is False
+            lost.assert_called_once_with("http://localhost:9222")
+            link = supervisor.links["http://localhost:9222"]
+            await wait_until(lambda: link.healthy)
+
+        assert reconnect.await_count == 3
+        assert link.reconnects == 1
+        assert supervisor.stats()["endpoints"][0]["healthy"] is True
+        await supervisor.stop()
+
+    @pytest.mark.asyncio
+    async def test_backoff_is_capped(self):
+        """Test that the delay between reconnect attempts doubles up to the maximum"""
+        supervisor = ConnectionSupervisor(max_backoff=2)
+        supervisor._reconnect = AsyncMock(side_effect=ConnectionError("refused"))
+        supervisor.watch("http://localhost:9222")
+        link = supervisor.links["http://localhost:9222"]
+        link.healthy = False
+
+        delays = []
+        for _ in range(5):
+            await supervisor._try_reconnect(link)
+            delays.append(link.retry_delay)
+
+        assert delays == [INITIAL_RECONNECT_DELAY * 2, 2, 2, 2, 2]
+        assert link.healthy is False
+
+
+class TestTabPoolReattach:
+    """Test cases for TabPool.reattach"""
+
+    @pytest.mark.asyncio
+    async def test_reattach_adopts_open_pages(self):
+        """Test that tabs adopt the pages still open in Chrome instead of leaving them behind"""
+        old_pages = [make_page(), make_page(), make_page()]
+        old_pages[0].url = "https://chat.deepseek.com/a/chat/s/1"
+        old_pages[1].url = "https://kimi.com/chat/2"
+        old_pages[2].url = "https://chatgpt.com/"
+        pool = TabPool(AsyncMock(side_effect=old_pages), max_tabs=4)
+        for key in ("deepseek", "kimi", "chatgpt"):
+            async with pool.lease(key) as tab:
+                tab.ready = True
+
+        # The new connection sees the same Chrome tabs, the kimi one on another thread
+        seed = make_page()
+        seed.url = "about:blank"
+        deepseek_page, kimi_page, other = make_page(), make_page(), make_page()
+        deepseek_page.url = "https://chat.deepseek.com/a/chat/s/1"
+        kimi_page.url = "https://kimi.com/chat/3"
+        other.url = "https://example.com/"
+        fresh = make_page()
+        pool.reattach(AsyncMock(return_value=fresh), [seed], [seed, other, kimi_page, deepseek_page])
+
+        assert [tab["key"] for tab in pool.stats()["tabs"]] == ["deepseek", "kimi", "chatgpt"]
+        async with pool.lease("deepseek") as tab:
+            assert tab.page is deepseek_page
+            assert tab.owned is True
+            assert tab.ready is False
+        async with pool.lease("kimi") as tab:
+            assert tab.page is kimi_page
+            assert tab.owned is True
+        async with pool.lease("chatgpt") as tab:
+            # Closed in the meantime: takes the seed page
+            assert tab.page is seed
+            assert tab.owned is False
+        assert all(tab.page is not other for tab in pool._tabs.values())
+
+    @pytest.mark.asyncio
+    async def test_reattach_without_open_pages_opens_new_pages(self):
+        """Test that tabs whose pages are gone keep their keys and open a new page on their next lease"""
+        old_pages = [make_page(), make_page()]
+        pool = TabPool(AsyncMock(side_effect=old_pages), max_tabs=2)
+        for key in ("deepseek", "kimi"):
+            async with pool.lease(key) as tab:
+                tab.ready = True
+
+        seed = make_page()
+        fresh = make_page()
+        pool.reattach(AsyncMock(return_value=fresh), [seed], [seed])
+
+        async with pool.lease("kimi") as tab:
+            assert tab.page is seed
+        async with pool.lease("deepseek") as tab:
+            assert tab.page is fresh
+            assert tab.owned is True
+
+
+class TestBrowserManagerSupervision:
+    """Test cases for the supervised connection of BrowserManager"""
+
+    async def connect(self, manager, browsers):
+        """Connect the manager to mock browsers through one Playwright driver"""
+        with patch('mcp_server.browser.async_playwright') as mock_async_playwright:
+            playwright = AsyncMock()
+            playwright.chromium.connect_over_cdp.side_effect = browsers
+            mock_async_playwright.return_value.start = AsyncMock(return_value=playwright)
+            await manager.connect(9222)
+            return mock_async_playwright
+
+    @pytest.mark.asyncio
+    async def test_driver_is_started_once(self):
+        """Test that reconnecting via connect() reuses the Playwright driver"""
+        manager = BrowserManager()
+        first, second = make_browser(), make_browser()
+        with patch('mcp_server.browser.async_playwright') as mock_async_playwright:
+            playwright = AsyncMock()
+            playwright.chromium.connect_over_cdp.side_effect = [first, second]
+            mock_async_playwright.return_value.start = AsyncMock(return_value=playwright)
+            await manager.connect(9222)
+            await manager.connect(9222)
+
+        mock_async_playwright.return_value.start.assert_called_once()
+        first.close.assert_called_once()
+        assert manager.browser is second
+        await manager.close()
+        playwright.stop.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_event_reconnects_and_reattaches_tabs(self):
+        """Test that a disconnected browser is replaced and pooled tabs move to the new one"""
+        manager = BrowserManager()
+        old, new = make_browser(), make_browser()
+        await self.connect(manager, [old])
+        manager.playwright.chromium.connect_over_cdp.side_effect = [new]
+        async with manager._lease("deepseek"):
+            pass
+        assert manager.is_connected() is True
+
+        disconnect(old)
+        assert manager.is_connected() is False
+        await wait_until(manager.is_connected)
+
+        assert manager.browser is new
+        async with manager._lease("deepseek") as tab:
+            assert tab.page is new.contexts[0].pages[0]
+        assert manager.connection_stats()["endpoints"][0]["reconnects"] == 1
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_reconnect_adopts_every_pooled_tab(self):
+        """Test that a reconnect to a Chrome that kept running re-attaches all pooled tabs"""
+        manager = BrowserManager()
+        old, new = make_browser(), make_browser()
+        await self.connect(manager, [old])
+        pages = {}
+        for ai, url in (("deepseek", "https://chat.deepseek.com/"), ("kimi", "https://kimi.com/")):
+            async with manager._lease(ai) as tab:
+                tab.page.url = url
+                reopened = make_page()
+                reopened.url = url
+                pages[ai] = reopened
+        new.contexts[0].pages = [new.contexts[0].pages[0], pages["kimi"], pages["deepseek"]]
+        manager.playwright.chromium.connect_over_cdp.side_effect = [new]
+
+        disconnect(old)
+        await wait_until(manager.is_connected)
+
+        for ai, page in pages.items():
+            async with manager._lease(ai) as tab:
+                assert tab.page is page
+        new.contexts[0].pages[0].context.new_page.assert_not_called()
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_detached_browser_does_not_report_loss(self):
+        """Test that closing the manager does not trigger a reconnect"""
+        manager = BrowserManager()
+        browser = make_browser()
+        await self.connect(manager, [browser])
+
+        await manager.close()
+        disconnect(browser)
+
+        assert manager.is_connected() is False
+        assert manager.connection_stats()["endpoints"] == []
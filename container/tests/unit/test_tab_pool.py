@@ -0,0 +1,167 @@
+"""
+Unit tests for TabPool class
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from mcp_server.tab_pool import TabPool
+
+
+def make_page():
+    """Create a mock page with a synchronous event registration"""
+    page = AsyncMock()
+    page.on = MagicMock()
+    return page
+
+
+class TestTabPool:
+    """Test cases for TabPool class"""
+    
+    @pytest.mark.asyncio
+    async def test_seed_page_is_reused_first(self):
+        """Test that the page we connected to is used before opening new tabs"""
+        seed = make_page()
+        factory = AsyncMock(side_effect=make_page)
+        pool = TabPool(factory, max_tabs=2, seed_pages=[seed])
+        
+        async with pool.lease("deepseek") as tab:
+            assert tab.page is seed
+        
+        factory.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_same_key_reuses_ready_tab(self):
+        """Test that repeat leases for a service get the same loaded tab"""
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=2)
+        
+        async with pool.lease("deepseek") as tab:
+            tab.ready = True
+            first_page = tab.page
+        
+        async with pool.lease("deepseek") as tab:
+            assert tab.page is first_page
+            assert tab.ready is True
+            assert tab.uses == 2
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test that the least recently used tab is reassigned when the budget is full"""
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=2)
+        
+        async with pool.lease("deepseek") as tab:
+            tab.ready = True
+            deepseek_page = tab.page
+        async with pool.lease("qwen") as tab:
+            tab.ready = True
+        async with pool.lease("kimi") as tab:
+            # DeepSeek was used least recently, so its page is reused for Kimi
+            assert tab.page is deepseek_page
+            assert tab.ready is False
+        
+        assert len(pool) == 2
+        keys = [t["key"] for t in pool.stats()["tabs"]]
+        assert keys == ["qwen", "kimi"]
+    
+    @pytest.mark.asyncio
+    async def test_different_services_run_in_parallel(self):
+        """Test that leases for different services do not block each other"""
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=2)
+        both_leased = asyncio.Event()
+        active = []
+        
+        async def use(key):
+            async with pool.lease(key):
+                active.append(key)
+                if len(active) == 2:
+                    both_leased.set()
+                await asyncio.wait_for(both_leased.wait(), timeout=1)
+        
+        await asyncio.gather(use("deepseek"), use("qwen"))
+        assert sorted(active) == ["deepseek", "qwen"]
+    
+    @pytest.mark.asyncio
+    async def test_same_service_is_serialized(self):
+        """Test that two leases for one service never hold the tab at once"""
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=2)
+        holders = 0
+        max_holders = 0
+        
+        async def use():
+            nonlocal holders, max_holders
+            async with pool.lease("deepseek"):
+                holders += 1
+                max_holders = max(max_holders, holders)
+                await asyncio.sleep(0.01)
+                holders -= 1
+        
+        await asyncio.gather(use(), use(), use())
+        assert max_holders == 1
+    
+    @pytest.mark.asyncio
+    async def test_waits_when_all_tabs_are_leased(self):
+        """Test that a new service waits for a free tab instead of exceeding the budget"""
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=1)
+        
+        lease = await pool.acquire("deepseek")
+        waiter = asyncio.create_task(pool.acquire("qwen"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        
+        await pool.release(lease)
+        tab = await asyncio.wait_for(waiter, timeout=1)
+        assert tab.key == "qwen"
+        assert len(pool) == 1
+        await pool.release(tab)
+    
+    @pytest.mark.asyncio
+    async def test_failure_marks_tab_not_ready(self):
+        """Test that an error during a lease forces navigation next time"""
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=1)
+        
+        with pytest.raises(RuntimeError):
+            async with pool.lease("deepseek") as tab:
+                tab.ready = True
+                raise RuntimeError("boom")
+        
+        async with pool.lease("deepseek") as tab:
+            assert tab.ready is False
+    
+    @pytest.mark.asyncio
+    async def test_close_only_closes_owned_tabs(self):
+        """Test that closing the pool leaves the user's original tab open"""
+        seed = make_page()
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=2, seed_pages=[seed])
+        
+        async with pool.lease("deepseek"):
+            pass
+        async with pool.lease("qwen") as tab:
+            opened = tab.page
+        
+        await pool.close()
+        
+        seed.close.assert_not_called()
+        opened.close.assert_called_once()
+        assert len(pool) == 0
+    
+    @pytest.mark.asyncio
+    async def test_discard_frees_the_tab(self):
+        """Test that a discarded tab is closed if owned, kept idle if not, and never while leased"""
+        seed = make_page()
+        pool = TabPool(AsyncMock(side_effect=make_page), max_tabs=2, seed_pages=[seed])
+        
+        async with pool.lease("deepseek#a"):
+            pass
+        async with pool.lease("deepseek#b") as tab:
+            opened = tab.page
+            assert await pool.discard("deepseek#b") is False
+        
+        assert await pool.discard("deepseek#b") is True
+        assert await pool.discard("deepseek#a") is True
+        assert await pool.discard("deepseek#a") is False
+        
+        opened.close.assert_called_once()
+        seed.close.assert_not_called()
+        assert len(pool) == 1
+        async with pool.lease("kimi") as tab:
+            assert tab.page is seed
+            assert tab.ready is False
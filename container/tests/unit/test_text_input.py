@@ -0,0 +1,79 @@
+"""
+Unit tests for inserting long questions into chat inputs
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from mcp_server.text_input import insert_text, visible_length
+
+QUESTION = "Traceback (most recent call last):\n" + "  File \"app.py\", line 1\n" * 100
+
+
+def make_input(lengths):
+    """Mock input element whose length check returns the given values in turn"""
+    element = AsyncMock()
+    element.evaluate.side_effect = lambda script, *args: lengths.pop(0) if "replace" in script else None
+    return element
+
+
+def make_page():
+    page = MagicMock()
+    page.keyboard.insert_text = AsyncMock()
+    return page
+
+
+class TestInsertText:
+    """Test cases for insert_text"""
+
+    def test_visible_length_ignores_whitespace(self):
+        """Test that whitespace editors may fold is not counted"""
+        assert visible_length("a b\n\n c\t") == 3
+
+    @pytest.mark.asyncio
+    async def test_insert_text_uses_one_cdp_call(self):
+        """Test that the text is inserted in one step into the cleared, focused input"""
+        page = make_page()
+        element = make_input([visible_length(QUESTION)])
+
+        await insert_text(page, element, QUESTION, "insert_text")
+
+        element.fill.assert_called_once_with("")
+        element.focus.assert_called_once()
+        page.keyboard.insert_text.assert_called_once_with(QUESTION)
+
+    @pytest.mark.asyncio
+    async def test_paste_dispatches_a_paste_event(self):
+        """Test that paste hands the text to the page instead of typing it"""
+        page = make_page()
+        element = make_input([visible_length(QUESTION)])
+
+        await insert_text(page, element, QUESTION, "paste")
+
+        script, text = element.evaluate.call_args_list[0].args
+        assert "ClipboardEvent('paste'" in script
+        assert text == QUESTION
+        page.keyboard.insert_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_truncated_insert_falls_back_to_fill(self):
+        """Test that an input missing part of the text is filled instead"""
+        page = make_page()
+        element = make_input([100, visible_length(QUESTION)])
+
+        await insert_text(page, element, QUESTION, "insert_text")
+
+        assert element.fill.call_args_list[-1].args == (QUESTION,)
+
+    @pytest.mark.asyncio
+    async def test_text_that_never_arrives_raises(self):
+        """Test that the question is not sent when the input stays short"""
+        element = make_input([100, 100])
+
+        with pytest.raises(RuntimeError, match=f"Only 100 of {visible_length(QUESTION)} characters"):
+            await insert_text(make_page(), element, QUESTION, "paste")
+
+    @pytest.mark.asyncio
+    async def test_unknown_mode(self):
+        """Test that unknown insert modes are rejected"""
+        with pytest.raises(ValueError, match="Unknown insert mode"):
+            await insert_text(make_page(), AsyncMock(), QUESTION, "type")
@@ -0,0 +1,138 @@
+"""
+Unit tests for request correlation ids and tracing spans
+"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from mcp_server.tracing import STATUS_ERROR, Tracer, correlation_id
+
+
+def read_spans(path):
+    """Return the spans of an OTLP JSON lines file, one per line"""
+    spans = []
+    for line in path.read_text().splitlines():
+        request = json.loads(line)
+        resource_spans = request["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"][0]["key"] == "service.name"
+        span = resource_spans["scopeSpans"][0]["spans"][0]
+        span["attributes"] = {a["key"]: list(a["value"].values())[0] for a in span["attributes"]}
+        spans.append(span)
+    return spans
+
+
+class TestTracer:
+    """Test cases for Tracer"""
+
+    def test_nested_spans_share_trace(self, tmp_path):
+        """Test that child spans point at their parent and are written when they end"""
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(str(path))
+
+        with tracer.span("request", {"ai.service": "deepseek", "attempt": 1}):
+            with tracer.span("child"):
+                pass
+        tracer.close()
+
+        child, root = read_spans(path)
+        assert (child["name"], root["name"]) == ("child", "request")
+        assert child["traceId"] == root["traceId"]
+        assert child["parentSpanId"] == root["spanId"]
+        assert "parentSpanId" not in root
+        assert root["attributes"] == {"ai.service": "deepseek", "attempt": "1"}
+        assert int(root["endTimeUnixNano"]) >= int(child["endTimeUnixNano"])
+
+    def test_correlation_id_is_recorded(self, tmp_path):
+        """Test that a 32 hex digit request id becomes the trace id"""
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(str(path))
+        request_id = "0af7651916cd43dd8448eb211c80319c"
+
+        token = correlation_id.set(request_id)
+        try:
+            with tracer.span("request"):
+                pass
+        finally:
+            correlation_id.reset(token)
+        tracer.close()
+
+        (span,) = read_spans(path)
+        assert span["traceId"] == request_id
+        assert span["attributes"]["request.id"] == request_id
+
+    def test_failed_span_has_error_status(self, tmp_path):
+        """Test that an exception marks the span as failed and is re-raised"""
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(str(path))
+
+        with pytest.raises(RuntimeError):
+            with tracer.span("submit"):
+                raise RuntimeError("Target closed")
+        tracer.close()
+
+        (span,) = read_spans(path)
+        assert span["status"] == {"code": STATUS_ERROR, "message": "Target closed"}
+
+    def test_wrap_is_a_no_op_without_export(self):
+        """Test that pages are used as they are when spans are not written"""
+        page = AsyncMock()
+        assert Tracer().wrap(page) is page
+
+    @pytest.mark.asyncio
+    async def test_wrapped_page_traces_playwright_calls(self, tmp_path):
+        """Test that page and element calls become client spans under the current span"""
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(str(path))
+        element = AsyncMock()
+        page = AsyncMock()
+        page.on = MagicMock()
+        page.query_selector_all.return_value = [element]
+        traced = tracer.wrap(page)
+
+        with tracer.span("handler.fill"):
+            (input_element,) = await traced.query_selector_all("textarea")
+            await input_element.fill("Hello")
+            traced.on("close", print)
+        tracer.close()
+
+        element.fill.assert_called_once_with("Hello")
+        page.on.assert_called_once()
+        assert traced == page
+        spans = read_spans(path)
+        assert [span["name"] for span in spans] == [
+            "playwright.query_selector_all", "playwright.fill", "handler.fill"
+        ]
+        assert spans[0]["parentSpanId"] == spans[1]["parentSpanId"] == spans[2]["spanId"]
+
+
+class TestRequestTracing:
+    """Test cases for the request tracing middleware"""
+
+    def test_request_id_is_echoed_and_traced(self, test_client, tmp_path):
+        """Test that the client's X-Request-ID is returned and recorded on the request's spans"""
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(str(path))
+        mock_browser_manager = AsyncMock()
+        mock_browser_manager.is_connected = MagicMock(return_value=True)
+        mock_browser_manager.ask_ai.return_value = "Mocked AI response"
+
+        with patch('mcp_server.main.browser_manager', mock_browser_manager), \
+             patch('mcp_server.main.tracer', tracer), patch('mcp_server.tracing.tracer', tracer):
+            response = test_client.post("/ask?ai=deepseek&question=Hello", headers={"X-Request-ID": "req-42"})
+        tracer.close()
+
+        assert response.headers["x-request-id"] == "req-42"
+        spans = {span["name"]: span for span in read_spans(path)}
+        root = spans["POST /ask"]
+        assert root["attributes"]["request.id"] == "req-42"
+        assert root["attributes"]["http.status_code"] == "200"
+        assert spans["scheduler.acquire"]["parentSpanId"] == root["spanId"]
+        assert spans["scheduler.acquire"]["attributes"]["request.id"] == "req-42"
+
+    def test_request_id_is_generated(self, test_client):
+        """Test that requests without an id get a fresh one"""
+        first = test_client.get("/").headers["x-request-id"]
+        second = test_client.get("/").headers["x-request-id"]
+
+        assert len(first) == 32
+        assert first != second
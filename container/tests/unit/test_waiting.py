@@ -0,0 +1,120 @@
+"""
+Unit tests for condition-based waiting helpers
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from mcp_server.latency import LatencyTracker
+from mcp_server.waiting import wait_for_answer, wait_for_input_ready
+from mcp_server.handlers.deepseek_handler import DeepSeekHandler
+
+
+class TestWaiting:
+    """Test cases for waiting helpers"""
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_input_ready_combines_selectors(self):
+        """Test that all input selectors are waited for in one call"""
+        mock_page = AsyncMock()
+        
+        ready = await wait_for_input_ready(mock_page, ["textarea", "#chat-input"], 5000)
+        
+        assert ready is True
+        mock_page.wait_for_selector.assert_called_once_with("textarea, #chat-input", state="visible", timeout=5000)
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_input_ready_timeout(self):
+        """Test that a missing input is reported instead of raised"""
+        mock_page = AsyncMock()
+        mock_page.wait_for_selector.side_effect = PlaywrightTimeoutError("timeout")
+        
+        assert await wait_for_input_ready(mock_page, ["textarea"], 100) is False
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_answer_polls_in_page(self):
+        """Test that completion is detected by an in-page predicate with the given timeout"""
+        mock_page = AsyncMock()
+        
+        done = await wait_for_answer(mock_page, [".answer"], 45000, stop_selectors=[".stop"], done_selectors=[".copy"])
+        
+        assert done is True
+        mock_page.wait_for_timeout.assert_not_called()
+        kwargs = mock_page.wait_for_function.call_args.kwargs
+        assert kwargs["timeout"] == 45000
+        assert kwargs["arg"]["answer"] == [".answer"]
+        assert kwargs["arg"]["stop"] == [".stop"]
+        assert kwargs["arg"]["done"] == [".copy"]
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_answer_timeout_returns_false(self):
+        """Test that a timeout lets the caller extract the partial answer"""
+        mock_page = AsyncMock()
+        mock_page.wait_for_function.side_effect = PlaywrightTimeoutError("timeout")
+        
+        assert await wait_for_answer(mock_page, [".answer"], 100) is False
+
+
+class TestResponseTimeout:
+    """Test cases for per-service response timeouts"""
+    
+    def test_service_timeout_is_used(self):
+        """Test that the service's own timeout is used when it is below the limit"""
+        handler = DeepSeekHandler(AsyncMock())
+        
+        with patch('mcp_server.ai_handler_base.load_config', return_value={"browser": {"response_timeout": 60000}}):
+            assert handler.get_response_timeout() == handler.service.response_timeout
+    
+    def test_browser_timeout_is_upper_bound(self):
+        """Test that browser.response_timeout caps the service timeout"""
+        handler = DeepSeekHandler(AsyncMock())
+        
+        with patch('mcp_server.ai_handler_base.load_config', return_value={"browser": {"response_timeout": 5000}}):
+            assert handler.get_response_timeout() == 5000
+    
+    def test_learned_deadline_replaces_service_timeout(self):
+        """Test that recent completion times set the deadline, still capped by browser.response_timeout"""
+        handler = DeepSeekHandler(AsyncMock())
+        tracker = LatencyTracker(min_samples=3, margin=0.5)
+        for seconds in (30.0, 36.0, 40.0):
+            tracker.observe(handler.metrics_service, "completion", seconds)
+        
+        with patch('mcp_server.ai_handler_base.latency_tracker', tracker):
+            with patch('mcp_server.ai_handler_base.load_config', return_value={"browser": {"response_timeout": 120000}}):
+                assert handler.get_response_timeout() == 60000
+            with patch('mcp_server.ai_handler_base.load_config', return_value={"browser": {"response_timeout": 50000}}):
+                assert handler.get_response_timeout() == 50000
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_answer_uses_learned_polling(self):
+        """Test that the handler polls fast services more often"""
+        mock_page = AsyncMock()
+        handler = DeepSeekHandler(mock_page)
+        tracker = LatencyTracker(min_samples=3, min_deadline_ms=1000)
+        for seconds in (2.0, 2.0, 2.0):
+            tracker.observe(handler.metrics_service, "completion", seconds)
+        
+        with patch('mcp_server.ai_handler_base.latency_tracker', tracker):
+            assert await handler.wait_for_answer() is True
+        
+        kwargs = mock_page.wait_for_function.call_args.kwargs
+        assert kwargs["polling"] == 100
+        assert kwargs["timeout"] == 3000
+    
+    @pytest.mark.asyncio
+    async def test_timed_out_answer_does_not_raise_deadline(self):
+        """Test that a hung answer is counted as a timeout, not learned as a completion time"""
+        mock_page = AsyncMock()
+        handler = DeepSeekHandler(mock_page)
+        tracker = LatencyTracker(min_samples=3, min_deadline_ms=1000)
+        for seconds in (2.0, 2.0, 2.0):
+            tracker.observe(handler.metrics_service, "completion", seconds)
+        mock_page.wait_for_function.side_effect = PlaywrightTimeoutError("timeout")
+        
+        with patch('mcp_server.ai_handler_base.latency_tracker', tracker):
+            with handler.stage("completion"):
+                assert await handler.wait_for_answer() is False
+            assert handler.get_response_timeout() == 3000
+        
+        assert tracker.stats()[handler.metrics_service]["completion"]["timeouts"] == 1
+        assert tracker.stats()[handler.metrics_service]["completion"]["samples"] == 3
@@ -1,35 +1,132 @@
 #!/usr/bin/env python3
 """
-Host Chrome Service - Runs on HOST to start Chrome when requested by CONTAINER
+Host Chrome Service - Runs on HOST to start and watch Chrome for the CONTAINER
+
+Protocol: every message is a 4-byte big-endian length followed by a UTF-8 JSON
+object. A connection stays open for any number of requests, answered in order.
+Requests carry an "action" and optional parameters; an "id", if given, is echoed.
+
+    start        {"debug_port": 9222, "headless": false, "timeout": 15}
+    stop         {"debug_port": 9222}
+    status       {"debug_port": 9222}
+    list_targets {"debug_port": 9222}
+    wait_ready   {"debug_port": 9222, "timeout": 15}
+
+Responses carry "success" and either the action's result or "error".
 """
-import socket
-import subprocess
+import asyncio
+import inspect
 import json
-import sys
+import logging
 import os
 import platform
-import logging
-import threading
+import struct
+import subprocess
+import sys
 import time
-from typing import Optional
+from typing import Any, Dict, Optional
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("host-chrome-service")
 
+# Length prefix of every message
+HEADER = struct.Struct(">I")
+# Largest message accepted, in bytes
+MAX_MESSAGE_SIZE = 1 << 20
+
+DEFAULT_LISTEN_PORT = 9223
+DEFAULT_DEBUG_PORT = 9222
+# Seconds to wait for the DevTools endpoint after starting Chrome
+DEFAULT_START_TIMEOUT = 15.0
+# Backoff between readiness probes, in seconds
+INITIAL_PROBE_DELAY = 0.05
+MAX_PROBE_DELAY = 0.5
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends a message that cannot be decoded"""
+
+
+async def read_message(reader: asyncio.StreamReader, prefix: bytes = b'') -> Optional[Dict[str, Any]]:
+    """Read one framed message, or None when the peer closed the connection"""
+    try:
+        header = prefix + await reader.readexactly(HEADER.size - len(prefix))
+    except asyncio.IncompleteReadError as e:
+        if e.partial or prefix:
+            raise ProtocolError("Connection closed inside a message header")
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {size} bytes exceeds {MAX_MESSAGE_SIZE}")
+    try:
+        message = json.loads(await reader.readexactly(size))
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Connection closed inside a message")
+    except ValueError as e:
+        raise ProtocolError(f"Invalid JSON: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("Message is not a JSON object")
+    return message
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Frame a message for sending"""
+    body = json.dumps(message).encode('utf-8')
+    return HEADER.pack(len(body)) + body
+
+
+async def http_get_json(port: int, path: str, host: str = '127.0.0.1', timeout: float = 1.0) -> Any:
+    """GET a JSON document from the DevTools endpoint, or None if it does not answer"""
+    async def fetch():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode('ascii')
+            )
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        status_line = head.split(b"\r\n", 1)[0].split()
+        if len(status_line) < 2 or status_line[1] != b"200":
+            return None
+        return json.loads(body.decode('utf-8'))
+
+    try:
+        return await asyncio.wait_for(fetch(), timeout=timeout)
+    except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return None
+
+
 class HostChromeService:
     """Service that runs on HOST to start Chrome when requested by CONTAINER"""
-    
-    def __init__(self, listen_port: int = 9223, chrome_debug_port: int = 9222):
+
+    def __init__(self, listen_port: int = DEFAULT_LISTEN_PORT, chrome_debug_port: int = DEFAULT_DEBUG_PORT,
+                 listen_host: str = '127.0.0.1'):
         self.listen_port = listen_port
+        self.listen_host = listen_host
         self.chrome_debug_port = chrome_debug_port
-        self.server_socket: Optional[socket.socket] = None
-        self.running = False
-    
+        self.server: Optional[asyncio.AbstractServer] = None
+        # Chrome processes started by this service, by debug port. Plain Popen
+        # objects, so Chrome keeps running when the service exits
+        self.processes: Dict[int, subprocess.Popen] = {}
+        # Serializes start and stop per debug port
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.actions = {
+            'start': self.start,
+            'start_chrome': self.start,
+            'stop': self.stop,
+            'status': self.status,
+            'list_targets': self.list_targets,
+            'wait_ready': self.wait_ready,
+        }
+
     def _find_chrome_executable(self) -> Optional[str]:
         """Find Chrome executable on the HOST system"""
         system = platform.system()
         paths = []
-        
+
         if system == "Windows":
             paths = [
                 "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
@@ -45,143 +142,223 @@ class HostChromeService:
                 "/usr/bin/chromium-browser",
                 "/usr/bin/chromium"
             ]
-        
+
         for path in paths:
             if os.path.exists(path):
                 return path
         return None
-    
-    def start_chrome_on_host(self) -> dict:
-        """Start Chrome on the HOST machine"""
-        try:
-            # Check if Chrome is already running
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex(('127.0.0.1', self.chrome_debug_port))
-            sock.close()
-            
-            if result == 0:
-                logger.info(f"Chrome is already running on port {self.chrome_debug_port}")
-                return {'success': True, 'message': 'Chrome already running', 'port': self.chrome_debug_port}
-            
-            # Find Chrome executable
+
+    def _lock(self, port: int) -> asyncio.Lock:
+        return self._locks.setdefault(port, asyncio.Lock())
+
+    async def _wait_ready(self, port: int, timeout: float) -> Optional[dict]:
+        """Poll /json/version with backoff, returning it as soon as DevTools answers"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = INITIAL_PROBE_DELAY
+        while True:
+            version = await http_get_json(port, '/json/version')
+            if isinstance(version, dict):
+                return version
+            process = self.processes.get(port)
+            if process is not None and process.poll() is not None:
+                logger.error(f"Chrome on port {port} exited with code {process.returncode} before it was ready")
+                return None
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, MAX_PROBE_DELAY)
+
+    async def start(self, debug_port: Optional[int] = None, headless: bool = False,
+                    timeout: float = DEFAULT_START_TIMEOUT) -> dict:
+        """Start Chrome on the HOST machine and return once DevTools answers"""
+        port = int(debug_port or self.chrome_debug_port)
+        async with self._lock(port):
+            started = time.monotonic()
+            version = await http_get_json(port, '/json/version')
+            if isinstance(version, dict):
+                logger.info(f"Chrome is already running on port {port}")
+                return {'success': True, 'message': 'Chrome already running', 'port': port,
+                        'browser': version.get('Browser'), 'startup_seconds': 0.0}
+
             chrome_path = self._find_chrome_executable()
             if not chrome_path:
                 logger.error("Chrome executable not found on host")
                 return {'success': False, 'error': 'Chrome executable not found on host'}
-            
-            # Build Chrome command
+
             cmd = [
                 chrome_path,
-                f"--remote-debugging-port={self.chrome_debug_port}",
+                f"--remote-debugging-port={port}",
                 "--no-first-run",
                 "--no-default-browser-check",
                 "--disable-extensions",
                 "--disable-plugins"
             ]
-            
-            # Start Chrome process
+            if headless:
+                cmd.append("--headless=new")
+
+            kwargs = {}
             if platform.system() == "Windows":
-                subprocess.Popen(
-                    cmd,
-                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-            else:
-                subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-            
-            # Wait a bit for Chrome to start
-            time.sleep(3)
-            
-            logger.info(f"Chrome started on host with debug port {self.chrome_debug_port}")
-            return {'success': True, 'message': 'Chrome started', 'port': self.chrome_debug_port}
-            
-        except Exception as e:
-            logger.error(f"Failed to start Chrome on host: {e}")
-            return {'success': False, 'error': str(e)}
-    
-    def handle_client(self, client_socket, address):
-        """Handle a client connection"""
+                kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+            self.processes[port] = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **kwargs
+            )
+
+            version = await self._wait_ready(port, float(timeout))
+            if version is None:
+                return {'success': False, 'error': f'Chrome did not answer on port {port} within {timeout} s',
+                        'port': port}
+            startup_seconds = round(time.monotonic() - started, 3)
+            logger.info(f"Chrome started on host with debug port {port} after {startup_seconds} s")
+            return {'success': True, 'message': 'Chrome started', 'port': port,
+                    'pid': self.processes[port].pid, 'browser': version.get('Browser'),
+                    'startup_seconds': startup_seconds}
+
+    async def stop(self, debug_port: Optional[int] = None) -> dict:
+        """Stop a Chrome started by this service"""
+        port = int(debug_port or self.chrome_debug_port)
+        async with self._lock(port):
+            process = self.processes.pop(port, None)
+            if process is None or process.poll() is not None:
+                return {'success': False, 'error': f'No Chrome started by this service on port {port}'}
+            process.terminate()
+            try:
+                await asyncio.to_thread(process.wait, 5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                await asyncio.to_thread(process.wait)
+            logger.info(f"Chrome on port {port} stopped")
+            return {'success': True, 'message': 'Chrome stopped', 'port': port}
+
+    async def status(self, debug_port: Optional[int] = None) -> dict:
+        """Report whether DevTools answers on the port"""
+        port = int(debug_port or self.chrome_debug_port)
+        version = await http_get_json(port, '/json/version')
+        process = self.processes.get(port)
+        return {
+            'success': True,
+            'port': port,
+            'running': isinstance(version, dict),
+            'browser': version.get('Browser') if isinstance(version, dict) else None,
+            'pid': process.pid if process is not None and process.poll() is None else None
+        }
+
+    async def list_targets(self, debug_port: Optional[int] = None) -> dict:
+        """List the DevTools targets (tabs, workers) of the Chrome on the port"""
+        port = int(debug_port or self.chrome_debug_port)
+        targets = await http_get_json(port, '/json/list')
+        if not isinstance(targets, list):
+            return {'success': False, 'error': f'Chrome is not answering on port {port}', 'port': port}
+        return {'success': True, 'port': port, 'targets': targets}
+
+    async def wait_ready(self, debug_port: Optional[int] = None, timeout: float = DEFAULT_START_TIMEOUT) -> dict:
+        """Wait until DevTools answers on the port"""
+        port = int(debug_port or self.chrome_debug_port)
+        started = time.monotonic()
+        version = await self._wait_ready(port, float(timeout))
+        if version is None:
+            return {'success': False, 'error': f'Chrome did not answer on port {port} within {timeout} s',
+                    'port': port}
+        return {'success': True, 'port': port, 'browser': version.get('Browser'),
+                'waited_seconds': round(time.monotonic() - started, 3)}
+
+    async def dispatch(self, request: Dict[str, Any]) -> dict:
+        """Run the action named in a request"""
+        params = dict(request)
+        request_id = params.pop('id', None)
+        action = self.actions.get(params.pop('action', None))
+        if action is None:
+            response = {'success': False, 'error': 'Unknown action'}
+        else:
+            try:
+                inspect.signature(action).bind(**params)
+            except TypeError as e:
+                return self._with_id({'success': False, 'error': f'Invalid parameters: {e}'}, request_id)
+            try:
+                response = await action(**params)
+            except Exception as e:
+                logger.error(f"Action {request.get('action')} failed: {e}")
+                response = {'success': False, 'error': str(e)}
+        return self._with_id(response, request_id)
+
+    @staticmethod
+    def _with_id(response: dict, request_id: Any) -> dict:
+        if request_id is not None:
+            response['id'] = request_id
+        return response
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer requests on one connection until the peer closes it"""
+        address = writer.get_extra_info('peername')
         try:
-            data = client_socket.recv(1024)
-            if data:
-                request = json.loads(data.decode('utf-8'))
-                logger.info(f"Received request from {address}: {request}")
-                
-                if request.get('action') == 'start_chrome':
-                    result = self.start_chrome_on_host()
-                    response = json.dumps(result)
-                    client_socket.send(response.encode('utf-8'))
-                else:
-                    response = json.dumps({'error': 'Unknown action'})
-                    client_socket.send(response.encode('utf-8'))
-        except Exception as e:
-            logger.error(f"Error handling client {address}: {e}")
-            error_response = json.dumps({'error': str(e)})
-            client_socket.send(error_response.encode('utf-8'))
+            first = await reader.read(1)
+            if first == b'{':
+                # Older containers send one unframed JSON object and read one back
+                await self._handle_legacy(first, reader, writer)
+                return
+            request = await read_message(reader, first) if first else None
+            while request is not None:
+                logger.info(f"Request from {address}: {request}")
+                writer.write(encode_message(await self.dispatch(request)))
+                await writer.drain()
+                request = await read_message(reader)
+        except ProtocolError as e:
+            logger.warning(f"Dropping client {address}: {e}")
+        except ConnectionError:
+            pass
         finally:
-            client_socket.close()
-    
-    def start_service(self):
-        """Start the TCP service to listen for Chrome start requests"""
+            writer.close()
+
+    async def _handle_legacy(self, first: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        data = first + await reader.read(1023)
         try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind(('127.0.0.1', self.listen_port))
-            self.server_socket.listen(5)
-            self.running = True
-            
-            logger.info(f"Host Chrome Service listening on 127.0.0.1:{self.listen_port}")
-            logger.info("Send {'action': 'start_chrome'} to start Chrome on host")
-            logger.info("Make sure to run your container with: podman run -p 9223:9223 ...")
-            
-            while self.running:
-                try:
-                    client_socket, address = self.server_socket.accept()
-                    # Handle each client in a separate thread
-                    client_thread = threading.Thread(
-                        target=self.handle_client, 
-                        args=(client_socket, address)
-                    )
-                    client_thread.daemon = True
-                    client_thread.start()
-                except socket.error:
-                    if self.running:
-                        logger.error("Socket error in service loop")
-                    break
-                    
-        except Exception as e:
-            logger.error(f"Service error: {e}")
-        finally:
-            if self.server_socket:
-                self.server_socket.close()
-    
-    def stop_service(self):
-        """Stop the service"""
-        self.running = False
-        if self.server_socket:
-            self.server_socket.close()
+            request = json.loads(data.decode('utf-8'))
+            response = await self.dispatch(request if isinstance(request, dict) else {})
+        except ValueError as e:
+            response = {'success': False, 'error': str(e)}
+        writer.write(json.dumps(response).encode('utf-8'))
+        await writer.drain()
+
+    async def listen(self) -> asyncio.AbstractServer:
+        """Start accepting connections; port 0 picks a free port"""
+        self.server = await asyncio.start_server(self.handle_client, self.listen_host, self.listen_port)
+        self.listen_port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"Host Chrome Service listening on {self.listen_host}:{self.listen_port}")
+        return self.server
+
+    async def serve(self):
+        """Listen for requests until cancelled"""
+        server = await self.listen()
+        logger.info("Make sure to run your container with: podman run -p 9223:9223 ...")
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        """Stop listening; Chrome processes keep running"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
 
 def main():
     """Main entry point"""
+    service = HostChromeService()
     if len(sys.argv) > 1 and sys.argv[1] == '--start-chrome':
         # Direct command to start Chrome
-        service = HostChromeService()
-        result = service.start_chrome_on_host()
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DEBUG_PORT
+        result = asyncio.run(service.start(port))
         print(json.dumps(result))
         sys.exit(0 if result['success'] else 1)
     else:
         # Start service mode
-        service = HostChromeService()
         try:
-            service.start_service()
+            asyncio.run(service.serve())
         except KeyboardInterrupt:
             logger.info("Service stopped by user")
-            service.stop_service()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()